@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('vocabulary.json', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
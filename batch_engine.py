@@ -0,0 +1,141 @@
+"""
+BatchEngine — Parallel Folder Frame Extraction
+Runs a bounded pool of ffmpeg workers over a folder of clips, independent of the Tk UI.
+Usable from the GUI (BatchView) or headless on render boxes:
+
+    python batch_engine.py /path/to/clips -j 8 --retries 2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+SETTINGS_FILE = "settings.json"
+VIDEO_EXTS = ('.mp4', '.mov', '.avi')
+
+# Per-file job states
+PENDING, RUNNING, DONE, FAILED, SKIPPED = "pending", "running", "done", "failed", "skipped"
+
+class BatchJob:
+    def __init__(self, src, out):
+        self.src      = src
+        self.out      = out
+        self.status   = PENDING
+        self.attempts = 0
+        self.error    = ""
+        self.elapsed  = 0.0
+
+    @property
+    def name(self):
+        return os.path.basename(self.src)
+
+class BatchEngine:
+    def __init__(self, ffmpeg="ffmpeg", workers=None, retries=1, timeout=300):
+        cpus = os.cpu_count() or 2
+        self.ffmpeg  = ffmpeg
+        self.workers = max(1, workers or cpus)
+        self.retries = max(0, retries)
+        self.timeout = timeout
+        # Split decoder threads between workers so N processes don't oversubscribe the cores
+        self.threads = max(1, cpus // self.workers)
+        self._stop   = threading.Event()
+
+    # ─── Jobs ─────────────────────────────────────────────────────────────────
+    @staticmethod
+    def scan(folder, suffix="_End.png"):
+        """Build one job per video in `folder` (non-recursive, sorted by name)."""
+        files = sorted(f for f in os.listdir(folder) if f.lower().endswith(VIDEO_EXTS))
+        return [BatchJob(os.path.join(folder, f), os.path.join(folder, os.path.splitext(f)[0] + suffix))
+                for f in files]
+
+    def command(self, job):
+        return [self.ffmpeg, "-y", "-v", "error", "-threads", str(self.threads),
+                "-sseof", "-1", "-i", job.src, "-vframes", "1", job.out]
+
+    def _run_job(self, job):
+        job.status = RUNNING
+        t0 = time.perf_counter()
+        while job.attempts <= self.retries and not self._stop.is_set():
+            job.attempts += 1
+            try:
+                res = subprocess.run(self.command(job), capture_output=True, text=True, timeout=self.timeout)
+                if res.returncode == 0 and os.path.exists(job.out):
+                    job.status, job.error = DONE, ""
+                    break
+                job.error = (res.stderr or "").strip()[-300:] or f"ffmpeg exited with code {res.returncode}"
+            except subprocess.TimeoutExpired:
+                job.error = f"Timed out after {self.timeout}s"
+            except OSError as e:
+                job.error = str(e)
+                break  # Missing binary / bad path: retrying won't help
+        else:
+            if self._stop.is_set() and job.attempts == 0:
+                job.status = SKIPPED
+        if job.status == RUNNING:
+            job.status = FAILED
+        job.elapsed = time.perf_counter() - t0
+        return job
+
+    # ─── Execution ────────────────────────────────────────────────────────────
+    def run(self, jobs, on_result=None):
+        """Run all jobs on the worker pool. `on_result(job)` fires as each one finishes,
+        in completion order, from the calling thread. Returns the job list."""
+        self._stop.clear()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self._run_job, j) for j in jobs]
+            for fut in as_completed(futures):
+                job = fut.result()
+                if on_result:
+                    on_result(job)
+        return jobs
+
+    def stop(self):
+        """Skip every job that hasn't started; running ffmpeg processes finish their attempt."""
+        self._stop.set()
+
+    @staticmethod
+    def summary(jobs):
+        counts = {}
+        for j in jobs:
+            counts[j.status] = counts.get(j.status, 0) + 1
+        return counts
+
+def _ffmpeg_from_settings():
+    if os.path.exists(SETTINGS_FILE):
+        try:
+            with open(SETTINGS_FILE) as f:
+                path = json.load(f).get("ffmpeg_path", "")
+                if path and os.path.exists(path): return path
+        except: pass
+    return "ffmpeg"
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Extract the last frame of every video in a folder.")
+    ap.add_argument("folder")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="concurrent ffmpeg processes (default: CPU count)")
+    ap.add_argument("--retries", type=int, default=1)
+    ap.add_argument("--timeout", type=int, default=300, help="seconds per attempt")
+    ap.add_argument("--ffmpeg", default=None, help="ffmpeg binary (default: settings.json or PATH)")
+    args = ap.parse_args(argv)
+
+    engine = BatchEngine(args.ffmpeg or _ffmpeg_from_settings(), args.workers, args.retries, args.timeout)
+    jobs = engine.scan(args.folder)
+    print(f"Found {len(jobs)} videos, {engine.workers} workers...")
+    t0 = time.perf_counter()
+
+    def report(job):
+        mark = "✓" if job.status == DONE else "✗"
+        line = f"  {mark} {job.name}  ({job.elapsed:.2f}s, {job.attempts} attempt(s))"
+        print(line if job.status == DONE else f"{line}  {job.error}", flush=True)
+
+    engine.run(jobs, report)
+    counts = engine.summary(jobs)
+    print(f"Done in {time.perf_counter()-t0:.1f}s — {counts.get(DONE, 0)} ok, {counts.get(FAILED, 0)} failed")
+    return 0 if not counts.get(FAILED) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,685 @@
+"""
+Benchmarks — Timing Checks for the Hot Paths
+Synthetic inputs only, no GUI and no media files required.
+
+    python benchmarks.py            # run everything
+    python benchmarks.py donor      # run one benchmark by name
+"""
+import sys
+import time
+import argparse
+import numpy as np
+
+BENCHES = {}
+
+def bench(name):
+    def register(fn):
+        BENCHES[name] = fn
+        return fn
+    return register
+
+def best_of(fn, repeat=3):
+    """Best wall time (seconds) of `repeat` calls."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+def _noise_image(w, h, seed=1):
+    rng = np.random.default_rng(seed)
+    return (rng.random((h, w, 3)) * 60 + 90).astype(np.uint8)
+
+# ─── Inpainter ────────────────────────────────────────────────────────────────
+def _legacy_random_donor(search_area, hx, hy, w, h, target_mean, scored_target=None, tries=250):
+    """The pre-SAT donor search: random candidates with np.mean per slice, overlaps skipped.
+    As shipped it made 250 attempts; with `scored_target` it keeps sampling until that many
+    candidates were actually scored. Returns (best, candidates scored)."""
+    best, min_diff, scored, attempts = None, float('inf'), 0, 0
+    while (scored < scored_target and attempts < 200000) if scored_target else attempts < tries:
+        attempts += 1
+        px = np.random.randint(0, search_area.shape[1] - w)
+        py = np.random.randint(0, search_area.shape[0] - h)
+        if (px < hx + w and px + w > hx) and (py < hy + h and py + h > hy): continue
+        cand_mean = np.mean(search_area[py:py+h, px:px+w], axis=(0,1))
+        scored += 1
+        diff = np.sum((target_mean - cand_mean)**2)
+        if diff < min_diff: min_diff, best = diff, (px, py)
+    return best, scored
+
+@bench("donor")
+def bench_donor_search():
+    import local_inpainter
+    print("Donor search: random np.mean sampling vs exhaustive summed-area-table search")
+    print("(ROI centred in its search window, radius max(200, 1.5 x ROI side))")
+    for size in (100, 200, 300, 400):
+        r = max(200, int(1.5 * size))
+        search = _noise_image(size + 2 * r, size + 2 * r)
+        hole = (r, r, r + size, r + size)
+        target = {"mean": np.array([120.0, 120.0, 120.0]), "std": np.zeros(3), "edge": 0.0}
+        np.random.seed(0)
+        shipped = _legacy_random_donor(search, r, r, size, size, target["mean"])[1]
+        legacy = best_of(lambda: _legacy_random_donor(search, r, r, size, size, target["mean"], 250))
+        n = 2 * r + 1
+        pos = np.arange(n)
+        valid = n * n - int(((pos < r + size) & (pos + size > r)).sum()) ** 2   # Positions clear of the hole
+        sf = search.astype(np.float32)
+        sat = best_of(lambda: local_inpainter.find_donor(sf, hole, size, size, target))
+        sat_full = best_of(lambda: local_inpainter.find_donor(sf, hole, size, size, target, 0.5, 0.5))
+        print(f"  {size}x{size}: random 250 scored {legacy*1000:7.1f} ms (250 attempts score {shipped:3d}) | "
+              f"SAT all {valid} {sat*1000:6.1f} ms ({legacy/sat:4.1f}x) | +var+edge {sat_full*1000:6.1f} ms")
+
+_ERASE_MEM_CHILD = """
+import sys, time
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+import local_inpainter
+
+def legacy_full_frame(img, x1, y1, x2, y2):
+    # The pre-tile blend stage: full-size RGBA copy, mask, blurred mask, overlay and composite
+    img = img.convert("RGBA")
+    mask = Image.new("L", img.size, 0)
+    ImageDraw.Draw(mask).rectangle((x1-1, y1-1, x2+1, y2+1), fill=255)
+    mask_blur = mask.filter(ImageFilter.GaussianBlur(radius=8))
+    overlay = Image.new("RGBA", img.size, (0,0,0,0))
+    overlay.paste(img.crop((x1, y1, x2, y2)), (x1, y1))
+    return Image.composite(overlay, img, mask_blur)
+
+def rss():
+    with open("/proc/self/status") as f:
+        vals = dict(l.split(":", 1) for l in f)
+    return int(vals["VmRSS"].split()[0]) * 1024, int(vals["VmHWM"].split()[0]) * 1024
+
+mode, w, h = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+img = Image.fromarray(np.random.default_rng(1).integers(90, 150, (h, w, 3), dtype=np.uint8))
+with open("/proc/self/clear_refs", "w") as f: f.write("5")   # Reset the peak-RSS watermark
+base = rss()[0]
+fn = (lambda *a: local_inpainter.professional_local_erase(*a, in_place=True)) if mode == "tile" else legacy_full_frame
+t0 = time.perf_counter()
+fn(img, w - 260, h - 140, w - 60, h - 40)
+dt = time.perf_counter() - t0
+print(dt, rss()[1] - base)
+"""
+
+@bench("erase-memory")
+def bench_erase_memory():
+    """Peak RSS added by one 200x100 erase, per image size (fresh process each, Linux only)."""
+    import os, subprocess
+    if not os.path.exists("/proc/self/clear_refs"):
+        print("erase-memory: needs Linux /proc peak-RSS reset"); return
+    print("Erase peak memory: 200x100 logo in the bottom-right corner (extra peak RSS during the call)")
+    here = os.path.dirname(os.path.abspath(__file__))
+    for label, (w, h) in [("1080p", (1920, 1080)), ("4K", (3840, 2160)), ("8K", (7680, 4320))]:
+        row = []
+        for mode in ("legacy", "tile"):
+            out = subprocess.run([sys.executable, "-c", _ERASE_MEM_CHILD, mode, str(w), str(h)], cwd=here,
+                                 capture_output=True, text=True)
+            if out.returncode != 0:
+                row.append(f"{mode} failed — {out.stderr.strip()[-120:]}"); continue
+            dt, extra = out.stdout.split()
+            row.append(f"{mode} {float(dt)*1000:7.1f} ms +{int(extra)/2**20:6.1f} MiB")
+        print(f"  {label:>5} ({w*h*3/2**20:5.1f} MiB RGB): " + " | ".join(row))
+    print("  (legacy = the old full-frame blend stage alone, excluding its search)")
+
+@bench("patchmatch")
+def bench_patchmatch():
+    """Donor tier vs PatchMatch tier (full and time-budgeted) on regions inside 1080p and 4K frames."""
+    import local_inpainter
+    from PIL import Image
+    print("Inpaint tiers: region fill throughput (hole kilopixels per second)")
+    for label, (W, H), sizes in [("1080p", (1920, 1080), ((150, 150), (300, 200))),
+                                 ("4K", (3840, 2160), ((300, 300), (600, 400)))]:
+        frame = Image.fromarray(_noise_image(W, H))
+        for w, h in sizes:
+            x1, y1 = (W - w) // 2, (H - h) // 2
+            row = []
+            for tag, kw in (("donor", {}), ("patchmatch", {"method": "patchmatch"}),
+                            ("pm 1s budget", {"method": "patchmatch", "time_budget": 1.0})):
+                dt = best_of(lambda: local_inpainter.professional_local_erase(
+                    frame.copy(), x1, y1, x1 + w, y1 + h, **kw), repeat=1 if "method" in kw else 3)
+                row.append(f"{tag} {dt*1000:7.0f} ms ({w*h/dt/1000:6.1f} kpx/s)")
+            print(f"  {label:>5} {w}x{h}: " + " | ".join(row))
+
+# ─── Previews ─────────────────────────────────────────────────────────────────
+@bench("preview")
+def bench_preview():
+    """Canvas preview of a 50 MP still: decode + thumbnail every time vs the pyramid cache."""
+    import os, tempfile
+    from PIL import Image
+    from preview_cache import PreviewCache
+    print("Preview: 8660x5773 (50 MP) still fitted to a 1100x700 canvas")
+    with tempfile.TemporaryDirectory() as d:
+        for ext in ("jpg", "png"):
+            path = os.path.join(d, f"still.{ext}")
+            Image.fromarray(_noise_image(8660, 5773)).save(path, quality=90)
+            def legacy():
+                img = Image.open(path).copy()
+                img.thumbnail((1100, 700))
+            cache = PreviewCache()
+            t0 = time.perf_counter()
+            cache.get(path).render((1100, 700))
+            first = time.perf_counter() - t0
+            again = best_of(lambda: cache.get(path).render((1100, 700)))
+            boxes = iter([(700, 450), (900, 600), (640, 400)])
+            resize = best_of(lambda: cache.get(path).render(next(boxes)))   # New size each call
+            print(f"  {ext}: full decode {best_of(legacy, 1)*1000:7.1f} ms | cache first {first*1000:7.1f} ms | "
+                  f"hit {again*1000:5.2f} ms | hit+resize {resize*1000:5.2f} ms")
+
+# ─── Script Parsing ───────────────────────────────────────────────────────────
+def _legacy_extract_dialogue(text):
+    dialogues = []
+    lines = text.split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if (line.isupper() and 2 <= len(line.split()) <= 5
+                and not any(line.startswith(k) for k in ["INT.", "EXT.", "CUT", "FADE", "DISSOLVE"])):
+            speaker = line
+            speech_lines = []
+            i += 1
+            while i < len(lines):
+                sl = lines[i].strip()
+                if not sl:
+                    i += 1
+                    break
+                if sl.startswith("(") and sl.endswith(")"):
+                    i += 1
+                    continue
+                if sl.isupper() and 2 <= len(sl.split()) <= 5:
+                    break
+                speech_lines.append(sl)
+                i += 1
+            if speech_lines:
+                dialogues.append((speaker, " ".join(speech_lines)))
+        else:
+            i += 1
+    return dialogues
+
+def _legacy_extract_action(text):
+    action, skip_next = [], False
+    for line in text.split('\n'):
+        ls = line.strip()
+        if not ls: continue
+        if ls.isupper() and 2 <= len(ls.split()) <= 5:
+            skip_next = True
+            continue
+        if skip_next and (ls.startswith('"') or ls[0].islower() or ls.startswith("(")):
+            continue
+        skip_next = False
+        action.append(ls)
+    return "\n".join(action)
+
+def _legacy_parse(text):
+    """The three-pass parser: split + join per scene, then separate action and dialogue scans."""
+    from scene_parser import Scene, ScriptParser
+    scenes, current, buf = [], None, []
+    def close():
+        raw = "\n".join(buf).strip()
+        current.action = _legacy_extract_action(raw)
+        current.dialogue = _legacy_extract_dialogue(raw)
+        ScriptParser._enrich_scene(current)
+        scenes.append(current)
+    for line in text.split('\n'):
+        ls = line.strip()
+        if not ls:
+            buf.append(""); continue
+        if ScriptParser.HEADER_RE.match(ls):
+            if current:
+                close(); buf = []
+            current = ScriptParser._header_scene(ls)
+        else:
+            if not current: current = Scene("PROLOGUE", "UNKNOWN", "DAY", "UNKNOWN")
+            buf.append(ls)
+    if current: close()
+    return scenes
+
+@bench("tokenizer")
+def bench_tokenizer():
+    """Script parsing throughput: legacy three-pass body analysis vs the single-pass lexer."""
+    from scene_parser import ScriptParser
+    text = _synthetic_script(3000)
+    n = text.count("\n") + 1
+    print(f"Script parsing: {n} lines, {len(text)/2**20:.1f} MiB")
+    legacy = best_of(lambda: _legacy_parse(text))
+    lexer = best_of(lambda: ScriptParser.parse_text(text))
+    tokens = best_of(lambda: sum(1 for _ in ScriptParser.tokenize(text.split("\n"))))
+    print(f"  legacy three-pass : {n/legacy/1000:7.1f} k lines/s")
+    print(f"  single-pass parse : {n/lexer/1000:7.1f} k lines/s ({legacy/lexer:.2f}x)")
+    print(f"  tokenize only     : {n/tokens/1000:7.1f} k lines/s")
+
+def _legacy_enrich(text, vocab):
+    """The any(w in text ...) chain, generalised to a vocabulary: one substring scan per term."""
+    out = {}
+    for cat, spec in vocab.items():
+        for rule in spec["rules"]:
+            if any(t.rstrip("*") in text for t in rule["terms"]):
+                out[cat] = rule["label"]; break
+        else:
+            if spec["default"]: out[cat] = spec["default"]
+    return out
+
+@bench("keywords")
+def bench_keywords():
+    """Scene enrichment: per-term substring scans vs the compiled trie regex, small and huge vocabularies."""
+    import random
+    from keyword_rules import KeywordRules, default_vocabulary
+    from scene_parser import ScriptParser
+    texts = [(s.header + " " + s.action).upper() for s in ScriptParser.parse_text(_synthetic_script(1000))]
+    rnd = random.Random(2)
+    builtin = default_vocabulary()
+    big = {cat: {"default": spec["default"], "rules": [dict(r, terms=list(r["terms"])) for r in spec["rules"]]}
+           for cat, spec in builtin.items()}
+    for cat in big.values():                        # ~2000 extra terms spread over every rule
+        for r in cat["rules"]:
+            r["terms"] += ["".join(rnd.choice("ABCDEFGHIKLMNOPRSTUY") for _ in range(rnd.randint(4, 10)))
+                           for _ in range(2000 // 9)]
+    print(f"Keyword enrichment: {len(texts)} scene texts")
+    for label, vocab in (("built-in vocabulary", builtin), ("~2000-term vocabulary", big)):
+        nterms = sum(len(r["terms"]) for spec in vocab.values() for r in spec["rules"])
+        rules = KeywordRules(vocab)
+        legacy = best_of(lambda: [_legacy_enrich(t, vocab) for t in texts])
+        compiled = best_of(lambda: [rules.classify(t) for t in texts])
+        print(f"  {label} ({nterms} terms): substring chain {legacy*1000:7.1f} ms | "
+              f"compiled {compiled*1000:6.1f} ms ({legacy/compiled:4.1f}x)")
+
+# ─── Storyboard ───────────────────────────────────────────────────────────────
+def _synthetic_script(scenes, seed=1):
+    """A feature-length-ish screenplay: headers, action, character cues, parentheticals, dialogue."""
+    import random
+    rnd = random.Random(seed)
+    places = ["WAREHOUSE", "ROOFTOP", "BAMBOO GROVE", "TRAIN STATION", "KITCHEN", "CAGE ARENA"]
+    times = ["DAY", "NIGHT", "DUSK", "MORNING"]
+    words = ("the a storm light fire shadows dark wide pan follows slowly across smoke glass "
+             "he she turns runs stops looks silent burning golden gray close up").split()
+    cast = ["MAYA", "KENJI", "DR. ROSS", "THE STRANGER"]
+    out = []
+    for i in range(scenes):
+        out.append(f"{rnd.choice(['INT.', 'EXT.'])} {rnd.choice(places)} - {rnd.choice(times)}")
+        out.append("")
+        for _ in range(rnd.randint(2, 5)):
+            out.append(" ".join(rnd.choice(words) for _ in range(rnd.randint(8, 18))).capitalize() + ".")
+            out.append("")
+            if rnd.random() < 0.7:
+                out.append(rnd.choice(cast))
+                if rnd.random() < 0.3: out.append("(quietly)")
+                out.append(" ".join(rnd.choice(words) for _ in range(rnd.randint(4, 14))).capitalize() + ".")
+                out.append("")
+    return "\n".join(out)
+
+@bench("storyboard")
+def bench_storyboard():
+    """process_script wall time, in-process vs the process pool."""
+    import os, tempfile
+    from storyboard_generator import StoryboardGenerator
+    n, cores = 48, os.cpu_count() or 1
+    text = _synthetic_script(n)
+    print(f"Storyboard render: {n} scenes, {cores} CPU(s)")
+    with tempfile.TemporaryDirectory() as d:
+        gen = StoryboardGenerator(d, cache=False, parse_cache=False)
+        for workers in sorted({1, 2, cores}):
+            dt = best_of(lambda: gen.process_script(text, "Manga", workers=workers), 1)
+            print(f"  workers={workers:<2}: {dt:6.2f} s ({n/dt:5.1f} scenes/s)")
+
+def _legacy_render_frame(renderer, scene):
+    """Frame drawing before the layer cache: every dot and polygon redrawn per panel."""
+    from PIL import Image, ImageDraw
+    import display_list
+    from vector_renderer import FW, FH
+    frame = Image.new("RGB", (FW, FH), (255, 255, 255))
+    draw = ImageDraw.Draw(frame, "RGBA")
+    text = (scene.action + " " + scene.header).upper()
+    for x in range(0, FW, 12):
+        for y in range(0, 240, 12):
+            draw.ellipse([x, y, x+3, y+3], fill=(220, 220, 230))
+    draw.rectangle([0, FH-80, FW, FH], fill=(10, 10, 10))
+    if "CAGE" in text or "GROVE" in text:
+        for i in range(-1, 2):
+            tx = FW//2 + i*180
+            draw.line([(tx, FH-80), (tx, 20)], fill=(0,0,0), width=6)
+            if i == 0:
+                draw.rectangle([tx-35, 40, tx+35, 160], outline=(0,0,0), width=3)
+                for l in range(5):
+                    draw.line([(tx-35+l*14, 40), (tx-35+l*14, 160)], fill=(0,0,0), width=1)
+    speakers = sorted(set(d[0].upper() for d in scene.dialogue))
+    if len(speakers) >= 2:
+        display_list.draw_ops(draw, renderer._char_ops(140, FH-50, scale=0.8))
+        display_list.draw_ops(draw, renderer._char_ops(FW-140, FH-50, scale=0.8, flip=True))
+    else:
+        display_list.draw_ops(draw, renderer._char_ops(FW//2, FH-30, scale=1.0))
+    return frame
+
+def _frame(renderer, scene):
+    """The art frame of `scene` through the layer cache, as render_scene composites it."""
+    import display_list
+    from vector_renderer import FW, FH
+    return display_list.rasterize((FW, FH), [renderer._frame_op(scene, (0, 0))])
+
+def _card(renderer, scene, idx):
+    """The finished card image for scene `idx` (nothing written)."""
+    import display_list
+    from vector_renderer import CW, CH
+    return display_list.rasterize((CW, CH), renderer.card_ops(scene, idx))
+
+@bench("frame-layers")
+def bench_frame_layers():
+    """Per-panel art frame: redraw everything vs composite cached layers."""
+    import tempfile
+    from scene_parser import ScriptParser
+    from vector_renderer import VectorRenderer
+    scenes = ScriptParser.parse_text(_synthetic_script(60))
+    with tempfile.TemporaryDirectory() as d:
+        r = VectorRenderer(d)
+        for sc in scenes:                                  # Same pixels, and warms the layer cache
+            assert np.array_equal(np.asarray(_frame(r, sc)), np.asarray(_legacy_render_frame(r, sc)))
+        def each(fn):                                      # Frames are pasted and dropped, as in render_scene
+            for sc in scenes: fn(sc)
+        t_old = best_of(lambda: each(lambda sc: _legacy_render_frame(r, sc))) / len(scenes)
+        t_new = best_of(lambda: each(lambda sc: _frame(r, sc))) / len(scenes)
+    print(f"Frame render: {len(scenes)} scenes (pixel-identical output)")
+    print(f"  redraw     : {t_old*1000:6.2f} ms/frame")
+    print(f"  layer cache: {t_new*1000:6.2f} ms/frame ({t_old/t_new:4.1f}x)")
+
+def _legacy_font(size, bold=False):
+    from PIL import ImageFont
+    names = ["arialbd.ttf", "Arial Bold.ttf", "arial.ttf"] if bold else ["arial.ttf", "Arial.ttf"]
+    for n in names:
+        try: return ImageFont.truetype(n, size)
+        except: pass
+    return ImageFont.load_default()
+
+def _legacy_card_text(draw, scene, idx):
+    """Card header + footer text before the font registry: fonts looked up per call, char-count wrap."""
+    import textwrap
+    from vector_renderer import CW, MARGIN
+    draw.text((MARGIN, 25), f"SCENE {idx+1}", fill=(140, 140, 145), font=_legacy_font(12, True))
+    draw.text((MARGIN, 45), scene.header.upper(), fill=(0, 0, 0), font=_legacy_font(16, True))
+    draw.text((CW - 112, 36), scene.shot_type.split()[0], fill=(120, 130, 160), font=_legacy_font(11, True))
+    f_lbl, f_txt = _legacy_font(11, bold=True), _legacy_font(13)
+    draw.text((MARGIN, 450), "ACTION", fill=(160, 160, 165), font=f_lbl)
+    draw.text((MARGIN, 470), textwrap.fill(scene.action, width=82), fill=(30, 30, 30), font=f_txt)
+    if scene.dialogue:
+        draw.text((MARGIN, 650), "DIALOGUE", fill=(160, 160, 165), font=f_lbl)
+        y = 675
+        for speaker, speech in scene.dialogue[:2]:
+            draw.text((MARGIN, y), f"{speaker}:", fill=(0, 0, 0), font=_legacy_font(12, True))
+            y += 20
+            swp = textwrap.fill(f'"{speech}"', width=74)
+            draw.text((MARGIN+15, y), swp, fill=(50, 50, 50), font=f_txt)
+            y += len(swp.split("\n")) * 18 + 12
+
+@bench("text-layout")
+def bench_text_layout():
+    """Card text per panel: per-call font lookups + textwrap vs the font registry + layout LRU."""
+    import tempfile
+    from PIL import Image, ImageDraw
+    import font_registry
+    from scene_parser import ScriptParser
+    from vector_renderer import VectorRenderer, CW, CH
+    scenes = ScriptParser.parse_text(_synthetic_script(60))
+    card = Image.new("RGB", (CW, CH), (255, 255, 255))
+    draw = ImageDraw.Draw(card, "RGBA")
+    with tempfile.TemporaryDirectory() as d:
+        r = VectorRenderer(d)
+        def new(sc, i):
+            r._draw_header(draw, sc, i); r._draw_footer(draw, sc)
+        def each(fn):
+            for i, sc in enumerate(scenes): fn(sc, i)
+        t_old = best_of(lambda: each(lambda sc, i: _legacy_card_text(draw, sc, i))) / len(scenes)
+        font_registry.registry.clear()
+        t0 = time.perf_counter()
+        each(new)                                          # Fonts resolved, layouts + line masks cached
+        t_cold = (time.perf_counter() - t0) / len(scenes)
+        t_warm = best_of(lambda: each(new)) / len(scenes)
+    legacy = type(_legacy_font(13)).__name__
+    reg = font_registry.registry
+    print(f"Card text: {len(scenes)} scenes")
+    print(f"  font files: regular={reg.path()}, bold={reg.path('sans', 'bold')}")
+    print(f"  legacy         : {t_old*1000:6.2f} ms/card ({legacy})")
+    print(f"  registry, cold : {t_cold*1000:6.2f} ms/card (first sight of each text)")
+    print(f"  registry, warm : {t_warm*1000:6.2f} ms/card (re-render of seen text)")
+
+def _legacy_svg_stub(svg_path, png_path):
+    """The scene SVG before the display list: a wrapper around the preview PNG."""
+    import os
+    from vector_renderer import CW, CH
+    with open(svg_path, "w") as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{CW}" height="{CH}"><image href="{os.path.basename(png_path)}" width="{CW}" height="{CH}"/></svg>')
+
+@bench("panel-output")
+def bench_panel_output():
+    """Render + write 48 cards: two synchronous PNG saves vs the writer pool, per format."""
+    import os, tempfile
+    from scene_parser import ScriptParser
+    from vector_renderer import VectorRenderer
+    scenes = ScriptParser.parse_text(_synthetic_script(48))
+    n = len(scenes)
+    print(f"Panel output: {n} cards, {os.cpu_count() or 1} CPU(s)")
+
+    def size(d):
+        return sum(os.path.getsize(os.path.join(d, f)) for f in os.listdir(d) if not f.endswith(".svg")
+                   and os.path.isfile(os.path.join(d, f)))
+
+    with tempfile.TemporaryDirectory() as d:
+        r = VectorRenderer(os.path.join(d, "legacy"))
+        r.keep_panels = False
+        for i, sc in enumerate(scenes): _card(r, sc, i)      # Warm the font / layer caches for everyone
+        t0 = time.perf_counter()
+        for i, sc in enumerate(scenes): _card(r, sc, i)
+        t_draw = time.perf_counter() - t0
+        def legacy():
+            for i, sc in enumerate(scenes):
+                card = _card(r, sc, i)
+                card.save(r.panel_path(i), quality=97)
+                card.save(os.path.join(r.output_dir, f"scene_{i+1}.png"))
+                _legacy_svg_stub(r.svg_path(i), os.path.join(r.output_dir, f"scene_{i+1}.png"))
+        dt = best_of(legacy, 1)
+        print(f"  legacy (2 PNG saves)   : {dt:5.2f} s  {n/dt:6.1f} cards/s  {size(r.panel_dir)/n/1024:5.0f} KiB/card")
+        for label, fmt, level in (("png level 6", "png", 6), ("png level 1", "png", 1),
+                                  ("webp lossless", "webp", 4), ("jpeg q90", "jpeg", 6)):
+            r = VectorRenderer(os.path.join(d, fmt + str(level)), fmt, level, 90)
+            r.keep_panels = False
+            def run():
+                for i, sc in enumerate(scenes): r.render_scene(sc, "Manga", i)
+                r.flush()
+            dt = best_of(run, 1)
+            r.writer.close()
+            print(f"  {label:<23}: {dt:5.2f} s  {n/dt:6.1f} cards/s  {size(r.panel_dir)/n/1024:5.0f} KiB/card")
+    print(f"  (drawing alone: {t_draw:5.2f} s; the rest is encode + write)")
+
+_STRIP_MEM_CHILD = """
+import sys, time, math
+from PIL import Image, ImageDraw
+import font_registry
+from strip_sheet import StripSheet
+
+def legacy_sheet(panels, out, title):
+    # The old builder: one canvas for the whole board, saved in one go
+    CW, CH, cols = 640, 840, 2
+    rows = math.ceil(len(panels) / cols)
+    sheet = Image.new("RGB", ((CW + 40) * cols, rows * (CH + 40) + 120), (245, 245, 245))
+    ImageDraw.Draw(sheet).text((40, 35), title, fill=(0, 0, 0), font=font_registry.font(38, True))
+    for i, p in enumerate(panels):
+        with Image.open(p) as im: sheet.paste(im, (40 + (i % cols) * (CW + 40), 120 + (i // cols) * (CH + 40)))
+    sheet.save(out)
+
+def rss():
+    with open("/proc/self/status") as f:
+        vals = dict(l.split(":", 1) for l in f)
+    return int(vals["VmRSS"].split()[0]) * 1024, int(vals["VmHWM"].split()[0]) * 1024
+
+mode, d, n = sys.argv[1], sys.argv[2], int(sys.argv[3])
+panels = [f"{d}/p{i}.png" for i in range(n)]
+font_registry.font(38, True)
+with open("/proc/self/clear_refs", "w") as f: f.write("5")
+base = rss()[0]
+t0 = time.perf_counter()
+if mode == "legacy":
+    legacy_sheet(panels, f"{d}/legacy.png", "BENCH")
+else:
+    sheet = StripSheet(d, "BENCH", panels_per_sheet=int(sys.argv[4]) or None, tiles=mode == "tiles", name=mode)
+    for p in panels: sheet.add(p)
+    sheet.close()
+print(time.perf_counter() - t0, rss()[1] - base)
+"""
+
+@bench("strip-sheet")
+def bench_strip_sheet():
+    """Strip sheet for 150 panels: one giant canvas vs streamed bands / pages / DeepZoom (fresh process each)."""
+    import os, subprocess, tempfile
+    from scene_parser import ScriptParser
+    from vector_renderer import VectorRenderer
+    if not os.path.exists("/proc/self/clear_refs"):
+        print("strip-sheet: needs Linux /proc peak-RSS reset"); return
+    n = 150
+    here = os.path.dirname(os.path.abspath(__file__))
+    print(f"Strip sheet: {n} panels (extra peak RSS during the build)")
+    with tempfile.TemporaryDirectory() as d:
+        r = VectorRenderer(os.path.join(d, "r"), writers=0)
+        r.render_scene(ScriptParser.parse_text(_synthetic_script(1))[0], "Manga", 0)
+        for i in range(n): os.link(r.panel_path(0), os.path.join(d, f"p{i}.png"))
+        for mode, per_page in (("legacy", 0), ("stream", 0), ("stream", 24), ("tiles", 0)):
+            out = subprocess.run([sys.executable, "-c", _STRIP_MEM_CHILD, mode, d, str(n), str(per_page)],
+                                 cwd=here, capture_output=True, text=True)
+            label = mode + (f" ({per_page}/page)" if per_page else "")
+            if out.returncode != 0:
+                print(f"  {label:<16}: failed — {out.stderr.strip()[-120:]}"); continue
+            dt, extra = out.stdout.split()
+            print(f"  {label:<16}: {float(dt):6.2f} s  +{int(extra)/2**20:7.1f} MiB")
+
+@bench("render-cache")
+def bench_render_cache():
+    """Regenerate a 150-scene script: cold, unchanged, and after a one-line edit."""
+    import os, tempfile
+    from render_cache import RenderCache
+    from storyboard_generator import StoryboardGenerator
+    text = _synthetic_script(150)
+    lines = text.split("\n")
+    k = next(i for i, l in enumerate(lines) if i > len(lines) // 2 and l and not l.isupper())
+    edited = "\n".join(lines[:k] + [lines[k] + " Suddenly the lights die."] + lines[k+1:])
+    print("Render cache: 150 scenes, in-process rendering")
+    with tempfile.TemporaryDirectory() as d:
+        gen = StoryboardGenerator(os.path.join(d, "out"), cache=RenderCache(os.path.join(d, "cache")),
+                                  parse_cache=os.path.join(d, "parsed"))
+        for label, script in (("cold", text), ("unchanged", text), ("one-line edit", edited)):
+            t0 = time.perf_counter()
+            gen.process_script(script, "Manga", workers=1)
+            dt = time.perf_counter() - t0
+            print(f"  {label:<13}: {dt:6.2f} s  (cache hits {gen.cache.hits}, misses {gen.cache.misses})")
+            gen.cache.hits = gen.cache.misses = 0
+    print("  (after an edit most of the time is the full strip-sheet rebuild, not panel rendering)")
+
+@bench("scene-store")
+def bench_scene_store():
+    """Reloading a parsed script: re-parse vs JSON Lines vs the binary scene table."""
+    import os, pickle, tempfile
+    from scene_parser import ScriptParser
+    from scene_store import SceneTable
+    text = _synthetic_script(2000)
+    scenes = ScriptParser.parse_text(text)
+    table = SceneTable.from_scenes(scenes)
+    print(f"Scene store: {len(scenes)} scenes, {len(text)/1e6:.1f} MB script")
+    with tempfile.TemporaryDirectory() as d:
+        jl, bn = os.path.join(d, "s.jsonl"), os.path.join(d, "s.scn")
+        table.save_jsonl(jl); table.save(bn)
+        assert list(SceneTable.load(bn)) == scenes == list(SceneTable.load_jsonl(jl))
+        rows = [
+            ("re-parse", best_of(lambda: ScriptParser.parse_text(text)), len(text.encode())),
+            ("jsonl load", best_of(lambda: list(SceneTable.load_jsonl(jl))), os.path.getsize(jl)),
+            ("binary load", best_of(lambda: list(SceneTable.load(bn))), os.path.getsize(bn)),
+            ("binary save", best_of(lambda: table.save(bn)), os.path.getsize(bn)),
+        ]
+    for label, dt, size in rows:
+        print(f"  {label:<12}: {dt*1000:7.1f} ms  ({size/1024:7.0f} KiB)")
+    print(f"  pickled scenes (to workers): {len(pickle.dumps(scenes))/1024:.0f} KiB, "
+          f"one Scene ~{len(pickle.dumps(scenes[0]))} bytes")
+
+def _svg_pdf(svg_paths, out):
+    """The export_as_pdf page loop: svg2rlg, scale to the page width, draw (no metadata text)."""
+    from reportlab.lib.pagesizes import landscape, LETTER
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen import canvas
+    from reportlab.graphics import renderPDF
+    from svglib.svglib import svg2rlg
+    c = canvas.Canvas(out, pagesize=landscape(LETTER))
+    width, height = landscape(LETTER)
+    for p in svg_paths:
+        drawing = svg2rlg(p)
+        factor = (width - 2*inch) / drawing.width
+        drawing.width *= factor; drawing.height *= factor
+        drawing.scale(factor, factor)
+        renderPDF.draw(drawing, c, 1*inch, height - drawing.height - 1*inch)
+        c.showPage()
+    c.save()
+
+@bench("vector-svg")
+def bench_vector_svg():
+    """Scene SVGs: PNG-wrapper stubs vs display-list vectors, written and exported to PDF."""
+    import os, tempfile
+    from scene_parser import ScriptParser
+    from vector_renderer import VectorRenderer
+    scenes = ScriptParser.parse_text(_synthetic_script(24))
+    n = len(scenes)
+    print(f"Vector SVG: {n} scenes")
+    with tempfile.TemporaryDirectory() as d:
+        r = VectorRenderer(d, writers=0)
+        r.keep_panels = False
+        for i, sc in enumerate(scenes): r.render_scene(sc, "Manga", i)
+        ops = [r.card_ops(sc, i) for i, sc in enumerate(scenes)]
+        stubs = [os.path.join(d, f"stub_{i+1}.svg") for i in range(n)]
+        t_stub = best_of(lambda: [_legacy_svg_stub(stubs[i], r.preview_path(i)) for i in range(n)])
+        t_vec = best_of(lambda: [r._write_svg(i, ops[i]) for i in range(n)])
+        vectors = [r.svg_path(i) for i in range(n)]
+        for label, paths, dt in (("stub svg", stubs, t_stub), ("vector svg", vectors, t_vec)):
+            pdf = os.path.join(d, label.replace(" ", "_") + ".pdf")
+            try:
+                t_pdf = best_of(lambda: _svg_pdf(paths, pdf), 1)
+            except Exception as e:
+                print(f"  {label:<10}: pdf export failed — {e}"); continue
+            svg_kib = sum(map(os.path.getsize, paths)) / n / 1024
+            print(f"  {label:<10}: write {dt/n*1000:5.2f} ms/scene ({svg_kib:4.0f} KiB)  "
+                  f"pdf {t_pdf:5.2f} s, {os.path.getsize(pdf)/n/1024:5.0f} KiB/page")
+
+@bench("pdf-export")
+def bench_pdf_export():
+    """300-scene PDF: svg2rlg per page vs panel rasters embedded directly."""
+    import os, tempfile
+    try:
+        from export_manager import ExportManager
+    except ImportError as e:
+        print(f"pdf-export: needs {e.name}"); return
+    from scene_parser import ScriptParser
+    from vector_renderer import VectorRenderer
+    scenes = ScriptParser.parse_text(_synthetic_script(300))
+    n = len(scenes)
+    print(f"PDF export: {n} scenes, {os.cpu_count() or 1} CPU(s)")
+    with tempfile.TemporaryDirectory() as d:
+        r = VectorRenderer(d)
+        r.keep_panels = False
+        for i, sc in enumerate(scenes): r.render_scene(sc, "Manga", i)
+        r.flush()
+        svgs = [r.svg_path(i) for i in range(n)]
+        pngs = [r.preview_path(i) for i in range(n)]
+        pdf = os.path.join(d, "out.pdf")
+        runs = [("vector (svg2rlg)", lambda: ExportManager.export_as_pdf(scenes, svgs, pdf))]
+        for dpi in (150, 96):
+            runs.append((f"raster jpeg {dpi}dpi", lambda dpi=dpi: ExportManager.export_as_pdf_raster(scenes, pngs, pdf, dpi=dpi)))
+        runs.append(("raster png 150dpi", lambda: ExportManager.export_as_pdf_raster(scenes, pngs, pdf, image_format="png")))
+        for label, fn in runs:
+            dt = best_of(fn, 1)
+            size = os.path.getsize(pdf)
+            print(f"  {label:<18}: {dt:6.2f} s  {size/2**20:6.1f} MiB ({size/n/1024:4.0f} KiB/page)")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run performance benchmarks.")
+    ap.add_argument("names", nargs="*", help=f"subset to run: {', '.join(BENCHES)}")
+    args = ap.parse_args(argv)
+    for name in args.names or list(BENCHES):
+        if name not in BENCHES:
+            print(f"Unknown benchmark: {name}"); return 1
+        BENCHES[name]()
+        print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+DisplayList — One Drawing Description, Raster & Vector Output
+A card is described once as a flat list of drawing ops; `rasterize` replays them through
+ImageDraw for the panel PNG and `to_svg` turns the very same ops into SVG elements, so the
+vector file is the card itself (shapes and live text) rather than a wrapper around the PNG.
+
+Ops are tuples:
+    (shape, xy, kwargs)                       shape is an ImageDraw method: "rectangle",
+                                              "rounded_rectangle", "ellipse", "line", "polygon"
+    ("text", xy, lines, size, bold, fill)     left-aligned lines, font_registry fonts
+    ("tone", box, step, dot, fill)            screentone: a dot every `step` px inside box
+    ("group", xy, size, key, ops, bg)         ops drawn on their own `size` image at xy; the
+                                              raster is cached per `key` and pasted (opaque
+                                              when `bg` is a colour, alpha-blended when None)
+"""
+import threading
+import svgwrite
+from PIL import Image, ImageDraw
+
+import font_registry
+
+FONT_FALLBACK = "Arial, sans-serif"      # Arial is metric-compatible with Liberation Sans
+
+# ─── Raster ───────────────────────────────────────────────────────────────────
+_groups = {}            # Group key → rendered image, per process
+_groups_lock = threading.Lock()
+
+def _group(key, size, ops, bg):
+    img = _groups.get(key)
+    if img is None:
+        img = rasterize(size, ops, bg)
+        with _groups_lock: img = _groups.setdefault(key, img)
+    return img
+
+def rasterize(size, ops, bg=(255, 255, 255)):
+    """The ops drawn on a fresh `size` image: RGB on `bg`, or transparent RGBA if bg is None."""
+    img = Image.new("RGB", size, bg) if bg is not None else Image.new("RGBA", size, (0, 0, 0, 0))
+    draw_ops(ImageDraw.Draw(img, "RGBA"), ops, img)
+    return img
+
+def draw_ops(draw, ops, img=None):
+    """Replay ops on an ImageDraw (groups need the target image `img`)."""
+    for op in ops:
+        kind = op[0]
+        if kind == "text":
+            _, xy, lines, size, bold, fill = op
+            font_registry.draw_text(draw, xy, lines, font_registry.font(size, bold), fill)
+        elif kind == "tone":
+            _, (x0, y0, x1, y1), step, dot, fill = op
+            for x in range(x0, x1, step):
+                for y in range(y0, y1, step):
+                    draw.ellipse([x, y, x+dot, y+dot], fill=fill)
+        elif kind == "group":
+            _, xy, size, key, sub, bg = op
+            layer = _group(key, size, sub, bg)
+            if bg is not None: img.paste(layer, xy)
+            else: img.paste(layer, xy, layer)
+        else:
+            getattr(draw, kind)(op[1], **op[2])
+
+# ─── SVG ──────────────────────────────────────────────────────────────────────
+def _paint(color):
+    # SVG paint + opacity for a PIL colour tuple (None → no paint)
+    if color is None: return "none", 1
+    if len(color) == 4: return svgwrite.rgb(*color[:3]), round(color[3] / 255, 3)
+    return svgwrite.rgb(*color), 1
+
+def _style(fill=None, outline=None, width=1, stroke_only=False):
+    attrs = {}
+    paint, alpha = _paint(None if stroke_only else fill)
+    attrs["fill"] = paint
+    if alpha != 1: attrs["fill_opacity"] = alpha
+    stroke = fill if stroke_only else outline
+    if stroke is not None and width:
+        paint, alpha = _paint(stroke)
+        attrs["stroke"] = paint
+        attrs["stroke_width"] = width
+        if alpha != 1: attrs["stroke_opacity"] = alpha
+    return attrs
+
+def _box(xy, inset):
+    # PIL boxes are inclusive pixel ranges; the stroke is centred `inset` inside the edge
+    x0, y0, x1, y1 = xy
+    return x0 + inset, y0 + inset, x1 - x0 + 1 - 2*inset, y1 - y0 + 1 - 2*inset
+
+def _n(v):
+    return round(v, 2)
+
+def _points(xy):
+    # Pixel centres: PIL draws point (x, y) on the pixel spanning [x, x+1)
+    return [(_n(x + 0.5), _n(y + 0.5)) for x, y in xy]
+
+def _font_family(font):
+    # The face the PNG was laid out with first, then metric-compatible fallbacks
+    try: name = font.getname()[0]
+    except: return FONT_FALLBACK
+    return FONT_FALLBACK if f"'{name}'" in FONT_FALLBACK or name == "Arial" else f"'{name}', {FONT_FALLBACK}"
+
+def _svg_ops(dwg, parent, ops):
+    for op in ops:
+        kind = op[0]
+        if kind == "text":
+            _, (x, y), lines, size, bold, fill = op
+            lines = lines.split("\n") if isinstance(lines, str) else lines
+            font = font_registry.font(size, bold)
+            step = font_registry.line_spacing(font)
+            base = y + font.getmetrics()[0]
+            paint, alpha = _paint(fill)
+            text = dwg.text("", font_family=_font_family(font), font_size=size, fill=paint,
+                            font_weight="bold" if bold else "normal")
+            if alpha != 1: text["fill-opacity"] = alpha
+            for i, line in enumerate(lines):
+                if line.strip(): text.add(dwg.tspan(line, x=[x], y=[base + i*step]))
+            if text.elements: parent.add(text)
+        elif kind == "tone":
+            _, (x0, y0, x1, y1), step, dot, fill = op
+            # Each column is one dashed stroke of zero-length dashes with round caps: a dot
+            # every `step` px, a few bytes per column instead of a circle per dot
+            r = (dot + 1) / 2
+            rows = len(range(y0, y1, step))
+            d = "".join(f"M{x+r:g} {y0+r:g}v{(rows-1)*step + step/2:g}" for x in range(x0, x1, step))
+            paint, alpha = _paint(fill)
+            path = dwg.path(d=d, fill="none", stroke=paint, stroke_width=dot + 1, stroke_linecap="round",
+                            stroke_dasharray=f"0 {step}")
+            if alpha != 1: path["stroke-opacity"] = alpha
+            parent.add(path)
+        elif kind == "group":
+            _, (dx, dy), (w, h), key, sub, bg = op
+            g = dwg.g(transform=f"translate({dx},{dy})") if dx or dy else dwg.g()
+            if bg is not None:              # Opaque groups are panels: clipped to their box
+                clip = dwg.defs.add(dwg.clipPath(id=f"clip{len(dwg.defs.elements)}"))
+                clip.add(dwg.rect((0, 0), (w, h)))
+                g["clip-path"] = f"url(#{clip.get_id()})"
+                g.add(dwg.rect((0, 0), (w, h), **_style(bg)))
+            _svg_ops(dwg, g, sub)
+            parent.add(g)
+        else:
+            parent.add(_svg_shape(dwg, kind, op[1], op[2]))
+
+def _svg_shape(dwg, kind, xy, kw):
+    fill, outline, width = kw.get("fill"), kw.get("outline"), kw.get("width", 1)
+    if kind == "line":
+        return dwg.polyline(_points(xy), stroke_linecap="butt", **_style(fill, width=width, stroke_only=True))
+    if kind == "polygon":
+        return dwg.polygon(_points(xy), stroke_linejoin="miter", **_style(fill, outline, width))
+    inset = width / 2 if outline is not None else 0
+    x, y, w, h = _box(xy, inset)
+    if kind == "ellipse":
+        return dwg.ellipse((_n(x + w/2), _n(y + h/2)), (_n(w/2), _n(h/2)), **_style(fill, outline, width))
+    rect = dwg.rect((_n(x), _n(y)), (_n(w), _n(h)), **_style(fill, outline, width))
+    if kind == "rounded_rectangle":
+        r = max(0, kw.get("radius", 0) - inset)
+        rect["rx"] = rect["ry"] = r
+    return rect
+
+def to_svg(size, ops, bg=(255, 255, 255)):
+    """The ops as an SVG document (str) of `size` pixels."""
+    dwg = svgwrite.Drawing(size=size, profile="full", debug=False)
+    if bg is not None: dwg.add(dwg.rect((0, 0), size, **_style(bg)))
+    _svg_ops(dwg, dwg, ops)
+    return dwg.tostring()
@@ -3,9 +3,96 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
 from svglib.svglib import svg2rlg
 from reportlab.graphics import renderPDF
+from reportlab import rl_config
 from pptx import Presentation
 from pptx.util import Inches, Pt
+from PIL import Image
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import os
+import io
+import hashlib
+import tempfile
+import textwrap
+import threading
+from contextlib import contextmanager
+
+PDF_DPI = 150            # Raster PDF: panel pixels per inch of page
+PDF_JPEG_QUALITY = 85
+
+@contextmanager
+def _binary_streams():
+    # Images and page streams stored as raw binary instead of ASCII85 text: 25% smaller, and
+    # reportlab's pure-Python ASCII85 encoder is the slowest part of embedding a JPEG
+    old, rl_config.useA85 = rl_config.useA85, 0
+    try: yield
+    finally: rl_config.useA85 = old
+
+def _panel_box(width, height, w, h):
+    """(x, y, w, h) in points: a w×h panel fitted to the page above the scene notes."""
+    box_w, box_h = width - 2*inch, height - 0.5*inch - 2.4*inch
+    f = min(box_w / w, box_h / h)
+    return 1*inch, height - 0.5*inch - h*f, w*f, h*f
+
+def _draw_scene_info(c, i, scene):
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(1*inch, 2*inch, f"SCENE {i+1}: {scene.header}")
+    
+    c.setFont("Helvetica", 10)
+    c.drawString(1*inch, 1.7*inch, f"SHOT: {scene.shot_type} | MOVEMENT: {scene.camera_movement}")
+    c.drawString(1*inch, 1.5*inch, f"LIGHTING: {scene.lighting}")
+    
+    # Dialogue — (speaker, line) pairs, truncated and wrapped to the page
+    text = "\n".join(f"{speaker}: {line}" for speaker, line in scene.dialogue)
+    if len(text) > 200: text = text[:200] + "..."
+    textobject = c.beginText(1*inch, 1.2*inch)
+    textobject.setFont("Courier", 9)
+    textobject.textLines([w for l in text.split("\n") for w in textwrap.wrap(l, 110)][:6])
+    c.drawText(textobject)
+
+def _prepare_panel(src, out_dir, dpi, fmt, quality, claimed, lock):
+    """Raster PDF prep: the panel file downscaled to `dpi` at its size on the page, written
+    once per distinct content. Returns (prepared path, page box)."""
+    with open(src, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    out = os.path.join(out_dir, digest + (".jpg" if fmt == "jpeg" else ".png"))
+    with Image.open(io.BytesIO(data)) as im:
+        box = _panel_box(*landscape(LETTER), *im.size)
+        with lock:
+            ready = claimed.get(digest)        # Identical panels share one file, one PDF image
+            if ready is None: claimed[digest] = threading.Event()
+        if ready is not None:
+            ready.wait()                       # The first worker to see it may still be writing
+            if not os.path.exists(out): raise OSError(f"Preparing {os.path.basename(src)} failed")
+            return out, box
+        try:
+            _write_prepared(im, data, out, box, dpi, fmt, quality)
+        finally:
+            claimed[digest].set()
+    return out, box
+
+def _write_prepared(im, data, out, box, dpi, fmt, quality):
+    tmp = out + ".tmp"                                   # Duplicates only ever see a whole file
+    target = (max(1, round(box[2] / 72 * dpi)), max(1, round(box[3] / 72 * dpi)))
+    if im.width <= target[0] and im.format == ("JPEG" if fmt == "jpeg" else "PNG"):
+        with open(tmp, "wb") as f:                       # Already small enough: embedded as is
+            f.write(data)
+    else:
+        im = im.convert("RGB")
+        if im.width > target[0]: im = im.resize(target, Image.LANCZOS, reducing_gap=2.0)
+        if fmt == "jpeg": im.save(tmp, "JPEG", quality=quality)
+        else: im.save(tmp, "PNG", compress_level=1)
+    os.replace(tmp, out)
+
+def _pptx_picture(path):
+    """`path`, or a PNG copy in memory for panel formats python-pptx can't embed (WebP)."""
+    if path.lower().endswith((".png", ".jpg", ".jpeg")): return path
+    buf = io.BytesIO()
+    with Image.open(path) as im:
+        im.save(buf, "PNG")
+    buf.seek(0)
+    return buf
 
 class ExportManager:
     @staticmethod
@@ -13,36 +100,65 @@ class ExportManager:
         c = canvas.Canvas(output_path, pagesize=landscape(LETTER))
         width, height = landscape(LETTER)
 
-        for i, (scene, svg_path) in enumerate(zip(scenes, svg_paths)):
-            # Draw SVG
-            try:
-                drawing = svg2rlg(svg_path)
-                # Scale drawing to fit
-                factor = (width - 2*inch) / drawing.width
-                drawing.width *= factor
-                drawing.height *= factor
-                drawing.scale(factor, factor)
-                
-                renderPDF.draw(drawing, c, 1*inch, height - drawing.height - 1*inch)
-            except Exception as e:
-                c.drawString(1*inch, height - 2*inch, f"Error rendering SVG: {str(e)}")
+        with _binary_streams():
+            for i, (scene, svg_path) in enumerate(zip(scenes, svg_paths)):
+                # Draw SVG
+                try:
+                    drawing = svg2rlg(svg_path)
+                    # Scale drawing to fit
+                    x, y, w, h = _panel_box(width, height, drawing.width, drawing.height)
+                    factor = w / drawing.width
+                    drawing.width, drawing.height = w, h
+                    drawing.scale(factor, factor)
+                    
+                    renderPDF.draw(drawing, c, x, y)
+                except Exception as e:
+                    c.drawString(1*inch, height - 2*inch, f"Error rendering SVG: {str(e)}")
 
-            # Draw Metadata
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(1*inch, 2*inch, f"SCENE {i+1}: {scene.header}")
-            
-            c.setFont("Helvetica", 10)
-            c.drawString(1*inch, 1.7*inch, f"SHOT: {scene.shot_type} | MOVEMENT: {scene.camera_movement}")
-            c.drawString(1*inch, 1.5*inch, f"LIGHTING: {scene.lighting}")
-            
-            # Dialogue/Action
-            textobject = c.beginText(1*inch, 1.2*inch)
-            textobject.setFont("Courier", 9)
-            textobject.textLines(scene.dialogue[:200] + "..." if len(scene.dialogue) > 200 else scene.dialogue)
-            c.drawText(textobject)
+                # Draw Metadata
+                _draw_scene_info(c, i, scene)
+
+                c.showPage()
+            c.save()
+
+    @staticmethod
+    def export_as_pdf_raster(scenes, png_paths, output_path, dpi=PDF_DPI, image_format="jpeg",
+                             quality=PDF_JPEG_QUALITY, workers=None):
+        """
+        PDF with the rendered panel rasters embedded directly (no SVG round trip). Panels
+        are downscaled to `dpi` on a thread pool a few pages ahead of the writer, identical
+        panels are embedded once, and pages are written in order as their panel is ready.
+        `image_format` "jpeg" (size ≈ pages × one JPEG) or "png" (lossless).
+        """
+        c = canvas.Canvas(output_path, pagesize=landscape(LETTER))
+        width, height = landscape(LETTER)
+        workers = workers or min(4, os.cpu_count() or 1)
+        claimed, lock = {}, threading.Lock()     # Content digest → Event set once its file is written
 
-            c.showPage()
-        c.save()
+        with _binary_streams(), tempfile.TemporaryDirectory() as tmp, \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            jobs = deque()                 # (scene, future) in page order, at most 2 × workers ahead
+            items = iter(zip(scenes, png_paths))
+            i = 0
+            while True:
+                while len(jobs) < 2 * workers:
+                    item = next(items, None)
+                    if item is None: break
+                    scene, png = item
+                    jobs.append((scene, pool.submit(_prepare_panel, png, tmp, dpi, image_format,
+                                                    quality, claimed, lock)))
+                if not jobs: break
+                scene, fut = jobs.popleft()
+                try:
+                    # Same prepared path → reportlab reuses the already embedded image
+                    path, (x, y, w, h) = fut.result()
+                    c.drawImage(path, x, y, w, h)
+                except Exception as e:
+                    c.drawString(1*inch, height - 2*inch, f"Error embedding panel: {str(e)}")
+                _draw_scene_info(c, i, scene)
+                c.showPage()
+                i += 1
+            c.save()
 
     @staticmethod
     def export_as_pptx(scenes, png_paths, output_path):
@@ -57,7 +173,7 @@ class ExportManager:
             # Use the PNG preview since PPT doesn't support SVG natively without complex conversion
             try:
                 if os.path.exists(png_path):
-                    slide.shapes.add_picture(png_path, Inches(1), Inches(0.5), width=Inches(11.33))
+                    slide.shapes.add_picture(_pptx_picture(png_path), Inches(1), Inches(0.5), width=Inches(11.33))
             except Exception as e:
                 print(f"PPT Export error: {e}")
                 slide.shapes.add_textbox(Inches(1), Inches(1), Inches(11), Inches(4)).text = f"[Image Error]"
@@ -0,0 +1,175 @@
+"""
+FontRegistry — Resolved Fonts & Cached Text Layout
+Font files are resolved once per process (bundled fonts/ folder, then the platform font
+directories, then fontconfig) and FreeTypeFont objects are memoized by (family, size,
+weight). Text wrapping measures real pixel widths and is memoized in an LRU, so laying
+out a card's text costs a few dictionary lookups once a script has been seen. Rasterized
+lines are cached as glyph masks too, so repeated labels, names and unchanged lines are
+blitted instead of re-rendered through FreeType.
+"""
+import os
+import sys
+import threading
+import subprocess
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont
+
+LAYOUT_ENTRIES = 4096   # Wrapped texts kept in the layout LRU
+MASK_ENTRIES = 2048     # Rasterized text lines kept (each a few KB)
+
+# Candidate files per family and weight, in preference order (Windows, macOS, Linux names)
+FAMILIES = {
+    "sans": {
+        "regular": ["arial.ttf", "Arial.ttf", "LiberationSans-Regular.ttf", "DejaVuSans.ttf",
+                    "NotoSans-Regular.ttf", "FreeSans.ttf", "Lato-Regular.ttf"],
+        "bold":    ["arialbd.ttf", "Arial Bold.ttf", "LiberationSans-Bold.ttf", "DejaVuSans-Bold.ttf",
+                    "NotoSans-Bold.ttf", "FreeSansBold.ttf", "Lato-Bold.ttf"],
+    },
+}
+FC_PATTERNS = {"regular": "{family}", "bold": "{family}:bold"}
+FC_FAMILY = {"sans": "sans-serif"}
+
+def font_dirs():
+    """Directories searched for font files, bundled fonts first."""
+    here = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    dirs = [os.path.join(here, "fonts")]
+    if sys.platform == "win32":
+        dirs.append(os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"))
+        dirs.append(os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Fonts"))
+    elif sys.platform == "darwin":
+        dirs += [os.path.expanduser("~/Library/Fonts"), "/Library/Fonts", "/System/Library/Fonts",
+                 "/System/Library/Fonts/Supplemental"]
+    else:
+        dirs += [os.path.expanduser("~/.local/share/fonts"), os.path.expanduser("~/.fonts"),
+                 "/usr/local/share/fonts", "/usr/share/fonts"]
+    return [d for d in dirs if os.path.isdir(d)]
+
+def _fc_match(pattern):
+    """File fontconfig picks for `pattern`, or None when fontconfig isn't available."""
+    try:
+        out = subprocess.run(["fc-match", "-f", "%{file}", pattern],
+                             capture_output=True, text=True, timeout=5).stdout.strip()
+        return out if out.lower().endswith((".ttf", ".otf", ".ttc")) and os.path.exists(out) else None
+    except: return None
+
+class FontRegistry:
+    def __init__(self, dirs=None):
+        self.dirs = font_dirs() if dirs is None else dirs
+        self._index = None     # lower-case file name → path, built on first lookup
+        self._paths = {}       # (family, weight) → resolved file (None: built-in fallback)
+        self._fonts = {}       # (family, size, weight) → FreeTypeFont
+        self._layout = OrderedDict()
+        self._masks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _scan(self):
+        index = {}
+        for d in self.dirs:                       # Earlier directories win
+            for root, _, files in os.walk(d):
+                for f in files:
+                    if f.lower().endswith((".ttf", ".otf", ".ttc")):
+                        index.setdefault(f.lower(), os.path.join(root, f))
+        return index
+
+    def path(self, family="sans", weight="regular"):
+        """Font file for (family, weight), resolved once."""
+        key = (family, weight)
+        if key not in self._paths:
+            if self._index is None: self._index = self._scan()
+            names = FAMILIES.get(family, {}).get(weight, [family])
+            found = next((self._index[n.lower()] for n in names if n.lower() in self._index), None)
+            if found is None:
+                found = _fc_match(FC_PATTERNS[weight].format(family=FC_FAMILY.get(family, family)))
+            if found is None:
+                print(f"[Fonts] No {family}/{weight} font file found, using Pillow's built-in font")
+            self._paths[key] = found
+        return self._paths[key]
+
+    def font(self, size, bold=False, family="sans"):
+        """Memoized FreeTypeFont for (family, size, weight)."""
+        weight = "bold" if bold else "regular"
+        key = (family, size, weight)
+        f = self._fonts.get(key)
+        if f is None:
+            p = self.path(family, weight)
+            try: f = ImageFont.truetype(p, size) if p else ImageFont.load_default(size)
+            except OSError: f = ImageFont.load_default(size)      # Unreadable font file
+            self._fonts[key] = f
+        return f
+
+    def wrap(self, text, font, width):
+        """Lines of `text` greedily wrapped to `width` pixels with `font` (LRU-cached)."""
+        key = (text, id(font), width)
+        with self._lock:
+            lines = self._layout.get(key)
+            if lines is not None:
+                self._layout.move_to_end(key)
+                return lines
+        lines = tuple(_wrap(text, font, width))
+        with self._lock:
+            self._layout[key] = lines
+            if len(self._layout) > LAYOUT_ENTRIES: self._layout.popitem(last=False)
+        return lines
+
+    def _mask(self, line, font):
+        # (x, y offset, "L" glyph mask) of one line drawn at the origin, as ImageDraw.text would
+        key = (line, id(font))
+        with self._lock:
+            m = self._masks.get(key)
+            if m is not None:
+                self._masks.move_to_end(key)
+                return m
+        l, t, r, b = font.getbbox(line)
+        img = Image.new("L", (max(1, r - l), max(1, b - t)), 0)
+        ImageDraw.Draw(img).text((-l, -t), line, fill=255, font=font)
+        m = (l, t, img)
+        with self._lock:
+            self._masks[key] = m
+            if len(self._masks) > MASK_ENTRIES: self._masks.popitem(last=False)
+        return m
+
+    def draw_text(self, draw, xy, text, font, fill, spacing=4):
+        """ImageDraw.text for left-aligned (multi-line) text, from cached line masks.
+        Returns the number of lines drawn."""
+        x, y = xy
+        lines = text.split("\n") if isinstance(text, str) else text
+        step = line_spacing(font, spacing)
+        for i, line in enumerate(lines):
+            if not line.strip(): continue
+            l, t, mask = self._mask(line, font)
+            draw.bitmap((x + l, y + i * step + t), mask, fill=fill)
+        return len(lines)
+
+    def clear(self):
+        """Drop cached layouts and line masks (resolved fonts are kept)."""
+        with self._lock:
+            self._layout.clear()
+            self._masks.clear()
+
+def line_spacing(font, spacing=4):
+    """Distance between baselines of multi-line text, matching ImageDraw.multiline_text."""
+    return font.getbbox("A")[3] + spacing
+
+def _wrap(text, font, width):
+    measure = font.getlength
+    space = measure(" ")
+    for para in text.split("\n"):
+        line, w = [], 0.0
+        for word in para.split():
+            ww = measure(word)
+            if line and w + space + ww <= width:
+                line.append(word); w += space + ww
+                continue
+            if line: yield " ".join(line)
+            while ww > width and len(word) > 1:        # A single word wider than the line
+                k = max(1, next((k for k in range(len(word) - 1, 0, -1) if measure(word[:k]) <= width), 1))
+                yield word[:k]
+                word = word[k:]; ww = measure(word)
+            line, w = [word], ww
+        if line or not para.strip(): yield " ".join(line)
+
+# Process-wide registry (fonts are resolved lazily on first use)
+registry = FontRegistry()
+font = registry.font
+wrap = registry.wrap
+draw_text = registry.draw_text
@@ -0,0 +1,165 @@
+"""
+FrameExtractor — Multi-Timestamp Frame Grabs over a Pipe
+Pulls N frames from one ffmpeg invocation as raw RGB pixels, scaled by ffmpeg to the
+requested thumbnail box, straight into NumPy arrays (or PIL images). No temp PNGs.
+Single-frame grabs can snap to an indexed keyframe instead of decoding up to the exact time.
+"""
+import os
+import re
+import time
+import bisect
+import threading
+import tempfile
+import subprocess
+import numpy as np
+from PIL import Image
+
+from probe_cache import nearest_keyframe
+
+SEEK_MODE_MAX = 16        # Seeking inputs per ffmpeg process; more timestamps run in batches
+SEEK_COST_FRAMES = 12     # Rough per-seek overhead (input open + seek), in decoded-frame units
+DEFAULT_GOP_S = 2.0       # Keyframe interval assumed when the probe couldn't measure one
+
+def fit_size(w, h, box, rotation=0):
+    """Largest (w, h) that fits inside `box` with the source aspect ratio (after rotation)."""
+    if rotation in (90, 270): w, h = h, w
+    bw, bh = box
+    s = min(bw / w, bh / h)
+    return max(2, int(w * s) // 2 * 2), max(2, int(h * s) // 2 * 2)
+
+def raw_frames(stream, w, h, channels=3):
+    """Yield (h, w, channels) uint8 arrays from a rawvideo byte stream until EOF."""
+    size = w * h * channels
+    while True:
+        buf = stream.read(size)
+        if len(buf) < size: return
+        yield np.frombuffer(buf, np.uint8).reshape(h, w, channels)
+
+def _seek_cmd(ffmpeg, path, timestamps, tw, th):
+    # One input per timestamp: each -ss seeks independently, concat stitches the single frames
+    cmd = [ffmpeg, "-v", "error"]
+    chains = []
+    for i, t in enumerate(timestamps):
+        cmd += ["-threads", "1", "-ss", f"{max(0.0, t):.3f}", "-i", path]
+        chains.append(f"[{i}:v:0]trim=end_frame=1,setpts=PTS-STARTPTS,scale={tw}:{th},setsar=1[v{i}]")
+    pads = "".join(f"[v{i}]" for i in range(len(timestamps)))
+    graph = ";".join(chains) + f";{pads}concat=n={len(timestamps)}:v=1:a=0,format=rgb24[out]"
+    return cmd + ["-filter_complex", graph, "-map", "[out]", "-fps_mode", "passthrough",
+                  "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"]
+
+def _select_cmd(ffmpeg, path, times, tw, th):
+    # Single decode pass: keep the first frame at or after each time (by pts, so VFR is fine);
+    # showinfo after settb=AVTB logs each kept frame's pts in microseconds on stderr
+    expr = "+".join(f"gte(t,{t:.6f})*(isnan(prev_t)+lt(prev_t,{t:.6f}))" for t in times)
+    return [ffmpeg, "-v", "info", "-nostats", "-hide_banner", "-i", path, "-map", "0:v:0",
+            "-vf", f"select='{expr}',settb=AVTB,showinfo,scale={tw}:{th},setsar=1,format=rgb24",
+            "-fps_mode", "passthrough", "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"]
+
+_SHOWINFO_PTS = re.compile(r"Parsed_showinfo.*\bpts:\s*(-?\d+)")
+
+def _run_frames(cmd, tw, th, log=None):
+    # Frames from one ffmpeg process; stderr is drained on a thread (into `log` if given)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE if log is not None else subprocess.DEVNULL)
+    drain = None
+    if log is not None:
+        drain = threading.Thread(target=lambda: log.extend(proc.stderr.read().decode("utf-8", "replace").splitlines()),
+                                 daemon=True)
+        drain.start()
+    try:
+        return [f.copy() for f in raw_frames(proc.stdout, tw, th)]
+    finally:
+        proc.stdout.close()
+        proc.wait()
+        if drain: drain.join()
+
+def choose_mode(count, info):
+    """Mode for `count` timestamps: N seeks each decode about half a GOP, while one
+    select pass decodes the whole video.
+    Returns "seek" or "select"."""
+    fps, dur = info.get("fps") or 0, info.get("dur") or 0
+    if not fps or not dur: return "seek"
+    gop = info.get("keyframe_interval") or max(DEFAULT_GOP_S, info.get("keyframe_interval_min") or 0)
+    seek_cost = count * (gop * fps / 2 + SEEK_COST_FRAMES)
+    return "seek" if seek_cost <= dur * fps else "select"
+
+def extract_frames(path, timestamps, size=(280, 160), info=None, ffmpeg="ffmpeg", mode="auto", as_pil=True):
+    """
+    Grab one frame per timestamp (seconds) in as few ffmpeg processes as possible.
+    `info` is a probe dict (w, h, fps, dur, keyframe_interval, rotation); `mode` is "seek",
+    "select" or "auto" (picked by choose_mode from duration and GOP size).
+    Returns a list aligned with `timestamps`; entries past the end of the video are None.
+    """
+    timestamps = list(timestamps)
+    if not timestamps or not info: return [None] * len(timestamps)
+    tw, th = fit_size(info["w"], info["h"], size, info.get("rotation", 0))
+    if mode == "auto": mode = choose_mode(len(timestamps), info)
+
+    if mode == "seek":
+        frames = []                                     # Output frame k → timestamp k
+        for i in range(0, len(timestamps), SEEK_MODE_MAX):
+            batch = timestamps[i:i + SEEK_MODE_MAX]
+            got = _run_frames(_seek_cmd(ffmpeg, path, batch, tw, th), tw, th)
+            frames += got + [None] * (len(batch) - len(got))
+    else:
+        order = sorted(set(round(max(0.0, t), 6) for t in timestamps))
+        log = []
+        got = _run_frames(_select_cmd(ffmpeg, path, order, tw, th), tw, th, log)
+        pts = [int(m.group(1)) for m in map(_SHOWINFO_PTS.search, log) if m][:len(got)]
+        frames = []
+        for t in timestamps:                            # First kept frame at or after t
+            k = bisect.bisect_left(pts, int(round(max(0.0, t) * 1e6)) - 1)
+            frames.append(got[k] if k < len(pts) else None)
+
+    return [Image.fromarray(f) if (as_pil and f is not None) else f for f in frames]
+
+def even_timestamps(dur, count, margin=0.1):
+    """`count` timestamps spread evenly over [margin, dur - margin]."""
+    if count <= 1 or dur <= 2 * margin: return [max(0.0, dur / 2)]
+    step = (dur - 2 * margin) / (count - 1)
+    return [margin + i * step for i in range(count)]
+
+# ─── Single-Frame Seeking ─────────────────────────────────────────────────────
+# "exact"   — accurate seek: ffmpeg decodes from the previous keyframe up to `t`
+# "snap"    — jump to the nearest indexed keyframe and decode exactly one frame
+# "keyonly" — no index needed: skip every non-key frame and take the keyframe at/before `t`
+SEEK_MODES = ("exact", "snap", "keyonly")
+
+def _seek_args(path, t, mode, keyframes, before):
+    if mode == "snap" and keyframes:
+        t = nearest_keyframe(keyframes, t, before=before)
+        return ["-ss", f"{t:.6f}", "-i", path], t
+    if mode in ("snap", "keyonly"):
+        return ["-noaccurate_seek", "-skip_frame", "nokey", "-ss", f"{max(0.0, t):.3f}", "-i", path], t
+    return ["-ss", f"{max(0.0, t):.3f}", "-i", path], t
+
+def extract_frame(path, t, out, mode="exact", keyframes=None, ffmpeg="ffmpeg", before=False):
+    """Write the frame at `t` to `out`. Returns the timestamp actually targeted, or None on failure."""
+    args, actual = _seek_args(path, t, mode, keyframes, before)
+    res = subprocess.run([ffmpeg, "-y", "-v", "error"] + args + ["-frames:v", "1", out], capture_output=True)
+    return actual if res.returncode == 0 and os.path.exists(out) else None
+
+def grab_frame(path, t, info, size=None, mode="exact", keyframes=None, ffmpeg="ffmpeg", before=False):
+    """Like extract_frame but piped straight into a PIL image (optionally fitted to `size`)."""
+    w, h = (info["w"], info["h"]) if info.get("rotation", 0) not in (90, 270) else (info["h"], info["w"])
+    if size: w, h = fit_size(info["w"], info["h"], size, info.get("rotation", 0))
+    args, _ = _seek_args(path, t, mode, keyframes, before)
+    cmd = [ffmpeg, "-v", "error"] + args + ["-frames:v", "1", "-vf", f"scale={w}:{h},format=rgb24",
+                                             "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"]
+    res = subprocess.run(cmd, capture_output=True)
+    if len(res.stdout) < w * h * 3: return None
+    return Image.frombuffer("RGB", (w, h), res.stdout, "raw", "RGB", 0, 1).copy()
+
+def seek_speedup(path, t, keyframes, ffmpeg="ffmpeg", mode="snap", before=False):
+    """Time an exact seek against `mode` at `t` so callers can pick per job.
+    Returns {"exact_s", "fast_s", "speedup", "offset_s"} (offset = how far the fast frame is from `t`)."""
+    with tempfile.TemporaryDirectory() as d:
+        t0 = time.perf_counter()
+        extract_frame(path, t, os.path.join(d, "exact.png"), "exact", ffmpeg=ffmpeg)
+        exact = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        actual = extract_frame(path, t, os.path.join(d, "fast.png"), mode, keyframes, ffmpeg, before)
+        fast = time.perf_counter() - t0
+    indexed = mode == "snap" and keyframes and actual is not None
+    return {"exact_s": exact, "fast_s": fast, "speedup": exact / fast if fast else 0.0,
+            "offset_s": (t - actual) if indexed else None}
@@ -0,0 +1,145 @@
+"""
+JobRunner — Background Jobs for the GUI
+One shared executor for long-running work (erasing, video rendering). Jobs run on a
+thread pool (or a process pool for picklable CPU-bound functions), return futures,
+report progress, can be cancelled, and every callback is marshalled back onto the
+Tk main loop through after(). Jobs belong to the app, not to a view, so they keep
+running while the user switches tabs.
+"""
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, CancelledError
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    """Handle for one submitted job. Thread jobs receive it as their first argument."""
+    def __init__(self, runner, name=""):
+        self.name = name
+        self.future = None
+        self.cancel_event = threading.Event()
+        self._runner = runner
+        self._on_progress = None
+        self._last_pct = -1
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """Request cancellation: queued jobs never start, running jobs see `cancelled` / check()."""
+        self.cancel_event.set()
+        if self.future: self.future.cancel()
+
+    def check(self):
+        """Raise JobCancelled if cancellation was requested (call between steps)."""
+        if self.cancel_event.is_set(): raise JobCancelled()
+
+    def report(self, done, total):
+        """Progress from the worker; only whole-percent changes are marshalled to Tk."""
+        if not self._on_progress or total <= 0: return
+        pct = int(100 * min(done, total) / total)
+        if pct != self._last_pct:
+            self._last_pct = pct
+            self._runner.post(self._on_progress, pct / 100, done, total)
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+class JobRunner:
+    def __init__(self, root=None, workers=None, processes=None, poll_ms=50):
+        self.root = None
+        self.poll_ms = poll_ms
+        self.threads = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 2),
+                                          thread_name_prefix="job")
+        self._processes = processes
+        self._procs = None
+        self._queue = queue.SimpleQueue()
+        self.jobs = []
+        self._jobs_lock = threading.Lock()   # jobs is appended on the main loop, pruned on workers
+        if root is not None: self.attach(root)
+
+    def attach(self, root):
+        """Start pumping callbacks on `root`'s main loop."""
+        self.root = root
+        root.after(self.poll_ms, self._pump)
+
+    def post(self, fn, *args):
+        """Queue fn(*args) for the main loop (it runs on the next pump)."""
+        self._queue.put((fn, args))
+
+    def pump(self):
+        """Run every queued callback now; returns how many ran."""
+        n = 0
+        while True:
+            try: fn, args = self._queue.get_nowait()
+            except queue.Empty: return n
+            try: fn(*args)
+            except Exception as e: print(f"Job callback failed: {e}")
+            n += 1
+
+    def _pump(self):
+        self.pump()
+        try: self.root.after(self.poll_ms, self._pump)
+        except Exception: pass  # Root destroyed
+
+    def submit(self, fn, *args, name="", process=False, on_progress=None, on_done=None, on_error=None,
+               on_cancel=None, **kwargs):
+        """
+        Run `fn` in the background and return its Job.
+        Thread jobs are called as fn(job, *args, **kwargs); process jobs as fn(*args, **kwargs)
+        (they must be picklable and can only be cancelled before they start).
+        Callbacks run on the main loop: on_progress(frac, done, total), on_done(result),
+        on_error(exc), on_cancel(). An exception raised after cancel() counts as a cancel.
+        """
+        job = Job(self, name)
+        job._on_progress = on_progress
+        if process:
+            if self._procs is None: self._procs = ProcessPoolExecutor(max_workers=self._processes)
+            job.future = self._procs.submit(fn, *args, **kwargs)
+        else:
+            job.future = self.threads.submit(fn, job, *args, **kwargs)
+        with self._jobs_lock: self.jobs.append(job)
+
+        def finished(fut):
+            with self._jobs_lock:
+                if job in self.jobs: self.jobs.remove(job)
+            try:
+                res = fut.result()
+            except (CancelledError, JobCancelled):
+                if on_cancel: self.post(on_cancel)
+                return
+            except BaseException as e:
+                if job.cancelled:
+                    if on_cancel: self.post(on_cancel)
+                elif on_error: self.post(on_error, e)
+                else: print(f"Job {name or fn.__name__} failed: {e}")
+                return
+            if job.cancelled:
+                if on_cancel: self.post(on_cancel)
+            elif on_done: self.post(on_done, res)
+        job.future.add_done_callback(finished)
+        return job
+
+    def active(self, name=None):
+        """Jobs still queued or running (optionally only those called `name`)."""
+        with self._jobs_lock:
+            return [j for j in self.jobs if not j.done() and (name is None or j.name == name)]
+
+    def cancel(self, name=None):
+        """Cancel the active jobs (optionally only those called `name`); returns them."""
+        jobs = self.active(name)
+        for j in jobs: j.cancel()
+        return jobs
+
+    def shutdown(self, cancel=True):
+        if cancel:
+            with self._jobs_lock: jobs = list(self.jobs)
+            for j in jobs: j.cancel()
+        self.threads.shutdown(wait=False, cancel_futures=cancel)
+        if self._procs: self._procs.shutdown(wait=False, cancel_futures=cancel)
@@ -0,0 +1,110 @@
+"""
+KeywordRules — Compiled Vocabulary Matcher for Scene Enrichment
+A data-driven rule table (category → prioritised labels → trigger terms) compiled once
+into a single trie-shaped, word-boundary regex. One scan of the text finds every term;
+each category then resolves to its highest-priority label. The vocabulary lives in a
+user-editable JSON file, so it can grow to thousands of terms without slowing parsing:
+a vocabulary.json in the working directory (or next to the exe) overrides the bundled one.
+
+Vocabulary file format:
+    {"lighting": {"default": null,
+                  "rules": [{"label": "DRAMATIC", "terms": ["NIGHT", "FIRE*", ...]}, ...]}}
+Rules are listed in priority order. Terms are matched case-insensitively on whole words;
+a trailing * matches any word ending (TRACK* → TRACKS, TRACKING). `default` is applied
+when nothing matches (null leaves the scene's current value alone).
+"""
+import os
+import re
+import sys
+import json
+
+VOCAB_FILE = "vocabulary.json"
+# Shipped copy of the rule table (bundled via the spec's datas; read-only inside the exe)
+BUNDLED_VOCAB_FILE = os.path.join(getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__))), VOCAB_FILE)
+
+def vocabulary_paths(path=None):
+    """Files tried in order: `path`, vocabulary.json in the working directory, next to the
+    exe in a frozen build, then the bundled copy."""
+    paths = [path, VOCAB_FILE]
+    if getattr(sys, "frozen", False): paths.append(os.path.join(os.path.dirname(sys.executable), VOCAB_FILE))
+    paths.append(BUNDLED_VOCAB_FILE)
+    return list(dict.fromkeys(os.path.abspath(p) for p in paths if p))
+
+def default_vocabulary():
+    """The shipped rule table as a dict."""
+    with open(BUNDLED_VOCAB_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+def _trie_pattern(words):
+    """Regex alternation with shared prefixes factored out (a trie), so matching cost
+    grows with the text, not with the number of terms."""
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w: node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        end = node.get("") is True
+        alts = [re.escape(ch).replace(r"\ ", r"\s+") + build(child)
+                for ch, child in sorted(node.items()) if ch]
+        if not alts: return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if end else body
+    return build(trie)
+
+class KeywordRules:
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+        self.defaults = {cat: spec.get("default") for cat, spec in vocabulary.items()}
+        exact, prefix = {}, {}          # term → [(category, priority, label)]
+        for cat, spec in vocabulary.items():
+            for prio, rule in enumerate(spec.get("rules", [])):
+                for term in rule.get("terms", []):
+                    term = " ".join(term.upper().split())
+                    table = prefix if term.endswith("*") else exact
+                    table.setdefault(term.rstrip("*"), []).append((cat, prio, rule["label"]))
+        self.exact, self.prefix = exact, prefix
+        words = list(exact) + list(prefix)
+        if not words:
+            self.regex = None
+            return
+        tail = r"[A-Z0-9']*" if prefix else ""
+        # One pass: any term, on word boundaries; wildcard terms may run on to the end of the word
+        self.regex = re.compile(r"(?<![A-Z0-9])" + _trie_pattern(words) + tail + r"(?![A-Z0-9])")
+        self._plen = sorted({len(p) for p in prefix}, reverse=True)
+
+    @classmethod
+    def load(cls, path=None):
+        """Rules from the first readable file of vocabulary_paths(path) (JSON, see module docstring)."""
+        for p in vocabulary_paths(path):
+            if not os.path.exists(p):
+                if p == os.path.abspath(path or ""): print(f"[Vocabulary] {p} not found")
+                continue
+            try:
+                with open(p, encoding="utf-8") as f:
+                    return cls(json.load(f))
+            except Exception as e:
+                print(f"[Vocabulary] {p} unreadable, trying the next file: {e}")
+        print("[Vocabulary] No usable vocabulary file — scene enrichment is disabled")
+        return cls({})
+
+    def _hits(self, word):
+        hits = self.exact.get(word)
+        if hits: return hits
+        for n in self._plen:                       # Longest wildcard prefix of the matched word
+            if n <= len(word) and word[:n] in self.prefix: return self.prefix[word[:n]]
+        return ()
+
+    def classify(self, text):
+        """{category: label} for an (upper-case) text; unmatched categories get their default."""
+        best = {}
+        if self.regex is not None:
+            for word in set(self.regex.findall(text)):
+                for cat, prio, label in self._hits(" ".join(word.split())):
+                    if cat not in best or prio < best[cat][0]:
+                        best[cat] = (prio, label)
+        out = {cat: label for cat, (_, label) in best.items()}
+        for cat, default in self.defaults.items():
+            if cat not in out and default is not None: out[cat] = default
+        return out
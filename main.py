@@ -2,18 +2,27 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import subprocess
+import multiprocessing
 import json
 import os
 import threading
+from concurrent import futures
 from PIL import Image, ImageTk
 import shutil
 import numpy as np
 
-from scene_parser import ScriptParser
+from scene_parser import ScriptParser, IncrementalParser
 from vector_renderer import VectorRenderer
 from storyboard_generator import StoryboardGenerator
 from export_manager import ExportManager
 import local_inpainter
+import frame_extractor
+from scene_detector import SceneDetector
+import watermark_pipeline
+from probe_cache import ProbeCache
+from batch_engine import BatchEngine, DONE as BATCH_DONE, FAILED as BATCH_FAILED
+from job_runner import JobRunner
+from preview_cache import PreviewCache
 
 SETTINGS_FILE = "settings.json"
 
@@ -54,14 +63,23 @@ class FFmpegManager:
     def get(cls, key="ffmpeg_path"):
         path = SettingsManager.load().get(key, "")
         return path if path and os.path.exists(path) else key.replace("_path","")
+    _probe_cache = None
+    @classmethod
+    def cache(cls):
+        if cls._probe_cache is None: cls._probe_cache = ProbeCache()
+        cls._probe_cache.ffprobe = cls.get("ffprobe_path")
+        return cls._probe_cache
     @classmethod
     def probe(cls, path):
-        try:
-            cmd = [cls.get("ffprobe_path"), "-v", "quiet", "-print_format", "json",
-                   "-show_streams", "-show_format", path]
-            data = json.loads(subprocess.run(cmd, capture_output=True, text=True).stdout)
-            v = next(s for s in data["streams"] if s["codec_type"] == "video")
-            return {"w": v["width"], "h": v["height"], "dur": float(data["format"].get("duration", 0))}
+        try: return cls.cache().probe(path)
+        except: return None
+    @classmethod
+    def probe_many(cls, paths_or_dir, workers=8):
+        try: return cls.cache().probe_many(paths_or_dir, workers)
+        except: return {}
+    @classmethod
+    def keyframes(cls, path, scan=True):
+        try: return cls.cache().keyframes(path, scan)
         except: return None
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -93,30 +111,72 @@ class HomeView(ctk.CTkFrame):
         ctk.CTkButton(f, text="Open →", height=30, fg_color=Theme.CARD_BG, command=lambda: self.app.switch_tab(tab)).pack(pady=15, padx=20, fill="x")
 
 class SingleFrameView(ctk.CTkFrame):
+    SEEK_LABELS = {"Exact": "exact", "Nearest Keyframe": "snap", "Keyframe Only": "keyonly"}
     def __init__(self, master, app):
-        super().__init__(master, fg_color="transparent"); self.video_path = None; self._build()
+        super().__init__(master, fg_color="transparent"); self.app = app; self.video_path = None; self._build()
     def _build(self):
         ctk.CTkLabel(self, text="⚡ SINGLE FRAME EXTRACTION", font=ctk.CTkFont(size=16, weight="bold"), text_color=Theme.ACCENT).pack(pady=20)
         ctk.CTkButton(self, text="📂 Select Video", command=self.select, fg_color=Theme.ACCENT).pack(pady=10)
         self.pre = ctk.CTkLabel(self, text="No video selected", height=450, fg_color=Theme.PANEL_BG, corner_radius=15, text_color=Theme.TEXT_DIM)
         self.pre.pack(fill="both", expand=True, padx=40, pady=20)
-        self.btn = ctk.CTkButton(self, text="Extract Last Frame", state="disabled", command=self.run, fg_color=Theme.SUCCESS, height=45)
-        self.btn.pack(pady=20)
+        ctrl = ctk.CTkFrame(self, fg_color="transparent"); ctrl.pack(pady=20)
+        self.seek_var = ctk.StringVar(value="Exact")
+        ctk.CTkOptionMenu(ctrl, values=list(self.SEEK_LABELS), variable=self.seek_var, fg_color=Theme.CARD_BG, width=170).pack(side="left", padx=8)
+        self.btn = ctk.CTkButton(ctrl, text="Extract Last Frame", state="disabled", command=self.run, fg_color=Theme.SUCCESS, height=45)
+        self.btn.pack(side="left", padx=8)
+        self.cmp_btn = ctk.CTkButton(ctrl, text="⏱ Compare Seek", state="disabled", command=self.compare, fg_color=Theme.CARD_BG, height=45)
+        self.cmp_btn.pack(side="left", padx=8)
     def select(self):
         p = filedialog.askopenfilename(filetypes=[("Videos", "*.mp4 *.mov *.avi *.mkv")])
-        if p: self.video_path = p; self.btn.configure(state="normal"); self.pre.configure(text=f"Loaded: {os.path.basename(p)}")
+        if p:
+            self.video_path = p; self.pre.configure(text=f"Loaded: {os.path.basename(p)}")
+            self._busy(bool(self.app.jobs.active("single-frame")))
+            # Build the keyframe index in the background so snap seeks find it ready
+            if FFmpegManager.keyframes(p, scan=False) is None:
+                self.app.jobs.submit(lambda job: FFmpegManager.keyframes(p), name="keyframes")
+    def _busy(self, busy):
+        for b in (self.btn, self.cmp_btn): b.configure(state="disabled" if busy else "normal")
+    def _failed(self, e):
+        self._busy(False); messagebox.showerror("Error", str(e))
+    @staticmethod
+    def _target(path, mode):
+        # Runs on a job thread: probing and the keyframe scan stay off the Tk main loop
+        info = FFmpegManager.probe(path)
+        if not info: raise RuntimeError("Cannot read video.")
+        kf = FFmpegManager.keyframes(path) if mode == "snap" else None
+        return max(0, info['dur']-0.5), kf
     def run(self):
-        ff = FFmpegManager.get(); info = FFmpegManager.probe(self.video_path)
-        if not info: messagebox.showerror("Error", "Cannot read video."); return
-        base = os.path.splitext(os.path.basename(self.video_path))[0]
-        out = os.path.join(os.path.dirname(self.video_path), f"{base}.png")
-        subprocess.run([ff, "-y", "-ss", str(max(0, info['dur']-0.5)), "-i", self.video_path, "-vframes", "1", out], capture_output=True)
-        if os.path.exists(out):
-            img = Image.open(out); img.thumbnail((900, 500)); ci = ctk.CTkImage(img, size=(img.width, img.height))
-            self.pre.configure(image=ci, text="")
-            messagebox.showinfo("Success", f"Last Frame saved successfully!\nLocation: {out}")
-        else:
-            messagebox.showerror("Error", "Extraction failed. FFmpeg could not save the frame.")
+        path, mode = self.video_path, self.SEEK_LABELS[self.seek_var.get()]
+        base = os.path.splitext(os.path.basename(path))[0]
+        out = os.path.join(os.path.dirname(path), f"{base}.png")
+        def work(job):
+            t, kf = self._target(path, mode)
+            if frame_extractor.extract_frame(path, t, out, mode, kf, FFmpegManager.get(), before=True) is None:
+                raise RuntimeError("Extraction failed. FFmpeg could not save the frame.")
+            img = Image.open(out); img.thumbnail((900, 500))
+            return img
+        self._busy(True)
+        self.app.jobs.submit(work, name="single-frame", on_done=lambda img: self._extracted(img, out),
+                             on_error=self._failed)
+    def _extracted(self, img, out):
+        self._busy(False)
+        ci = ctk.CTkImage(img, size=(img.width, img.height))
+        self.pre.configure(image=ci, text="")
+        messagebox.showinfo("Success", f"Last Frame saved successfully!\nLocation: {out}")
+    def compare(self):
+        path, mode = self.video_path, self.SEEK_LABELS[self.seek_var.get()]
+        if mode == "exact": mode = "snap"
+        def work(job):
+            t, kf = self._target(path, mode)
+            return frame_extractor.seek_speedup(path, t, kf, FFmpegManager.get(), mode, before=True)
+        self._busy(True)
+        self.app.jobs.submit(work, name="single-frame", on_done=lambda r: self._compared(mode, r),
+                             on_error=self._failed)
+    def _compared(self, mode, r):
+        self._busy(False)
+        off = f"\nFrame is {r['offset_s']:.2f}s before the target." if r['offset_s'] is not None else ""
+        messagebox.showinfo("Seek Comparison", f"Exact seek: {r['exact_s']*1000:.0f} ms\n"
+                            f"{mode}: {r['fast_s']*1000:.0f} ms\nSpeedup: {r['speedup']:.1f}×{off}")
 
 class BatchView(ctk.CTkFrame):
     def __init__(self, master, app):
@@ -129,35 +189,71 @@ class BatchView(ctk.CTkFrame):
     def start(self):
         d = filedialog.askdirectory()
         if d: threading.Thread(target=self._proc, args=(d,), daemon=True).start()
+    def _log(self, text):
+        self.after(0, lambda: (self.log.insert("end", text), self.log.see("end")))
     def _proc(self, d):
-        ff = FFmpegManager.get()
-        files = [f for f in os.listdir(d) if f.lower().endswith(('.mp4','.mov','.avi'))]
-        self.log.insert("end", f"Found {len(files)} videos...\n")
-        for f in files:
-            self.log.insert("end", f"  ⚙ {f}  "); out = os.path.join(d, f"{os.path.splitext(f)[0]}_End.png")
-            subprocess.run([ff, "-y", "-sseof", "-1", "-i", os.path.join(d, f), "-vframes", "1", out], capture_output=True)
-            self.log.insert("end", "✓\n")
-        self.log.insert("end", "✅ Batch complete!\n")
-        messagebox.showinfo("Success", f"Batch processing complete!\nFrames saved in: {d}")
+        engine = BatchEngine(FFmpegManager.get(), workers=SettingsManager.load().get("batch_workers"))
+        jobs = engine.scan(d)
+        self._log(f"Found {len(jobs)} videos — {engine.workers} parallel workers...\n")
+        probed = FFmpegManager.probe_many([j.src for j in jobs], workers=engine.workers)
+        unreadable = sum(1 for m in probed.values() if m is None)
+        if unreadable: self._log(f"  ⚠ {unreadable} file(s) could not be probed\n")
+        def report(job):
+            if job.status == BATCH_DONE: self._log(f"  ✓ {job.name}  ({job.elapsed:.1f}s)\n")
+            else: self._log(f"  ✗ {job.name}  [{job.attempts} attempt(s)] {job.error}\n")
+        engine.run(jobs, report)
+        counts = engine.summary(jobs)
+        self._log(f"✅ Batch complete! {counts.get(BATCH_DONE, 0)} ok, {counts.get(BATCH_FAILED, 0)} failed\n")
+        self.after(0, lambda: messagebox.showinfo("Success", f"Batch processing complete!\nFrames saved in: {d}"))
 
 class StoryboardView(ctk.CTkFrame):
     def __init__(self, master, app):
-        super().__init__(master, fg_color="transparent"); self._build()
+        super().__init__(master, fg_color="transparent"); self._imgs = []; self._build()
     def _build(self):
         ctk.CTkLabel(self, text="🎞️ VIDEO SHOT STORYBOARD", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=20)
-        ctk.CTkButton(self, text="📂 Select Video", command=self.select, fg_color=Theme.ACCENT).pack()
+        ctrl = ctk.CTkFrame(self, fg_color="transparent"); ctrl.pack()
+        self.mode = ctk.CTkSegmentedButton(ctrl, values=["Even Samples", "Scene Cuts"]); self.mode.set("Scene Cuts")
+        self.mode.pack(side="left", padx=10)
+        ctk.CTkButton(ctrl, text="📂 Select Video", command=self.select, fg_color=Theme.ACCENT).pack(side="left")
+        self.status = ctk.CTkLabel(self, text="", text_color=Theme.TEXT_DIM, font=ctk.CTkFont(size=11)); self.status.pack()
         self.sc = ctk.CTkScrollableFrame(self, fg_color=Theme.PANEL_BG); self.sc.pack(fill="both", expand=True, padx=20, pady=20)
     def select(self):
         p = filedialog.askopenfilename()
-        if p: threading.Thread(target=self._run, args=(p,), daemon=True).start()
+        if p:
+            target = self._run_cuts if self.mode.get() == "Scene Cuts" else self._run
+            threading.Thread(target=target, args=(p,), daemon=True).start()
     def _run(self, p):
         ff = FFmpegManager.get(); info = FFmpegManager.probe(p)
         if not info: return
-        for t in [0.1, info['dur']/2, info['dur']-0.1]:
-            out = os.path.join(os.path.dirname(p), f"shot_{t:.1f}.png")
-            subprocess.run([ff, "-y", "-ss", str(t), "-i", p, "-vframes", "1", out], capture_output=True)
-            img = Image.open(out); img.thumbnail((280, 160)); ci = ctk.CTkImage(img, size=(img.width, img.height))
-            self.after(0, lambda i=ci: ctk.CTkLabel(self.sc, image=i, text="").pack(pady=5))
+        count = int(SettingsManager.load().get("shot_board_frames", 48))
+        frames = frame_extractor.extract_frames(p, frame_extractor.even_timestamps(info['dur'], count),
+                                                size=(280, 160), info=info, ffmpeg=ff)
+        imgs = [ctk.CTkImage(img, size=(img.width, img.height)) for img in frames if img is not None]
+        self.after(0, lambda: self._show(imgs))
+    def _run_cuts(self, p):
+        info = FFmpegManager.probe(p)
+        if not info: return
+        s = SettingsManager.load()
+        det = SceneDetector(FFmpegManager.get(), method=s.get("scene_method", "hist"),
+                            threshold=s.get("scene_threshold"), min_shot=s.get("scene_min_shot", 0.8))
+        self.after(0, lambda: self._show([]))
+        for shot in det.detect(p, info):
+            img = shot.image(); img.thumbnail((280, 160))
+            ci = ctk.CTkImage(img, size=(img.width, img.height))
+            txt = f"Shot {shot.index+1}  {shot.start:.1f}s – {shot.end:.1f}s"
+            self.after(0, lambda c=ci, t=txt, n=shot.index: self._add(c, t, n))
+            self.after(0, lambda f=det.frames, r=det.throughput: self.status.configure(
+                text=f"Analysing... {f} frames @ {r:.0f} fps"))
+        self.after(0, lambda: self.status.configure(
+            text=f"✅ {len(self._imgs)} shots — {det.frames} frames in {det.elapsed:.1f}s ({det.throughput:.0f} fps)"))
+    def _add(self, ci, text, i):
+        self._imgs.append(ci)
+        ctk.CTkLabel(self.sc, image=ci, text=text, compound="top", font=ctk.CTkFont(size=10),
+                     text_color=Theme.TEXT_DIM).grid(row=i // 3, column=i % 3, padx=5, pady=5)
+    def _show(self, imgs):
+        for w in self.sc.winfo_children(): w.destroy()
+        self._imgs = []
+        for i, ci in enumerate(imgs): self._add(ci, "", i)
 
 # ─── Watermark Remover View ────────────────────────────────────────────────────
 class WatermarkRemoverView(ctk.CTkFrame):
@@ -171,6 +267,9 @@ class WatermarkRemoverView(ctk.CTkFrame):
         self.start_x = None
         self.start_y = None
         self.x1, self.y1, self.x2, self.y2 = 0, 0, 0, 0
+        self.job = None
+        self.pyramid = None
+        self._resize_after = None
         self._build()
 
     def _build(self):
@@ -193,6 +292,7 @@ class WatermarkRemoverView(ctk.CTkFrame):
         self.canvas.bind("<ButtonPress-1>", self.on_press)
         self.canvas.bind("<B1-Motion>", self.on_drag)
         self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<Configure>", self._on_resize)
 
         # Controls
         ctrl = ctk.CTkFrame(self, fg_color="transparent")
@@ -223,32 +323,44 @@ class WatermarkRemoverView(ctk.CTkFrame):
                 messagebox.showerror("Error", "Could not probe video.")
 
     def load_preview(self):
-        ff = FFmpegManager.get()
-        # Extract a frame from the middle
+        # Preview only needs a representative frame: snap to the keyframe nearest the middle
         t = self.video_info['dur'] / 2
-        tmp_frame = "tmp_watermark_preview.png"
-        subprocess.run([ff, "-y", "-ss", str(t), "-i", self.video_path, "-vframes", "1", tmp_frame], capture_output=True)
+        def grab():
+            img = frame_extractor.grab_frame(self.video_path, t, self.video_info, mode="snap",
+                                             keyframes=FFmpegManager.keyframes(self.video_path), ffmpeg=FFmpegManager.get())
+            return None if img is None else (img, img.size)
+        self.pyramid = self.app.previews.get(self.video_path, "frame", round(t, 3), loader=grab)
+        self.redraw()
+
+    def redraw(self):
+        if not self.pyramid: return
+        # Fit to the canvas from the nearest pyramid level (no decode)
+        cw, ch = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if cw < 10 or ch < 10: # Canvas not yet rendered properly or too small
+            cw, ch = 800, 450
         
-        if os.path.exists(tmp_frame):
-            img = Image.open(tmp_frame)
-            # Resize to fit canvas while maintaining aspect ratio
-            cw, ch = self.canvas.winfo_width(), self.canvas.winfo_height()
-            if cw < 10 or ch < 10: # Canvas not yet rendered properly or too small
-                cw, ch = 800, 450
-            
-            img.thumbnail((cw, ch))
-            self.preview_image = ImageTk.PhotoImage(img)
-            self.img_scale_w = self.video_info['w'] / img.width
-            self.img_scale_h = self.video_info['h'] / img.height
-            
-            self.canvas.delete("all")
-            self.canvas.create_image(cw//2, ch//2, image=self.preview_image, anchor="center")
-            
-            # Store image offsets for coordinate mapping
-            self.img_offset_x = (cw - img.width) // 2
-            self.img_offset_y = (ch - img.height) // 2
-            
-            os.remove(tmp_frame)
+        img = self.pyramid.render((cw, ch))
+        self.preview_image = ImageTk.PhotoImage(img)
+        self.img_scale_w = self.pyramid.size[0] / img.width
+        self.img_scale_h = self.pyramid.size[1] / img.height
+        
+        self.canvas.delete("all")
+        self.canvas.create_image(cw//2, ch//2, image=self.preview_image, anchor="center")
+        
+        # Store image offsets for coordinate mapping
+        self.img_offset_x = (cw - img.width) // 2
+        self.img_offset_y = (ch - img.height) // 2
+        self.selection_rect = None
+        if getattr(self, "final_coords", None) and self.final_coords[2] > 0:
+            vx, vy, vw, vh = self.final_coords
+            x1, y1 = vx / self.img_scale_w + self.img_offset_x, vy / self.img_scale_h + self.img_offset_y
+            self.selection_rect = self.canvas.create_rectangle(x1, y1, x1 + vw / self.img_scale_w, y1 + vh / self.img_scale_h,
+                                                               outline=Theme.ACCENT, width=2, dash=(4, 4))
+
+    def _on_resize(self, _event):
+        # Debounced: a window drag fires dozens of <Configure> events
+        if self._resize_after: self.after_cancel(self._resize_after)
+        self._resize_after = self.after(80, self.redraw)
 
     def on_press(self, event):
         if not self.video_info: return
@@ -279,67 +391,87 @@ class WatermarkRemoverView(ctk.CTkFrame):
         self.final_coords = (vx1, vy1, vw, vh)
 
     def process(self):
+        if self.job and not self.job.done():
+            self.job.cancel()
+            self.proc_btn.configure(state="disabled", text="⏳ Cancelling...")
+            return
         if not hasattr(self, 'final_coords') or self.final_coords[2] <= 0:
             messagebox.showwarning("Selection", "Please select the watermark area first."); return
         
         out = filedialog.asksaveasfilename(defaultextension=".mp4", filetypes=[("Video","*.mp4")])
         if out:
-            self.proc_btn.configure(state="disabled", text="⏳ Processing...")
-            threading.Thread(target=self._run_ffmpeg, args=(out,), daemon=True).start()
-
-    def _run_ffmpeg(self, out_path):
+            # Background job: keeps rendering while other tabs are used; the button becomes Cancel
+            self.proc_btn.configure(text="⏹ Cancel")
+            self.progress.set(0)
+            self.job = self.app.jobs.submit(self._run_ffmpeg, out, name="watermark",
+                                            on_progress=lambda frac, *_: self.progress.set(frac),
+                                            on_done=lambda msg: self._on_done(msg, out),
+                                            on_error=self._on_error, on_cancel=self._reset_proc_btn)
+
+    def _run_ffmpeg(self, job, out_path):
         ff = FFmpegManager.get()
         x, y, w, h = self.final_coords
         
-        # PRO MODE: Sharp Patch Overlay (Avoids ugly delogo blur)
-        self.after(0, lambda: self.proc_btn.configure(text="🪄 Initializing..."))
         try:
+            if SettingsManager.load().get("watermark_mode", "stream") == "stream":
+                # STREAM MODE: Inpaint the ROI of every frame (moving backgrounds / animated logos)
+                watermark_pipeline.remove_watermark_stream(self.video_path, out_path, (x, y, w, h), self.video_info,
+                                                           ff, progress=job.report, cancel=job.cancel_event)
+                return f"Frame-by-frame removal complete!\n{out_path}"
+
+            # PRO MODE: Sharp Patch Overlay (Avoids ugly delogo blur)
             # 1. Extract a sharp reference frame
             ref_frame = "tmp_vid_ref.png"
             subprocess.run([ff, "-y", "-ss", "0.5", "-i", self.video_path, "-vframes", "1", ref_frame], capture_output=True)
+            job.report(1, 4)
             
             if os.path.exists(ref_frame):
                 # 2. Inpaint that frame with Professional Smooth engine
                 img = Image.open(ref_frame)
-                img = local_inpainter.professional_local_erase(img, x, y, x+w, y+h)
+                img = local_inpainter.professional_local_erase(img, x, y, x+w, y+h, in_place=True)
+                job.check()
+                job.report(2, 4)
                 
                 # 3. Save the clean patch
                 patch_file = "tmp_vid_patch.png"
                 img.crop((x, y, x+w, y+h)).save(patch_file)
                 
                 # 4. Use overlay filter to paste the sharp patch over the whole video
-                self.after(0, lambda: self.proc_btn.configure(text="🎞️ Rendering..."))
+                job.report(3, 4)
                 cmd = [ff, "-y", "-i", self.video_path, "-i", patch_file, 
                        "-filter_complex", f"[0:v][1:v]overlay={x}:{y}", "-c:a", "copy", out_path]
                 res = subprocess.run(cmd, capture_output=True, text=True)
                 
                 if res.returncode == 0:
-                    self.after(0, lambda: messagebox.showinfo("Success", f"Sharp Removal complete!\n{out_path}"))
-                    os.startfile(os.path.dirname(out_path))
+                    return f"Sharp Removal complete!\n{out_path}"
                 else:
                     raise Exception(f"FFmpeg Overlay Failed: {res.stderr[-200:]}")
             else:
                 raise Exception("Cannot extract video frame.")
                 
         except Exception as e:
+            if job.cancelled: raise
             # Fallback to basic delogo if complex method fails
             cmd = [ff, "-y", "-i", self.video_path, "-vf", f"delogo=x={x}:y={y}:w={w}:h={h}", "-c:a", "copy", out_path]
             subprocess.run(cmd)
-            self.after(0, lambda err=e: messagebox.showinfo("Completed", f"Basic removal complete.\n(Note: Sharp mode had issues: {str(err)})"))
-            os.startfile(os.path.dirname(out_path))
+            return f"Basic removal complete.\n(Note: Sharp mode had issues: {str(e)})"
             
         finally:
             for f in ["tmp_vid_ref.png", "tmp_vid_patch.png"]:
                 if os.path.exists(f): os.remove(f)
-            self._reset_proc_btn()
 
-    def _reset_proc_btn(self):
-        self.after(0, lambda: self.proc_btn.configure(state="normal", text="✨ REMOVE WATERMARK"))
-        self.after(0, lambda: self.progress.set(0))
+    def _on_done(self, msg, out_path):
+        self._reset_proc_btn()
+        messagebox.showinfo("Success", msg)
+        os.startfile(os.path.dirname(out_path))
+
+    def _on_error(self, e):
+        self._reset_proc_btn()
+        messagebox.showerror("Error", str(e))
 
     def _reset_proc_btn(self):
-        self.after(0, lambda: self.proc_btn.configure(state="normal", text="✨ REMOVE WATERMARK"))
-        self.after(0, lambda: self.progress.set(0))
+        self.proc_btn.configure(state="normal", text="✨ REMOVE WATERMARK")
+        self.progress.set(0)
 
 # ─── Image Eraser View ────────────────────────────────────────────────────────
 class ImageEraserView(ctk.CTkFrame):
@@ -353,6 +485,12 @@ class ImageEraserView(ctk.CTkFrame):
         self.start_x = None
         self.start_y = None
         self.x1, self.y1, self.x2, self.y2 = 0, 0, 0, 0
+        self.rects = []          # Selected areas in image pixels (Shift+drag adds another)
+        self.rect_items = []
+        self.mask_image = None
+        self.job = None
+        self.pyramid = None
+        self._resize_after = None
         self._build()
 
     def _build(self):
@@ -363,6 +501,7 @@ class ImageEraserView(ctk.CTkFrame):
         header.grid(row=0, column=0, sticky="ew", padx=20, pady=(10, 0))
         ctk.CTkLabel(header, text="🎨 IMAGE ERASER (INPAINT)", font=ctk.CTkFont(size=18, weight="bold"), text_color="#F472B6").pack(side="left")
         ctk.CTkButton(header, text="📂 Select Image", command=self.select_image, fg_color=Theme.CARD_BG, width=120).pack(side="right")
+        ctk.CTkButton(header, text="🩹 Load Mask", command=self.select_mask, fg_color=Theme.CARD_BG, width=120).pack(side="right", padx=8)
 
         # Main Workspace
         self.work = ctk.CTkFrame(self, fg_color=Theme.PANEL_BG, corner_radius=15)
@@ -374,33 +513,52 @@ class ImageEraserView(ctk.CTkFrame):
         self.canvas.bind("<ButtonPress-1>", self.on_press)
         self.canvas.bind("<B1-Motion>", self.on_drag)
         self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<Configure>", self._on_resize)
 
         # Controls
         ctrl = ctk.CTkFrame(self, fg_color="transparent")
         ctrl.grid(row=2, column=0, sticky="ew", padx=20, pady=(0, 20))
         
-        self.coords_lbl = ctk.CTkLabel(ctrl, text="Select area to erase...", font=ctk.CTkFont(size=12), text_color=Theme.TEXT_DIM)
+        self.coords_lbl = ctk.CTkLabel(ctrl, text="Select area to erase... (Shift+drag adds more)", font=ctk.CTkFont(size=12), text_color=Theme.TEXT_DIM)
         self.coords_lbl.pack(side="left", padx=10)
 
         self.proc_btn = ctk.CTkButton(ctrl, text="✨ ERASE SELECTION", command=self.process, fg_color="#DB2777", state="disabled", font=ctk.CTkFont(weight="bold"))
         self.proc_btn.pack(side="right", padx=10)
 
+        self.progress = ctk.CTkProgressBar(self, fg_color=Theme.CARD_BG, progress_color="#DB2777")
+        self.progress.grid(row=3, column=0, sticky="ew", padx=20, pady=(0, 20))
+        self.progress.set(0)
+
     def select_image(self):
         p = filedialog.askopenfilename(filetypes=[("Images", "*.png *.jpg *.jpeg *.webp")])
         if p:
             self.image_path = p
             self.original_image = Image.open(p)
+            self.rects, self.rect_items, self.mask_image = [], [], None
             self.load_preview()
             self.proc_btn.configure(state="normal")
 
+    def select_mask(self):
+        if not self.original_image: return
+        p = filedialog.askopenfilename(filetypes=[("Mask Images", "*.png *.jpg *.jpeg *.bmp")])
+        if p:
+            mask = Image.open(p).convert("L")
+            if mask.size != self.original_image.size:
+                messagebox.showwarning("Mask", "Mask size must match the image."); return
+            self.mask_image = mask
+            self.coords_lbl.configure(text=f"Mask loaded — {len(local_inpainter.mask_regions(mask))} region(s)")
+
     def load_preview(self):
         if not self.original_image: return
-        img = self.original_image.copy()
-        
+        self.pyramid = self.app.previews.get(self.image_path)
+        self.redraw()
+
+    def redraw(self):
+        if not self.pyramid: return
         cw, ch = self.canvas.winfo_width(), self.canvas.winfo_height()
         if cw < 10 or ch < 10: cw, ch = 800, 450
         
-        img.thumbnail((cw, ch))
+        img = self.pyramid.render((cw, ch))
         self.display_image = ImageTk.PhotoImage(img)
         self.img_scale_w = self.original_image.width / img.width
         self.img_scale_h = self.original_image.height / img.height
@@ -410,13 +568,24 @@ class ImageEraserView(ctk.CTkFrame):
         
         self.img_offset_x = (cw - img.width) // 2
         self.img_offset_y = (ch - img.height) // 2
+        # Selections live in image pixels — map them onto the new canvas layout
+        self.rect_items = [self.canvas.create_rectangle(x1 / self.img_scale_w + self.img_offset_x, y1 / self.img_scale_h + self.img_offset_y,
+                                                        x2 / self.img_scale_w + self.img_offset_x, y2 / self.img_scale_h + self.img_offset_y,
+                                                        outline="#F472B6", width=2, dash=(4, 4)) for x1, y1, x2, y2 in self.rects]
+
+    def _on_resize(self, _event):
+        if self._resize_after: self.after_cancel(self._resize_after)
+        self._resize_after = self.after(80, self.redraw)
 
     def on_press(self, event):
         if not self.original_image: return
         self.start_x = event.x
         self.start_y = event.y
-        if self.selection_rect: self.canvas.delete(self.selection_rect)
+        if not event.state & 0x0001:   # Without Shift a new drag replaces every selection
+            for item in self.rect_items: self.canvas.delete(item)
+            self.rects, self.rect_items = [], []
         self.selection_rect = self.canvas.create_rectangle(self.start_x, self.start_y, self.start_x, self.start_y, outline="#F472B6", width=2, dash=(4, 4))
+        self.rect_items.append(self.selection_rect)
 
     def on_drag(self, event):
         if not self.original_image or not self.selection_rect: return
@@ -433,36 +602,68 @@ class ImageEraserView(ctk.CTkFrame):
         rx2 = min(self.original_image.width, int((self.x2 - self.img_offset_x) * self.img_scale_w))
         ry2 = min(self.original_image.height, int((self.y2 - self.img_offset_y) * self.img_scale_h))
         
-        self.final_rect = (rx1, ry1, rx2, ry2)
-        self.coords_lbl.configure(text=f"Area: {rx2-rx1}x{ry2-ry1} at ({rx1}, {ry1})")
+        if rx2 > rx1 and ry2 > ry1: self.rects.append((rx1, ry1, rx2, ry2))
+        extra = f"  (+{len(self.rects)-1} more)" if len(self.rects) > 1 else ""
+        self.coords_lbl.configure(text=f"Area: {rx2-rx1}x{ry2-ry1} at ({rx1}, {ry1}){extra}")
 
     def process(self):
-        if not hasattr(self, 'final_rect') or (self.final_rect[2]-self.final_rect[0]) <= 0:
+        if self.job and not self.job.done():
+            self.job.cancel()
+            self.proc_btn.configure(state="disabled", text="⏳ Cancelling...")
+            return
+        if not self.rects and self.mask_image is None:
             messagebox.showwarning("Selection", "Please select an area first."); return
         
         out = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG (Alpha)","*.png"), ("JPEG","*.jpg")])
         if out:
-            # PRO MODE: Texture-Sync Inpainting
-            img = self.original_image.copy()
-            x1, y1, x2, y2 = self.final_rect
-            
-            # Use high-quality local interpolation
-            img = local_inpainter.professional_local_erase(img, x1, y1, x2, y2)
-            
-            if out.lower().endswith((".jpg", ".jpeg")):
-                img.convert("RGB").save(out, quality=98)
-            else:
-                img.save(out)
-                
-            messagebox.showinfo("Success", f"Professional Sync complete!\nSaved to: {out}")
-            os.startfile(os.path.dirname(out))
+            # Erase + encode off the Tk thread; the button becomes Cancel until the job ends
+            self.proc_btn.configure(text="⏹ Cancel")
+            self.progress.set(0)
+            self.job = self.app.jobs.submit(self._erase, self.original_image.copy(), list(self.rects), self.mask_image,
+                                            out, name="erase", on_progress=lambda frac, *_: self.progress.set(frac),
+                                            on_done=self._on_done, on_error=self._on_error,
+                                            on_cancel=self._reset_proc_btn)
+
+    def _erase(self, job, img, rects, mask, out):
+        # PRO MODE: Texture-Sync Inpainting
+        cfg = SettingsManager.load()
+        # Use high-quality local interpolation — every selected area and mask region in one pass
+        img = local_inpainter.erase_regions(img, rects=rects, mask=mask,
+                                            method=cfg.get("eraser_method", "donor"),
+                                            time_budget=cfg.get("eraser_time_budget"),
+                                            progress=job.report, cancel=job.cancel_event, in_place=True)
+        job.check()
+        
+        if out.lower().endswith((".jpg", ".jpeg")):
+            img.convert("RGB").save(out, quality=98)
+        else:
+            img.save(out)
+        return out
+
+    def _on_done(self, out):
+        self._reset_proc_btn()
+        messagebox.showinfo("Success", f"Professional Sync complete!\nSaved to: {out}")
+        os.startfile(os.path.dirname(out))
+
+    def _on_error(self, e):
+        self._reset_proc_btn()
+        messagebox.showerror("Error", str(e))
+
+    def _reset_proc_btn(self):
+        self.proc_btn.configure(state="normal", text="✨ ERASE SELECTION")
+        self.progress.set(0)
 
 # ─── Script Storyboard View ────────────────────────────────────────────────────
 class ScriptStoryboardView(ctk.CTkFrame):
     def __init__(self, master, app):
         super().__init__(master, fg_color="transparent")
         self.app = app
-        self.gen = StoryboardGenerator()
+        cfg = SettingsManager.load()
+        self.gen = StoryboardGenerator(panel_format=cfg.get("panel_format", "png"),
+                                       compress_level=cfg.get("panel_compress_level", 6),
+                                       quality=cfg.get("panel_jpeg_quality", 90),
+                                       panels_per_sheet=cfg.get("sheet_panels_per_page"),
+                                       sheet_tiles=cfg.get("sheet_tiles", False))
         self.scenes = []; self.svgs = []; self.pngs = []; self.idx = 0
         self._build()
 
@@ -488,6 +689,12 @@ class ScriptStoryboardView(ctk.CTkFrame):
             "Shockwave tears through buildings.\n\nCut to black.\n\n"
             "TEXT ON SCREEN: Year 2057."
         )
+        # Live parse: typing re-parses only the edited scene blocks (debounced)
+        self.live = IncrementalParser(self.txt.get("1.0", "end-1c"))
+        self._live_after = None
+        self._live_stale = False   # Live edits skipped while Generate was running
+        self._gen_id = 0           # Bumped per Generate; live renders from an older run are dropped
+        self.txt.bind("<KeyRelease>", self._on_script_edit)
 
         # Controls row
         ctrl = ctk.CTkFrame(L, fg_color="transparent"); ctrl.pack(fill="x", padx=20, pady=10)
@@ -560,6 +767,45 @@ class ScriptStoryboardView(ctk.CTkFrame):
         self.scene_title.configure(text="—")
         self.scene_meta.configure(text="")
 
+    # ─── Live Parse ───────────────────────────────────────────────────────────
+    def _on_script_edit(self, _event=None):
+        if self._live_after: self.after_cancel(self._live_after)
+        self._live_after = self.after(150, self._live_update)
+
+    def _live_update(self):
+        self._live_after = None
+        changed = self.live.replace(self.txt.get("1.0", "end-1c"))
+        if not changed: return
+        n = len(self.live.scenes)
+        which = f"scene {changed[0]+1}" if len(changed) == 1 else f"{len(changed)} scenes"
+        self.status_lbl.configure(text=f"📝 {n} scenes parsed · {which} changed", text_color=Theme.TEXT_DIM)
+        self._apply_live(changed)
+
+    def _apply_live(self, changed):
+        if not self.scenes: return
+        n = len(self.live.scenes)
+        if len(self.scenes) != n:
+            self.status_lbl.configure(text=f"📝 {n} scenes parsed · scene count changed — Generate to refresh")
+            return
+        if self.app.jobs.active("generate"):
+            # Generate writes the same panel files; re-apply the edits once it has finished
+            self._live_stale = True
+            return
+        # Same layout as the generated board: swap in the re-parsed scenes, refresh the visible one
+        for i in changed: self.scenes[i] = self.live.scenes[i]
+        if self.idx in changed:
+            i, sc = self.idx, self.scenes[self.idx]
+            self.scene_title.configure(text=f"SCENE {i+1}:  {sc.header}")
+            self.scene_meta.configure(text=f"🎥 {sc.shot_type}   |   💡 {sc.lighting}   |   🎬 {sc.camera_movement}")
+            gen_id = self._gen_id
+            self.app.jobs.submit(lambda job: self.gen.render_one(sc, self.style_var.get(), i), name="live-panel",
+                                 on_done=lambda res: self._live_panel(i, res, gen_id))
+
+    def _live_panel(self, i, res, gen_id):
+        if gen_id == self._gen_id and i < len(self.svgs):
+            self.svgs[i], self.pngs[i] = res
+            if i == self.idx: self._show_scene()
+
     # ─── Generate ─────────────────────────────────────────────────────────────
     def _on_generate(self):
         script = self.txt.get("1.0", "end").strip()
@@ -568,7 +814,16 @@ class ScriptStoryboardView(ctk.CTkFrame):
         self.gen_btn.configure(state="disabled", text="⏳ Generating...")
         self.progress.set(0)
         self.status_lbl.configure(text="Parsing scenes...")
-        threading.Thread(target=self._do_generate, args=(script,), daemon=True).start()
+        # Live re-renders write the same panel files: drop queued ones, and let Generate wait
+        # for any already running (and their queued writes) before it starts writing
+        self._gen_id += 1
+        live = [j.future for j in self.app.jobs.cancel("live-panel")]
+        def run(job):
+            futures.wait(live)
+            try: self.gen.renderer.flush()
+            except: pass               # A failed stale live write is overwritten anyway
+            self._do_generate(script)
+        self.app.jobs.submit(run, name="generate", on_done=self._generate_finished)
 
     def _do_generate(self, script):
         def progress_cb(done, total):
@@ -596,6 +851,13 @@ class ScriptStoryboardView(ctk.CTkFrame):
             b.configure(state="normal")
         self._show_scene()
 
+    def _generate_finished(self, _res=None):
+        # The generate job is no longer active: apply the live edits made while it ran
+        if self._live_stale and self.scenes:
+            self._live_stale = False
+            if len(self.scenes) == len(self.live.scenes):
+                self._apply_live([i for i, sc in enumerate(self.live.scenes) if sc != self.scenes[i]])
+
     # ─── Preview ──────────────────────────────────────────────────────────────
     def _show_scene(self):
         if not self.scenes: return
@@ -609,8 +871,11 @@ class ScriptStoryboardView(ctk.CTkFrame):
         self.img_label.configure(image=None, text="Loading...", text_color=Theme.TEXT_DIM)
         self.update_idletasks()
 
-        if pn and os.path.exists(pn):
+        # A freshly rendered card is shown from memory while its files are still being written
+        img = self.gen.renderer.card(self.idx)
+        if img is None and pn and os.path.exists(pn):
             img = Image.open(pn)
+        if img is not None:
             # Full vertical card scaling
             w_scaled = 450
             h_scaled = int(img.height * (450/img.width))
@@ -626,18 +891,34 @@ class ScriptStoryboardView(ctk.CTkFrame):
         if self.idx < len(self.scenes)-1: self.idx += 1; self._show_scene()
 
     # ─── Export ───────────────────────────────────────────────────────────────
+    # Every export starts with flush(): panels and SVGs may still be in the writer pool
     def exp_pdf(self):
         p = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF","*.pdf")])
-        if p: ExportManager.export_as_pdf(self.scenes, self.svgs, p); os.startfile(p)
+        if not p: return
+        self.gen.renderer.flush()
+        cfg = SettingsManager.load()
+        if cfg.get("pdf_mode", "vector") == "raster":
+            ExportManager.export_as_pdf_raster(self.scenes, self.pngs, p, dpi=cfg.get("pdf_dpi", 150),
+                                               image_format=cfg.get("pdf_image_format", "jpeg"),
+                                               quality=cfg.get("pdf_jpeg_quality", 85))
+        else:
+            ExportManager.export_as_pdf(self.scenes, self.svgs, p)
+        os.startfile(p)
     def exp_pptx(self):
         p = filedialog.asksaveasfilename(defaultextension=".pptx", filetypes=[("PowerPoint","*.pptx")])
-        if p: ExportManager.export_as_pptx(self.scenes, self.pngs, p); os.startfile(p)
+        if not p: return
+        self.gen.renderer.flush()
+        ExportManager.export_as_pptx(self.scenes, self.pngs, p); os.startfile(p)
     def exp_folder(self):
+        self.gen.renderer.flush()
         os.startfile(os.path.abspath(self.gen.svg_dir))
     def exp_strip(self):
+        self.gen.renderer.flush()
         p = os.path.abspath(os.path.join(self.gen.svg_dir, "storyboard_sheet.png"))
-        if os.path.exists(p): os.startfile(p)
-        else: messagebox.showinfo("Info", "Strip sheet not found.")
+        if not os.path.exists(p): messagebox.showinfo("Info", "Strip sheet not found."); return
+        # Paged (storyboard_sheet_N.png) or tiled (.dzi + _files/) sheets are several files: open the folder
+        paged = os.path.exists(os.path.join(self.gen.svg_dir, "storyboard_sheet_2.png"))
+        os.startfile(os.path.dirname(p) if paged or self.gen.sheet_tiles else p)
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # MAIN APP
@@ -649,6 +930,12 @@ class AIVerseStudio(ctk.CTk):
         self.geometry("1440x900")
         self.configure(fg_color=Theme.BG_DARK)
         self.views = {}
+        self.jobs = JobRunner(self)      # Shared background executor — jobs outlive tab switches
+        self.previews = PreviewCache()   # Proxy pyramids shared by the canvas views
+        # Scene enrichment rules: the "vocabulary_path" setting, else an editable vocabulary.json
+        # in the working directory / next to the exe, else the bundled copy
+        ScriptParser.set_vocabulary(SettingsManager.load().get("vocabulary_path"))
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
         self._build_nav()
         self._build_views()
         self.switch_tab("home")
@@ -687,7 +974,14 @@ class AIVerseStudio(ctk.CTk):
         for k, v in self.views.items():
             (v.grid(row=0, column=0, sticky="nsew") if k==tab else v.grid_forget())
 
+    def _on_close(self):
+        if self.jobs.active() and not messagebox.askyesno("Jobs running", "Background jobs are still running. Cancel them and quit?"):
+            return
+        self.jobs.shutdown()
+        self.destroy()
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support()   # Frozen exe: pool workers must not start another GUI
     ctk.set_appearance_mode("dark")
     ctk.set_default_color_theme("blue")
     AIVerseStudio().mainloop()
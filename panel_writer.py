@@ -0,0 +1,112 @@
+"""
+PanelWriter — Asynchronous Encode & Write Stage
+Rendering hands finished cards to a small thread pool that encodes each one exactly once
+(PNG / lossless WebP / JPEG, configurable) and writes it atomically; further copies of the
+same card are hard-links to that file (plain copies where links aren't supported). At most
+`max_inflight` cards are queued, so a slow disk holds the renderer back instead of
+letting encoded cards pile up in memory.
+"""
+import io
+import os
+import shutil
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Format name → (file extension, Pillow format)
+FORMATS = {"png": (".png", "PNG"), "webp": (".webp", "WEBP"), "jpeg": (".jpg", "JPEG")}
+
+def encode(img, fmt="png", level=6, quality=90):
+    """Encoded bytes of `img`. `level` is the PNG zlib level (0-9) or the WebP effort
+    (0-6); `quality` applies to JPEG."""
+    buf = io.BytesIO()
+    if fmt == "png":
+        img.save(buf, "PNG", compress_level=level)
+    elif fmt == "webp":
+        img.save(buf, "WEBP", lossless=True, method=min(level, 6))
+    elif fmt == "jpeg":
+        img.convert("RGB").save(buf, "JPEG", quality=quality, optimize=True)
+    else:
+        raise ValueError(f"Unknown panel format: {fmt}")
+    return buf.getvalue()
+
+def write_atomic(path, data):
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)             # Readers never see a half-written file
+
+def copy_atomic(src, dst):
+    tmp = f"{dst}.{threading.get_ident()}.tmp"
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+def link_or_copy(src, dst):
+    """Make `dst` the same file as `src`: a hard-link if possible, else a copy.
+    `dst` is replaced, never written through, so a link never changes its old target."""
+    tmp = f"{dst}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        return copy_atomic(src, dst)
+    os.replace(tmp, dst)
+
+class PanelWriter:
+    def __init__(self, fmt="png", level=6, quality=90, workers=2, max_inflight=8):
+        if fmt not in FORMATS: raise ValueError(f"Unknown panel format: {fmt}")
+        self.fmt, self.level, self.quality = fmt, level, quality
+        self.ext = FORMATS[fmt][0]
+        self.workers = workers         # 0 = write synchronously in the caller
+        self.max_inflight = max(1, max_inflight)
+        self._pool = None
+        self._inflight = deque()
+        self._lock = threading.Lock()   # Render threads (batch + live preview) share one writer
+
+    def write(self, img, paths):
+        """Encode `img` once and write it to every path in `paths` (first is the real file).
+        Returns the encoded bytes."""
+        data = encode(img, self.fmt, self.level, self.quality)
+        write_atomic(paths[0], data)
+        for p in paths[1:]:
+            link_or_copy(paths[0], p)
+        return data
+
+    def _oldest(self, wait):
+        # Pop the oldest queued job — only if it is done, unless `wait`
+        with self._lock:
+            if self._inflight and (wait or self._inflight[0].done()):
+                return self._inflight.popleft()
+        return None
+
+    def submit(self, fn, *args):
+        """Run `fn(*args)` on the writer pool; blocks while `max_inflight` jobs are queued."""
+        if not self.workers:
+            fn(*args)
+            return
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="panel-writer")
+        fut = self._oldest(False)
+        while fut:                                       # Reap finished writes (surfaces failures early)
+            fut.result()
+            fut = self._oldest(False)
+        while len(self._inflight) >= self.max_inflight:  # Backpressure: wait for the oldest write
+            fut = self._oldest(True)
+            if fut: fut.result()
+        with self._lock:
+            self._inflight.append(self._pool.submit(fn, *args))
+
+    def flush(self):
+        """Wait for every queued write; re-raises the first failure."""
+        fut = self._oldest(True)
+        while fut:
+            fut.result()
+            fut = self._oldest(True)
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self._pool:
+                self._pool.shutdown()
+                self._pool = None
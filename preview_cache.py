@@ -0,0 +1,101 @@
+"""
+PreviewCache — Proxy Pyramids for Canvas Previews
+Each source (still image or video frame) is decoded once into a small image pyramid
+(longest side ≤ MAX_SIDE, then halved down to MIN_SIDE) held in memory with LRU
+eviction by byte size, keyed by path + mtime. Canvas redraws and resizes render from
+the nearest pyramid level instead of re-decoding the full-resolution source.
+"""
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+MAX_SIDE = 2048   # Largest proxy kept — bigger than any canvas we draw into
+MIN_SIDE = 128
+
+class PreviewPyramid:
+    """Proxy levels of one source, largest first. `size` is the full-resolution source size.
+    Takes ownership of `img` (it may be downscaled in place)."""
+    def __init__(self, img, size=None):
+        self.size = size or img.size
+        if img.mode not in ("RGB", "RGBA"): img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        img.load()
+        if max(img.size) > MAX_SIDE:
+            img.thumbnail((MAX_SIDE, MAX_SIDE), Image.LANCZOS)
+        self.levels = [img]
+        while max(img.size) // 2 >= MIN_SIDE:
+            img = img.reduce(2)
+            self.levels.append(img)
+        self.nbytes = sum(l.width * l.height * len(l.getbands()) for l in self.levels)
+        self._last = None   # (size, image) of the latest render — redraws at the same size are free
+
+    def fit_size(self, box):
+        """Display size of the whole source fitted inside `box` (never upscaled)."""
+        w, h = self.size
+        s = min(box[0] / w, box[1] / h, 1.0)
+        return max(1, int(w * s)), max(1, int(h * s))
+
+    def level(self, size):
+        """Smallest level still at least `size` (the base level if none is)."""
+        for l in reversed(self.levels):
+            if l.width >= size[0] and l.height >= size[1]: return l
+        return self.levels[0]
+
+    def render(self, box):
+        """PIL image of the source fitted to `box`, resampled from the nearest level."""
+        size = self.fit_size(box)
+        if self._last and self._last[0] == size: return self._last[1]
+        l = self.level(size)
+        img = l if l.size == size else l.resize(size, Image.BILINEAR)
+        self._last = (size, img)
+        return img
+
+def _open_proxy(path):
+    """Decode a still at reduced size where the codec allows it (JPEG DCT scaling)."""
+    img = Image.open(path)
+    size = img.size
+    img.draft("RGB", (MAX_SIDE, MAX_SIDE))
+    return PreviewPyramid(img, size)
+
+class PreviewCache:
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path, *extra):
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size) + extra
+
+    def get(self, path, *extra, loader=None):
+        """
+        Pyramid for `path` (plus `extra` key parts, e.g. a video timestamp), built on a miss.
+        `loader()` returns (PIL image, full-res size) for sources PIL can't open (video frames);
+        it may return None, which is not cached.
+        """
+        k = self.key(path, *extra)
+        with self._lock:
+            if k in self._lru:
+                self._lru.move_to_end(k)
+                return self._lru[k]
+        if loader is None:
+            pyr = _open_proxy(path)
+        else:
+            res = loader()
+            if res is None: return None
+            pyr = PreviewPyramid(*res)
+        with self._lock:
+            if k not in self._lru:
+                self._lru[k] = pyr
+                self.nbytes += pyr.nbytes
+            while self.nbytes > self.max_bytes and len(self._lru) > 1:
+                _, old = self._lru.popitem(last=False)
+                self.nbytes -= old.nbytes
+        return pyr
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self.nbytes = 0
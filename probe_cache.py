@@ -0,0 +1,239 @@
+"""
+ProbeCache — Persistent ffprobe Metadata
+SQLite on disk, keyed by (absolute path, size, mtime), with an in-process LRU in front.
+Stores richer stream metadata (fps, codec, pixel format, rotation, keyframe interval)
+so later stages never have to spawn ffprobe again for an unchanged file.
+Per-video keyframe indexes (packet timestamps, no decoding) live in the same database.
+"""
+import os
+import json
+import bisect
+import sqlite3
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_FILE = "probe_cache.sqlite"
+SCHEMA_VERSION = 3       # 2: keyframe_interval_min, 3: fps_rate
+KEYFRAME_VERSION = 2      # Bump when the index changes meaning (2: relative to start_time)
+GOP_SCAN_PACKETS = 240   # Packets read to estimate the keyframe interval
+VIDEO_EXTS = ('.mp4', '.mov', '.avi', '.mkv')
+
+def _rate(s):
+    """'30000/1001' → 29.97"""
+    try:
+        num, den = (s or "0/0").split("/")
+        return float(num) / float(den) if float(den) else 0.0
+    except: return 0.0
+
+def _rotation(stream):
+    tags = stream.get("tags") or {}
+    if "rotate" in tags:
+        try: return int(tags["rotate"]) % 360
+        except: pass
+    for sd in stream.get("side_data_list") or []:
+        if "rotation" in sd:
+            try: return int(sd["rotation"]) % 360
+            except: pass
+    return 0
+
+def _median_gap(times):
+    """Median spacing (seconds) of sorted timestamps, or None with fewer than two."""
+    gaps = sorted(b - a for a, b in zip(times, times[1:]) if b > a)
+    return round(gaps[len(gaps)//2], 4) if gaps else None
+
+def _keyframe_interval(packets):
+    """(interval, at_least): the median keyframe spacing of the scanned packets, or
+    (None, span) when they held fewer than two keyframes — the interval is then unknown,
+    only known to be at least `span` seconds (the full keyframe index fills it in later)."""
+    times = [float(p["pts_time"]) for p in packets if p.get("pts_time") not in (None, "N/A")]
+    kf = sorted(float(p["pts_time"]) for p in packets
+                if "K" in p.get("flags", "") and p.get("pts_time") not in (None, "N/A"))
+    interval = _median_gap(kf)
+    if interval is not None or not times: return interval, None
+    return None, round(max(times) - (kf[0] if kf else min(times)), 4)
+
+def run_ffprobe(path, ffprobe="ffprobe"):
+    """Spawn ffprobe once and return the normalised metadata dict (or None)."""
+    cmd = [ffprobe, "-v", "quiet", "-print_format", "json", "-select_streams", "v:0",
+           "-show_streams", "-show_format", "-show_entries", "packet=pts_time,flags",
+           "-read_intervals", f"%+#{GOP_SCAN_PACKETS}", path]
+    try:
+        data = json.loads(subprocess.run(cmd, capture_output=True, text=True).stdout)
+        v = next(s for s in data["streams"] if s["codec_type"] == "video")
+    except: return None
+    rate = next((r for r in (v.get("avg_frame_rate"), v.get("r_frame_rate")) if _rate(r)), None)
+    fps = _rate(rate)
+    meta = {
+        "w":        v["width"],
+        "h":        v["height"],
+        "dur":      float(data["format"].get("duration", 0) or v.get("duration", 0) or 0),
+        "fps":      round(fps, 4),
+        "fps_rate": rate,          # Exact rational ("30000/1001") for ffmpeg -r; fps is rounded
+        "codec":    v.get("codec_name", ""),
+        "pix_fmt":  v.get("pix_fmt", ""),
+        "rotation": _rotation(v),
+        "nb_frames": int(v.get("nb_frames", 0) or 0),
+    }
+    meta["keyframe_interval"], meta["keyframe_interval_min"] = _keyframe_interval(data.get("packets", []))
+    return meta
+
+def run_keyframe_scan(path, ffprobe="ffprobe"):
+    """Sorted keyframe timestamps (seconds) of the first video stream, from packet flags only.
+    Times count from the file's start_time, as input -ss does (MPEG-TS / .mov often start > 0)."""
+    cmd = [ffprobe, "-v", "quiet", "-select_streams", "v:0", "-show_entries",
+           "packet=pts_time,flags:format=start_time", "-of", "csv", path]
+    try: out = subprocess.run(cmd, capture_output=True, text=True).stdout
+    except OSError: return None
+    kf, start = [], 0.0
+    for line in out.splitlines():
+        section, _, rest = line.partition(",")
+        if section == "format":
+            try: start = float(rest)
+            except ValueError: pass
+            continue
+        pts, _, flags = rest.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            try: kf.append(float(pts))
+            except ValueError: pass
+    return sorted(round(t - start, 6) for t in kf) or None
+
+def nearest_keyframe(keyframes, t, before=False):
+    """Keyframe closest to `t`; with before=True, the last keyframe at or before `t`."""
+    if not keyframes: return None
+    i = bisect.bisect_right(keyframes, t)
+    prev = keyframes[i-1] if i > 0 else keyframes[0]
+    if before or i >= len(keyframes): return prev
+    nxt = keyframes[i]
+    return prev if t - prev <= nxt - t else nxt
+
+class ProbeCache:
+    def __init__(self, db_path=CACHE_FILE, ffprobe="ffprobe", max_memory=512):
+        self.db_path    = db_path
+        self.ffprobe    = ffprobe
+        self.max_memory = max_memory
+        self._lru  = OrderedDict()
+        self._lock = threading.Lock()
+        self._db   = None
+
+    # ─── Storage ──────────────────────────────────────────────────────────────
+    def _conn(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS probe (
+                path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, version INTEGER, meta TEXT)""")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS keyframes (
+                path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, times TEXT)""")
+            self._db.commit()
+        return self._db
+
+    @staticmethod
+    def key(path):
+        """(abspath, size, mtime_ns) — any edit to the file invalidates its entry."""
+        ap = os.path.abspath(path)
+        st = os.stat(ap)
+        return ap, st.st_size, st.st_mtime_ns
+
+    def _remember(self, key, meta):
+        self._lru[key] = meta
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_memory:
+            self._lru.popitem(last=False)
+
+    def lookup(self, path):
+        """Return cached metadata without probing, or None on a miss."""
+        try: key = self.key(path)
+        except OSError: return None
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                return dict(self._lru[key])
+            row = self._conn().execute("SELECT size, mtime, version, meta FROM probe WHERE path=?",
+                                       (key[0],)).fetchone()
+            if row and (row[0], row[1], row[2]) == (key[1], key[2], SCHEMA_VERSION):
+                meta = json.loads(row[3])
+                self._remember(key, meta)
+                return dict(meta)
+        return None
+
+    def store(self, path, meta):
+        key = self.key(path)
+        with self._lock:
+            self._remember(key, meta)
+            db = self._conn()
+            db.execute("INSERT OR REPLACE INTO probe VALUES (?,?,?,?,?)",
+                       (key[0], key[1], key[2], SCHEMA_VERSION, json.dumps(meta)))
+            db.commit()
+
+    # ─── Probing ──────────────────────────────────────────────────────────────
+    def probe(self, path):
+        meta = self.lookup(path)
+        if meta is not None: return meta
+        meta = run_ffprobe(path, self.ffprobe)
+        if meta is None: return None
+        try: self.store(path, meta)
+        except OSError: pass
+        return dict(meta)     # The LRU keeps its own copy, as on a hit
+
+    def probe_many(self, paths_or_dir, workers=8):
+        """Fill the cache for a list of files (or every video in a directory) with
+        concurrent ffprobe calls. Returns {path: meta or None}."""
+        if isinstance(paths_or_dir, str) and os.path.isdir(paths_or_dir):
+            d = paths_or_dir
+            paths = sorted(os.path.join(d, f) for f in os.listdir(d) if f.lower().endswith(VIDEO_EXTS))
+        else:
+            paths = list(paths_or_dir)
+        results = {}
+        misses = []
+        for p in paths:
+            meta = self.lookup(p)
+            if meta is None: misses.append(p)
+            else: results[p] = meta
+        if misses:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                for p, meta in zip(misses, pool.map(lambda p: run_ffprobe(p, self.ffprobe), misses)):
+                    results[p] = meta
+                    if meta is not None:
+                        try: self.store(p, meta)
+                        except OSError: pass
+        return results
+
+    def keyframes(self, path, scan=True):
+        """Cached keyframe index for `path`, building it with one ffprobe packet scan on a miss
+        (with scan=False a miss just returns None)."""
+        try: key = self.key(path)
+        except OSError: return None
+        kkey = ("kf",) + key
+        with self._lock:
+            if kkey in self._lru:
+                self._lru.move_to_end(kkey)
+                return self._lru[kkey]
+            row = self._conn().execute("SELECT size, mtime, times FROM keyframes WHERE path=?",
+                                       (key[0],)).fetchone()
+            if row and (row[0], row[1]) == key[1:]:
+                doc = json.loads(row[2])
+                if isinstance(doc, dict) and doc.get("version") == KEYFRAME_VERSION:
+                    self._remember(kkey, doc["times"])
+                    return doc["times"]
+        if not scan: return None
+        times = run_keyframe_scan(path, self.ffprobe)
+        if times:
+            with self._lock:
+                self._remember(kkey, times)
+                db = self._conn()
+                db.execute("INSERT OR REPLACE INTO keyframes VALUES (?,?,?,?)",
+                           (key[0], key[1], key[2], json.dumps({"version": KEYFRAME_VERSION, "times": times})))
+                db.commit()
+            # The probe's short packet scan may have missed the interval; the full index has it
+            meta = self.lookup(path)
+            if meta is not None and meta.get("keyframe_interval") is None and _median_gap(times) is not None:
+                meta.update(keyframe_interval=_median_gap(times), keyframe_interval_min=None)
+                try: self.store(path, meta)
+                except OSError: pass
+        return times
+
+    def clear_memory(self):
+        with self._lock:
+            self._lru.clear()
@@ -0,0 +1,95 @@
+"""
+RenderCache — Content-Addressed Panel Cache
+Every rendered panel is stored under the hash of everything that went into drawing it
+(scene fields, style, panel index, renderer version). Regenerating a script only draws
+scenes whose hash is new; the rest are copied out of the cache. Files live in a
+two-level fan-out directory, capped in total size with least-recently-used eviction
+(file mtime is the recency stamp, refreshed on every hit).
+"""
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+CACHE_DIR = "render_cache"
+SCENE_FIELDS = ("header", "location", "time_of_day", "setting", "dialogue", "action",
+                "shot_type", "camera_movement", "lighting")
+
+def scene_key(scene, style, idx, version):
+    """Stable hex digest of a scene's render inputs."""
+    doc = {f: getattr(scene, f, None) for f in SCENE_FIELDS}
+    doc.update(style=style, idx=idx, version=version)
+    blob = json.dumps(doc, sort_keys=True, ensure_ascii=False, default=list)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+class RenderCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=512 * 2**20, ext=".png"):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ext = ext
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.nbytes = sum(os.path.getsize(p) for p, _ in self._entries())
+        self.hits = self.misses = 0
+
+    def _entries(self):
+        for d in os.scandir(self.root):
+            if not d.is_dir(): continue
+            for f in os.scandir(d.path):
+                if f.name.endswith(self.ext): yield f.path, f.stat().st_mtime
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key + self.ext)
+
+    def get(self, key):
+        """Cached file path for `key` (its recency refreshed), or None."""
+        p = self.path(key)
+        try:
+            os.utime(p)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return p
+
+    def put(self, key, src):
+        """Copy the rendered file `src` into the cache under `key`; returns the cached path."""
+        return self._store(key, lambda tmp: shutil.copyfile(src, tmp))
+
+    def put_bytes(self, key, data):
+        """Store an encoded panel under `key` (as written, not re-read from a shared path)."""
+        def write(tmp):
+            with open(tmp, "wb") as f: f.write(data)
+        return self._store(key, write)
+
+    def _store(self, key, write):
+        p = self.path(key)
+        if os.path.exists(p):
+            os.utime(p)
+            return p
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = f"{p}.{threading.get_ident()}.tmp"
+        write(tmp)
+        os.replace(tmp, p)                   # Atomic: readers never see a half-written panel
+        with self._lock:
+            self.nbytes += os.path.getsize(p)
+            if self.nbytes > self.max_bytes: self._evict()
+        return p
+
+    def _evict(self):
+        # Oldest first until we are back under 90% of the cap (so we don't evict on every put)
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        self.nbytes = sum(os.path.getsize(p) for p, _ in entries)
+        for p, _ in entries:
+            if self.nbytes <= self.max_bytes * 0.9: break
+            try:
+                size = os.path.getsize(p)
+                os.remove(p)
+                self.nbytes -= size
+            except OSError: pass
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+        self.nbytes = 0
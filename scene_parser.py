@@ -1,6 +1,14 @@
 import re
+import bisect
+from itertools import chain
+
+from keyword_rules import KeywordRules
 
 class Scene:
+    FIELDS = ("header", "location", "time_of_day", "setting", "dialogue", "action",
+              "shot_type", "camera_movement", "lighting")
+    __slots__ = FIELDS
+
     def __init__(self, header, location, time_of_day, setting, dialogue="", action=""):
         self.header       = header
         self.location     = location
@@ -12,136 +20,276 @@ class Scene:
         self.camera_movement = "STATIC"
         self.lighting     = "NATURAL"
 
+    def row(self):
+        """All fields as one hashable tuple (in FIELDS order)."""
+        return (self.header, self.location, self.time_of_day, self.setting,
+                tuple(tuple(d) for d in self.dialogue), self.action,
+                self.shot_type, self.camera_movement, self.lighting)
+
+    @classmethod
+    def from_row(cls, row):
+        sc = cls.__new__(cls)
+        (sc.header, sc.location, sc.time_of_day, sc.setting, dialogue, sc.action,
+         sc.shot_type, sc.camera_movement, sc.lighting) = row
+        sc.dialogue = [tuple(d) for d in dialogue]
+        return sc
+
+    def __reduce__(self):
+        # Pickles as one flat tuple — cheap to ship to worker processes
+        return Scene.from_row, (self.row(),)
+
+    def __eq__(self, other):
+        return isinstance(other, Scene) and self.row() == other.row()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Scene({self.header!r}, {len(self.dialogue)} lines)"
+
+# ─── Tokens ───────────────────────────────────────────────────────────────────
+HEADER, CHARACTER, PARENTHETICAL, DIALOGUE, ACTION, TRANSITION, BLANK = (
+    "header", "character", "parenthetical", "dialogue", "action", "transition", "blank")
+
+class Token:
+    """One classified script line: `kind`, stripped `text`, 0-based `line` number.
+    Character cues carry the bare `name` and any `extension` such as "(V.O.)"."""
+    __slots__ = ("kind", "text", "line", "name", "extension")
+    def __init__(self, kind, text, line, name=None, extension=None):
+        self.kind, self.text, self.line = kind, text, line
+        self.name, self.extension = name, extension
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.text!r}, line={self.line})"
+
 class ScriptParser:
     # Matches SCENE / INT. / EXT. / ACT / SHOT header lines
-    HEADER_RE = re.compile(r'^(INT\.|EXT\.|SCENE|ACT|SHOT)\b.*$', re.MULTILINE | re.IGNORECASE)
-    # Matches dialogue blocks: ALL-CAPS character name followed by a line of speech
-    DIALOGUE_RE = re.compile(r'^([A-Z][A-Z\s\.\-\']+?)(?:\s*\(.*?\))?\s*\n(.*?)(?=\n[A-Z]|\Z)', re.MULTILINE | re.DOTALL)
+    HEADER_RE = re.compile(r'^(INT\.|EXT\.|(SCENE|ACT|SHOT)\b).*$', re.MULTILINE | re.IGNORECASE)
+    HEADER_START = set("IiEeSsAa")   # First letters HEADER_RE can match — skips the regex for most lines
+    # Character cue: an ALL-CAPS name of up to 5 words (not ending like a sentence) + optional (V.O.)-style extension
+    CUE_RE = re.compile(r"^([A-Z0-9][A-Z0-9 .'&\-]*?[A-Z0-9'])(?:\s*(\(.*\)))?$")
+    # Transitions: CUT TO: / SMASH CUT TO: / FADE OUT. / DISSOLVE TO: ...
+    TRANSITION_RE = re.compile(r"^(?:(?:SMASH |MATCH |JUMP )?CUT\b|FADE\b|DISSOLVE\b|WIPE\b|IRIS\b|.*\bTO:$)")
 
     @staticmethod
     def parse_text(text):
-        lines      = text.split('\n')
-        scenes     = []
-        current    = None
-        buf        = []
+        return list(ScriptParser.parse_stream(text.split('\n')))
 
-        for line in lines:
-            ls = line.strip()
-            if not ls:
-                buf.append("")
+    @staticmethod
+    def tokenize(lines):
+        """
+        Classify every line exactly once (one line of lookahead, no backtracking) into a
+        Token stream: header, character, parenthetical, dialogue, action, transition, blank.
+        A character cue must be directly followed by a non-blank, non-header line; lines
+        after a cue are dialogue/parentheticals until the next blank line.
+        """
+        for n, (kind, text, name, ext) in enumerate(ScriptParser._lex(lines, True)):
+            yield Token(kind, text, n, name, ext)
+
+    @staticmethod
+    def _lex(lines, blanks=False):
+        # The lexer proper, as plain tuples (kind, text, name, extension) — parse_stream's hot loop
+        header, cue, trans = ScriptParser.HEADER_RE.match, ScriptParser.CUE_RE.match, ScriptParser.TRANSITION_RE.match
+        starts = ScriptParser.HEADER_START
+        in_dialogue = False
+        ls = None
+        for nxt in chain(lines, (None,)):          # Classify `ls` once its successor `nxt` is known
+            if nxt is not None: nxt = nxt.strip()
+            if ls is None:
+                ls = nxt
                 continue
+            if not ls:
+                in_dialogue = False
+                if blanks: yield BLANK, ls, None, None
+            elif ls[0] in starts and header(ls):
+                in_dialogue = False
+                yield HEADER, ls, None, None
+            elif ls.isupper():
+                m = cue(ls) if len(ls.split()) <= 5 else None
+                if trans(ls):
+                    in_dialogue = False
+                    yield TRANSITION, ls, None, None
+                elif m and nxt and not (nxt[0] in starts and header(nxt)):
+                    in_dialogue = True
+                    yield CHARACTER, ls, m.group(1), m.group(2)
+                else:
+                    yield (DIALOGUE if in_dialogue else ACTION), ls, None, None
+            elif in_dialogue:
+                yield (PARENTHETICAL if ls[0] == "(" and ls[-1] == ")" else DIALOGUE), ls, None, None
+            else:
+                yield ACTION, ls, None, None
+            ls = nxt
+
+    @staticmethod
+    def parse_stream(lines):
+        """
+        Yield each Scene as soon as the next header closes it. `lines` is any iterable of
+        lines — an open text file, a socket reader, a list — so memory stays bounded by the
+        largest single scene no matter how big the input is.
+        """
+        current    = None
+        body       = []
 
-            if ScriptParser.HEADER_RE.match(ls):
+        for tok in ScriptParser._lex(lines):
+            if tok[0] is HEADER:
                 # Save previous scene
                 if current:
-                    raw = "\n".join(buf).strip()
-                    current.action   = ScriptParser._extract_action(raw)
-                    current.dialogue = ScriptParser._extract_dialogue(raw)
-                    ScriptParser._enrich_scene(current)
-                    scenes.append(current)
-                    buf = []
-
-                # Parse header
-                upper = ls.upper()
-                setting = "EXT." if "EXT." in upper else ("INT." if "INT." in upper else "UNKNOWN")
-                parts   = re.split(r'[-–—:]', ls, 1)
-                loc     = parts[0].strip()
-                tod     = parts[1].strip() if len(parts) > 1 else "DAY"
-                current = Scene(ls, loc, tod, setting)
+                    yield ScriptParser._finish_scene(current, body)
+                body = []
+                current = ScriptParser._header_scene(tok[1])
             else:
-                if current:
-                    buf.append(ls)
-                else:
+                if not current:
                     current = Scene("PROLOGUE", "UNKNOWN", "DAY", "UNKNOWN")
-                    buf.append(ls)
+                body.append(tok)
 
         if current:
-            raw = "\n".join(buf).strip()
-            current.action   = ScriptParser._extract_action(raw)
-            current.dialogue = ScriptParser._extract_dialogue(raw)
-            ScriptParser._enrich_scene(current)
-            scenes.append(current)
+            yield ScriptParser._finish_scene(current, body)
 
-        return scenes
+    @staticmethod
+    def _header_scene(ls):
+        """Scene for a (stripped) header line."""
+        upper = ls.upper()
+        setting = "EXT." if "EXT." in upper else ("INT." if "INT." in upper else "UNKNOWN")
+        parts   = re.split(r'[-–—:]', ls, 1)
+        loc     = parts[0].strip()
+        tod     = parts[1].strip() if len(parts) > 1 else "DAY"
+        return Scene(ls, loc, tod, setting)
+
+    @staticmethod
+    def _finish_scene(scene, tokens):
+        """Fill action/dialogue/enrichment from the scene's body tokens (_lex tuples)."""
+        action, dialogue = [], []
+        speaker, speech = None, []
+        for kind, text, name, _ in tokens:
+            if kind is DIALOGUE:
+                speech.append(text)
+                continue
+            if kind is PARENTHETICAL: continue
+            if speaker and speech: dialogue.append((speaker, " ".join(speech)))
+            speaker, speech = (name, []) if kind is CHARACTER else (None, [])
+            if kind is ACTION: action.append(text)
+        if speaker and speech: dialogue.append((speaker, " ".join(speech)))
+        scene.action   = "\n".join(action)
+        scene.dialogue = dialogue
+        ScriptParser._enrich_scene(scene)
+        return scene
 
     @staticmethod
     def _extract_dialogue(text):
         """Extract (speaker, line) pairs from raw scene text."""
-        dialogues = []
-        lines = text.split('\n')
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            # A character name: ALL CAPS, short, not a direction
-            if (line.isupper() and 2 <= len(line.split()) <= 5
-                    and not any(line.startswith(k) for k in ["INT.", "EXT.", "CUT", "FADE", "DISSOLVE"])):
-                speaker = line
-                # Collect speech lines until blank or next cap name
-                speech_lines = []
-                i += 1
-                while i < len(lines):
-                    sl = lines[i].strip()
-                    if not sl:
-                        i += 1
-                        break
-                    # Parenthetical direction — skip
-                    if sl.startswith("(") and sl.endswith(")"):
-                        i += 1
-                        continue
-                    # Next character name → stop
-                    if sl.isupper() and 2 <= len(sl.split()) <= 5:
-                        break
-                    speech_lines.append(sl)
-                    i += 1
-                if speech_lines:
-                    dialogues.append((speaker, " ".join(speech_lines)))
-            else:
-                i += 1
-        return dialogues
+        return ScriptParser._finish_scene(Scene("", "", "", ""), ScriptParser._lex(text.split('\n'))).dialogue
 
     @staticmethod
     def _extract_action(text):
         """Return only the action/description lines (non-dialogue)."""
-        lines  = text.split('\n')
-        action = []
-        skip_next = False
-        for line in lines:
-            ls = line.strip()
-            if not ls:
-                continue
-            # Skip dialogue character names and their lines
-            if ls.isupper() and 2 <= len(ls.split()) <= 5:
-                skip_next = True
-                continue
-            if skip_next and (ls.startswith('"') or ls[0].islower() or ls.startswith("(")):
-                continue
-            skip_next = False
-            action.append(ls)
-        return "\n".join(action)
+        return ScriptParser._finish_scene(Scene("", "", "", ""), ScriptParser._lex(text.split('\n'))).action
 
     @staticmethod
     def _enrich_scene(scene):
         text = (scene.header + " " + scene.action).upper()
+        # Shot type / camera / lighting — one scan with the compiled vocabulary
+        for field, label in ScriptParser.rules().classify(text).items():
+            if field in Scene.FIELDS: setattr(scene, field, label)
+
+    _rules = None
+
+    @staticmethod
+    def rules():
+        """The compiled keyword rules (vocabulary.json, loaded once)."""
+        if ScriptParser._rules is None:
+            ScriptParser._rules = KeywordRules.load()
+        return ScriptParser._rules
+
+    @staticmethod
+    def set_vocabulary(path):
+        """Recompile the enrichment rules from another vocabulary file."""
+        ScriptParser._rules = KeywordRules.load(path)
+
+# ─── Incremental Parsing ──────────────────────────────────────────────────────
+def edit_range(old, new):
+    """(start, old_end, new_end) of the single span that differs between two texts."""
+    n = min(len(old), len(new))
+    lo, hi = 0, n                                  # Longest common prefix (binary search, C-speed compares)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[:mid] == new[:mid]: lo = mid
+        else: hi = mid - 1
+    start = lo
+    lo, hi = 0, n - start                          # Longest common suffix not overlapping the prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[len(old)-mid:] == new[len(new)-mid:]: lo = mid
+        else: hi = mid - 1
+    return start, len(old) - lo, len(new) - lo
+
+class IncrementalParser:
+    """
+    Live parse of one document. Keeps a scene-boundary offset index (the character offset
+    where each block starts: offset 0, then every header line) so an edit only re-parses
+    the blocks it touches. `scenes` always equals ScriptParser.parse_text(text).
+    """
+    def __init__(self, text=""):
+        self.text = ""
+        self.starts = []      # Block start offsets, ascending
+        self.blocks = []      # Scene per block (None for a blank lead-in before the first header)
+        self.scenes = []
+        self.set_text(text)
+
+    def set_text(self, text):
+        """Full parse; returns every scene index as changed."""
+        self.text = text
+        self.starts, self.blocks = self._parse_region(0, len(text))
+        self.scenes = [b for b in self.blocks if b is not None]
+        return list(range(len(self.scenes)))
+
+    def _parse_region(self, lo, hi):
+        """Blocks of text[lo:hi]; `lo` is a block start, `hi` a block start or the end of text."""
+        starts, pos = [lo], lo
+        text = self.text
+        while pos < hi:
+            nl = text.find("\n", pos, hi)
+            end = hi if nl < 0 else nl + 1
+            if pos > lo and ScriptParser.HEADER_RE.match(text[pos:end].strip()):
+                starts.append(pos)
+            pos = end
+        return starts, [self._parse_block(text[a:b]) for a, b in zip(starts, starts[1:] + [hi])]
+
+    @staticmethod
+    def _parse_block(block):
+        return next(ScriptParser.parse_stream(block.split("\n")), None)
+
+    def update(self, start, end, new_text):
+        """
+        Replace text[start:end] with `new_text` and re-parse only the affected blocks.
+        Returns the indices (in the new `scenes`) whose content changed; when scenes were
+        inserted or removed, `last_splice` = (first scene index, old count, new count).
+        """
+        delta = len(new_text) - (end - start)
+        # The block holding `start` plus the one before it (the edit may un-make its header
+        # and merge the two), through the block holding `end`
+        bi = max(0, bisect.bisect_right(self.starts, start) - 2)
+        bj = bisect.bisect_right(self.starts, end)
+        old_hi = self.starts[bj] if bj < len(self.starts) else len(self.text)
+        self.text = self.text[:start] + new_text + self.text[end:]
+        starts, blocks = self._parse_region(self.starts[bi], old_hi + delta)
+
+        old = [b for b in self.blocks[bi:bj] if b is not None]
+        first = sum(1 for b in self.blocks[:bi] if b is not None)
+        new = [b for b in blocks if b is not None]
+        self.starts[bi:bj] = starts
+        self.blocks[bi:bj] = blocks
+        for k in range(bi + len(starts), len(self.starts)):
+            self.starts[k] += delta
+        self.scenes[first:first + len(old)] = new
+        self.last_splice = (first, len(old), len(new))
+
+        changed = [first + k for k, sc in enumerate(new)
+                   if k >= len(old) or sc.row() != old[k].row()]
+        if len(new) != len(old):                      # Everything after shifted to a new number
+            changed += range(first + len(new), len(self.scenes))
+        return changed
 
-        # Shot type
-        if any(w in text for w in ["CLOSE UP", "CLOSE-UP", " CU ", "PORTRAIT"]):
-            scene.shot_type = "CLOSE UP"
-        elif any(w in text for w in ["WIDE", "ESTABLISHING", "SKYLINE", "AERIAL", "BIRD"]):
-            scene.shot_type = "WIDE SHOT"
-        else:
-            scene.shot_type = "MEDIUM SHOT"
-
-        # Camera
-        if "PAN"    in text: scene.camera_movement = "PAN"
-        elif "TILT" in text: scene.camera_movement = "TILT"
-        elif any(w in text for w in ["TRACK", "FOLLOW", "DOLLY"]): scene.camera_movement = "TRACKING"
-
-        # Lighting
-        if any(w in text for w in ["NIGHT", "DARK", "BURNING", "FIRE", "TORCH"]):
-            scene.lighting = "DRAMATIC"
-        elif any(w in text for w in ["SUNSET", "DUSK", "GOLDEN"]):
-            scene.lighting = "GOLDEN HOUR"
-        elif any(w in text for w in ["GRAY", "ASH", "OVERCAST", "STORM"]):
-            scene.lighting = "OVERCAST"
-        elif any(w in text for w in ["FLASH", "NUCLEAR", "BLAST", "EXPLOSION"]):
-            scene.lighting = "EXTREME BACKLIGHT"
+    def replace(self, text):
+        """Diff `text` against the current document and apply it as one edit."""
+        start, old_end, new_end = edit_range(self.text, text)
+        if start == old_end == new_end and len(text) == len(self.text): return []
+        return self.update(start, old_end, text[start:new_end])
@@ -0,0 +1,193 @@
+"""
+SceneStore — Columnar Scene Table & Serialization
+SceneTable keeps a parsed script as one list per field (dialogue flattened into speaker /
+line columns plus per-scene offsets) instead of one object per scene, and round-trips
+through JSON Lines (readable, streamable) or a compact binary format (struct header +
+zlib-compressed length-prefixed string columns). Parse results are cached on disk by
+script hash so an unchanged script is never parsed twice.
+"""
+import os
+import sys
+import json
+import zlib
+import struct
+import hashlib
+from array import array
+
+from scene_parser import Scene, ScriptParser
+
+MAGIC = b"SCNT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHI")     # magic, format version, scene count
+COLUMN = struct.Struct("<II")       # string count, utf-8 byte length
+CACHE_DIR = "parse_cache"
+CACHE_ENTRIES = 64                  # Newest parsed scripts kept on disk
+_U32 = "I" if array("I").itemsize == 4 else "L"
+
+class SceneTable:
+    STR_FIELDS = tuple(f for f in Scene.FIELDS if f != "dialogue")
+
+    def __init__(self):
+        self.columns = {f: [] for f in self.STR_FIELDS}
+        self.speakers, self.lines = [], []      # All dialogue, scene after scene
+        self.offsets = array(_U32, [0])         # Scene i's dialogue is [offsets[i], offsets[i+1])
+
+    @classmethod
+    def from_scenes(cls, scenes):
+        table = cls()
+        for sc in scenes: table.append(sc)
+        return table
+
+    def append(self, scene):
+        for f, col in self.columns.items():
+            col.append(getattr(scene, f))
+        for speaker, line in scene.dialogue:
+            self.speakers.append(speaker)
+            self.lines.append(line)
+        self.offsets.append(len(self.lines))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0: i += len(self)
+        if not 0 <= i < len(self): raise IndexError(i)
+        c = self.columns
+        a, b = self.offsets[i], self.offsets[i + 1]
+        return Scene.from_row((c["header"][i], c["location"][i], c["time_of_day"][i], c["setting"][i],
+                               zip(self.speakers[a:b], self.lines[a:b]), c["action"][i],
+                               c["shot_type"][i], c["camera_movement"][i], c["lighting"][i]))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def column(self, name):
+        """One field for every scene, e.g. column("lighting")."""
+        return self.columns[name]
+
+    # ─── JSON Lines ───────────────────────────────────────────────────────────
+    def save_jsonl(self, path):
+        _atomic_write(path, "".join(json.dumps(_scene_doc(sc), ensure_ascii=False) + "\n"
+                                    for sc in self).encode("utf-8"))
+
+    @classmethod
+    def load_jsonl(cls, path):
+        return cls.from_scenes(iter_jsonl(path))
+
+    # ─── Binary ───────────────────────────────────────────────────────────────
+    def to_bytes(self, level=1):
+        parts = [_pack_strings(self.columns[f]) for f in self.STR_FIELDS]
+        parts += [_pack_strings(self.speakers), _pack_strings(self.lines), _le(self.offsets).tobytes()]
+        return HEADER.pack(MAGIC, FORMAT_VERSION, len(self)) + zlib.compress(b"".join(parts), level)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, n = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a scene table (format {magic!r} v{version})")
+        body = zlib.decompress(memoryview(data)[HEADER.size:])
+        table, pos = cls(), 0
+        for f in cls.STR_FIELDS:
+            table.columns[f], pos = _unpack_strings(body, pos)
+        table.speakers, pos = _unpack_strings(body, pos)
+        table.lines, pos = _unpack_strings(body, pos)
+        offsets = array(_U32)
+        offsets.frombytes(body[pos:pos + 4 * (n + 1)])
+        table.offsets = _le(offsets)
+        if len(table) != n or any(len(c) != n for c in table.columns.values()):
+            raise ValueError("Truncated scene table")
+        return table
+
+    def save(self, path):
+        _atomic_write(path, self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+# ─── Helpers ──────────────────────────────────────────────────────────────────
+def _le(arr):
+    """The array in little-endian byte order (a copy on big-endian hosts)."""
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr
+
+def _pack_strings(strings):
+    # Character lengths + one utf-8 blob: decoding is a single decode and a slice per string
+    blob = "".join(strings).encode("utf-8", "surrogatepass")
+    lengths = _le(array(_U32, map(len, strings)))
+    return COLUMN.pack(len(strings), len(blob)) + lengths.tobytes() + blob
+
+def _unpack_strings(body, pos):
+    n, nbytes = COLUMN.unpack_from(body, pos)
+    pos += COLUMN.size
+    lengths = array(_U32)
+    lengths.frombytes(body[pos:pos + 4 * n])
+    pos += 4 * n
+    text = body[pos:pos + nbytes].decode("utf-8", "surrogatepass")
+    out, start = [], 0
+    for k in _le(lengths):
+        out.append(text[start:start + k])
+        start += k
+    return out, pos + nbytes
+
+def _scene_doc(scene):
+    doc = {f: getattr(scene, f) for f in Scene.FIELDS}
+    doc["dialogue"] = [list(d) for d in scene.dialogue]
+    return doc
+
+def iter_jsonl(path):
+    """Scenes from a JSON Lines file, one at a time."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                doc = json.loads(line)
+                yield Scene.from_row(tuple(doc.get(f, "") for f in Scene.FIELDS))
+
+def _atomic_write(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+# ─── Parse Cache ──────────────────────────────────────────────────────────────
+def parse_key(text):
+    """Hash of everything that decides the parse: script text, vocabulary, format."""
+    vocab = json.dumps(ScriptParser.rules().vocabulary, sort_keys=True)
+    h = hashlib.sha1(f"{FORMAT_VERSION}\0{vocab}\0".encode("utf-8"))
+    h.update(text.encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+def parse_cached(text, root=CACHE_DIR):
+    """
+    Scenes of `text`, streamed. An unchanged script is loaded from its cached table;
+    otherwise it is parsed with ScriptParser.parse_stream and the table is saved once
+    the stream has been fully consumed.
+    """
+    path = os.path.join(root, parse_key(text) + ".scn")
+    try:
+        table = SceneTable.load(path)
+        os.utime(path)
+    except (OSError, ValueError, zlib.error, struct.error):
+        table = None
+    if table is not None:
+        yield from table
+        return
+    table = SceneTable()
+    for sc in ScriptParser.parse_stream(text.split("\n")):
+        table.append(sc)
+        yield sc
+    try:
+        table.save(path)
+        _trim(root)
+    except OSError as e:
+        print(f"[Parse] Cache write skipped: {e}")
+
+def _trim(root):
+    entries = sorted((e.stat().st_mtime, e.path) for e in os.scandir(root) if e.name.endswith(".scn"))
+    for _, p in entries[:-CACHE_ENTRIES]:
+        try: os.remove(p)
+        except OSError: pass
@@ -2,15 +2,28 @@ from scene_parser import ScriptParser
 from vector_renderer import VectorRenderer
 import os
 import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import vector_renderer
+from render_cache import RenderCache, scene_key
+from strip_sheet import StripSheet
+from scene_store import parse_cached, CACHE_DIR as PARSE_CACHE_DIR
 
 SETTINGS_FILE = "settings.json"
+PARALLEL_MIN_SCENES = 8   # Below this, process start-up costs more than it saves
 
 class StoryboardGenerator:
-    def __init__(self, output_dir="storyboard_export"):
+    def __init__(self, output_dir="storyboard_export", cache=None, parse_cache=None,
+                 panel_format="png", compress_level=6, quality=90, panels_per_sheet=None, sheet_tiles=False):
         self.output_dir = output_dir
         self.svg_dir = os.path.join(output_dir, "svg")
         os.makedirs(self.svg_dir, exist_ok=True)
-        self.renderer = VectorRenderer(self.svg_dir)
+        # Panel encoding: png (zlib level), webp (lossless, effort = level) or jpeg (quality)
+        self.renderer = VectorRenderer(self.svg_dir, panel_format, compress_level, quality)
+        self.cache = RenderCache(ext=self.renderer.ext) if cache is None else cache   # False disables the render cache
+        self.parse_cache = PARSE_CACHE_DIR if parse_cache is None else parse_cache   # Directory, or False
+        self.panels_per_sheet = panels_per_sheet   # None: one sheet for the whole board
+        self.sheet_tiles = sheet_tiles             # Also write a DeepZoom pyramid per sheet
+        self._sheet_keys = {}
         self.scenes = []
 
     def _get_api_key(self):
@@ -21,32 +34,125 @@ class StoryboardGenerator:
             except: pass
         return ""
 
-    def process_script(self, text, style, progress_callback=None):
+    def process_script(self, text, style, progress_callback=None, workers=None):
         """Parse script and generate storyboard panels using local high-fidelity renderer."""
-        self.scenes = ScriptParser.parse_text(text)
-        svg_paths, png_paths = [], []
+        # An unchanged script comes back from the parse cache instead of being re-parsed
+        if not self.parse_cache:
+            return self.process_stream(text.split("\n"), style, progress_callback, workers)
+        return self._process(parse_cached(text, self.parse_cache), style, progress_callback, workers)
 
-        for i, scene in enumerate(self.scenes):
-            if progress_callback:
-                progress_callback(i, len(self.scenes))
+    def process_stream(self, lines, style, progress_callback=None, workers=None):
+        """
+        Generate panels while the script is still being parsed: `lines` is any iterable of
+        script lines (e.g. an open file) and each scene is dispatched the moment its block
+        closes. Scenes whose render inputs are unchanged come straight from the render cache;
+        the rest render in a process pool (`workers`, default: CPU count; 1 = in-process).
+        Output order always follows the script; `progress_callback(done, total)` gets the
+        number of finished scenes out of those parsed so far.
+        """
+        return self._process(ScriptParser.parse_stream(lines), style, progress_callback, workers)
+
+    def _process(self, scenes, style, progress_callback, workers):
+        self.scenes, keys, svg_paths, png_paths = [], [], [], []
+        workers = workers or os.cpu_count() or 1
+        self.renderer.keep_panels = False          # Panels stay on disk; the strip sheet streams them back
+        pool, futs, waiting = None, set(), []
+        done = fed = 0
+        title = "AIVerseStudio — The Flash"
+        sheet = StripSheet(self.svg_dir, title, panels_per_sheet=self.panels_per_sheet,
+                           panel_size=(vector_renderer.CW, vector_renderer.CH), tiles=self.sheet_tiles,
+                           previous=self._sheet_keys, wait=self.renderer.flush)
 
-            print(f"[Renderer] Generating Local Sketch for Scene {i+1}...")
-            svg_path, png_path = self.renderer.render_scene(scene, style, i)
+        def feed():
+            # Finished panels go to the strip sheet in script order; full pages are written right
+            # away, and pages whose panels are all unchanged since the last build are skipped
+            nonlocal fed, sheet
+            while fed < len(png_paths) and png_paths[fed] is not None:
+                if sheet:
+                    try: sheet.add(self.renderer.panel_path(fed), keys[fed])
+                    except Exception as e:
+                        print(f"[Strip] Sheet build skipped: {e}")
+                        sheet = None
+                fed += 1
 
-            svg_paths.append(svg_path)
-            png_paths.append(png_path)
+        def finish(i, out):
+            nonlocal done
+            svg_paths[i], png_paths[i] = out
+            done += 1
+            if progress_callback:
+                progress_callback(done, len(self.scenes))
+            feed()
 
-        if progress_callback:
-            progress_callback(len(self.scenes), len(self.scenes))
+        def rendered(fut):
+            i, out, data = fut.result()
+            if self.cache: self.cache.put_bytes(keys[i], data)
+            finish(i, out)
+
+        def submit(i):
+            futs.add(pool.submit(vector_renderer._render_in_worker, (self.scenes[i], style, i)))
 
-        # Build the combined strip sheet
         try:
-            self.renderer.build_strip_sheet("AIVerseStudio — The Flash")
-        except Exception as e:
-            print(f"[Strip] Sheet build skipped: {e}")
+            for i, scene in enumerate(scenes):
+                self.scenes.append(scene); svg_paths.append(None); png_paths.append(None)
+                keys.append(scene_key(scene, style, i, self.renderer.cache_tag))
+                hit = self.cache.get(keys[i]) if self.cache else None
+                # A copy instead of a render (None: evicted meanwhile, render it after all)
+                out = self.renderer.emit_cached(hit, i, self.scenes[i]) if hit else None
+                if out:
+                    finish(i, out)
+                elif pool:
+                    submit(i)
+                elif workers > 1:
+                    # Small scripts stay in-process; the pool starts once enough misses queue up
+                    waiting.append(i)
+                    if len(waiting) >= PARALLEL_MIN_SCENES:
+                        print(f"[Renderer] Generating Local Sketches on {workers} processes...")
+                        pool = ProcessPoolExecutor(max_workers=workers, initializer=vector_renderer._init_worker,
+                                                   initargs=(self.svg_dir, self.renderer.options))
+                        for k in waiting: submit(k)
+                        waiting = []
+                else:
+                    waiting.append(i)
+                # Collect whatever finished meanwhile, so progress moves while parsing continues
+                for fut in [f for f in futs if f.done()]:
+                    futs.discard(fut)
+                    rendered(fut)
+
+            for i in waiting:
+                print(f"[Renderer] Generating Local Sketch for Scene {i+1}...")
+                # Files are written on the renderer's writer pool; the cache takes them once written
+                finish(i, self.renderer.render_scene(self.scenes[i], style, i, self._cache_put(keys[i])))
+            for fut in as_completed(futs):
+                rendered(fut)
+            self.renderer.flush()
+        finally:
+            if pool: pool.shutdown(cancel_futures=True)
+
+        n = len(self.scenes)
+        if progress_callback and not n:
+            progress_callback(0, 0)
+        if sheet:
+            try:
+                sheet.close()
+                self._sheet_keys = sheet.keys
+            except Exception as e:
+                print(f"[Strip] Sheet build skipped: {e}")
 
         return self.scenes, svg_paths, png_paths
 
+    def render_one(self, scene, style, idx):
+        """Re-render a single scene (live preview); returns (svg_path, png_path). The files may
+        still be being written — renderer.card(idx) holds the image until they are."""
+        key = scene_key(scene, style, idx, self.renderer.cache_tag)
+        hit = self.cache.get(key) if self.cache else None
+        out = self.renderer.emit_cached(hit, idx, scene) if hit else None
+        if out: return out
+        return self.renderer.render_scene(scene, style, idx, self._cache_put(key))
+
+    def _cache_put(self, key):
+        if not self.cache: return None
+        return lambda data: self.cache.put_bytes(key, data)
+
     def get_scene_data(self, index):
         if 0 <= index < len(self.scenes):
             return self.scenes[index]
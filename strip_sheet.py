@@ -0,0 +1,220 @@
+"""
+StripSheet — Streamed Storyboard Sheets & DeepZoom Pyramids
+Panels are consumed one at a time, in script order, as paths or images. A sheet is never
+held whole: it is assembled one horizontal band (a title strip, then one row of panels)
+at a time and streamed straight into a PNG encoder, and optionally into a DeepZoom tile
+pyramid so very long boards can be browsed without decoding one giant image. With
+`panels_per_sheet` the board is split into pages, each written as soon as it fills up;
+pages whose panels are unchanged since the previous build are left alone.
+"""
+import os
+import math
+import zlib
+import shutil
+import struct
+import numpy as np
+from PIL import Image, ImageDraw
+
+import font_registry
+
+SHEET_NAME = "storyboard_sheet"
+TITLE_H = 120
+GAP = 40
+BG = (245, 245, 245)
+PNG_LEVEL = 6
+
+# ─── Streaming PNG ────────────────────────────────────────────────────────────
+def _chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+class PNGStream:
+    """8-bit RGB PNG written band by band; only the current band is ever in memory."""
+    def __init__(self, path, width, height, level=PNG_LEVEL):
+        self.path, self.width, self.height = path, width, height
+        self.rows = 0
+        self._tmp = path + ".tmp"
+        self._f = open(self._tmp, "wb")
+        self._f.write(b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        self._z = zlib.compressobj(level)
+
+    def write(self, band):
+        """Append rows: a (h, width, 3) uint8 array."""
+        h = band.shape[0]
+        flat = band.reshape(h, self.width * 3)
+        # "Sub" filter (each byte minus the same channel one pixel left) — flat artwork compresses well
+        rows = np.empty((h, self.width * 3 + 1), np.uint8)
+        rows[:, 0] = 1
+        rows[:, 1:4] = flat[:, :3]
+        np.subtract(flat[:, 3:], flat[:, :-3], out=rows[:, 4:])
+        data = self._z.compress(rows.tobytes())
+        if data: self._f.write(_chunk(b"IDAT", data))
+        self.rows += h
+
+    def close(self):
+        if self.rows != self.height:
+            self.abort()
+            raise ValueError(f"PNG got {self.rows} of {self.height} rows")
+        self._f.write(_chunk(b"IDAT", self._z.flush()) + _chunk(b"IEND", b""))
+        self._f.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._f.close()
+        try: os.remove(self._tmp)
+        except OSError: pass
+
+# ─── DeepZoom Pyramid ─────────────────────────────────────────────────────────
+def _half(rows):
+    """2x2 box downsample of an even number of rows (odd widths keep their last column)."""
+    if rows.shape[1] % 2: rows = np.concatenate([rows, rows[:, -1:]], axis=1)
+    r = rows.astype(np.uint16)
+    s = r[0::2, 0::2] + r[1::2, 0::2] + r[0::2, 1::2] + r[1::2, 1::2]
+    return ((s + 2) >> 2).astype(np.uint8)
+
+class _TileLevel:
+    # One pyramid level: buffers just enough rows to cut the next row of tiles, and feeds
+    # half-resolution rows to the level below
+    def __init__(self, dz, level, width, height):
+        self.dz, self.level, self.width, self.height = dz, level, width, height
+        self.buf = np.empty((0, width, 3), np.uint8)
+        self.y0 = 0                # Image row of buf[0]
+        self.tile_row = 0
+        self.carry = None          # Odd row waiting for its pair
+        self.below = _TileLevel(dz, level - 1, (width + 1) // 2, (height + 1) // 2) if level else None
+        os.makedirs(os.path.join(dz.files_dir, str(level)), exist_ok=True)
+
+    def push(self, rows):
+        self.buf = np.concatenate([self.buf, rows])
+        self._cut()
+        if self.below is None: return
+        if self.carry is not None: rows = np.concatenate([self.carry, rows])
+        self.carry = rows[-1:] if len(rows) % 2 else None
+        if len(rows) >= 2: self.below.push(_half(rows[:len(rows) // 2 * 2]))
+
+    def _cut(self):
+        ts, ov = self.dz.tile_size, self.dz.overlap
+        while self.tile_row * ts < self.height:
+            top = max(0, self.tile_row * ts - ov)
+            bottom = min(self.height, (self.tile_row + 1) * ts + ov)
+            if self.y0 + len(self.buf) < bottom: return
+            strip = self.buf[top - self.y0:bottom - self.y0]
+            for col in range(math.ceil(self.width / ts)):
+                left, right = max(0, col * ts - ov), min(self.width, (col + 1) * ts + ov)
+                self.dz.save_tile(self.level, col, self.tile_row, strip[:, left:right])
+            self.tile_row += 1
+            drop = self.tile_row * ts - ov - self.y0
+            if drop > 0:
+                self.buf = self.buf[drop:]
+                self.y0 += drop
+
+    def close(self):
+        if self.below is None: return
+        if self.carry is not None: self.below.push(_half(np.concatenate([self.carry, self.carry])))
+        self.below.close()
+
+class DeepZoomWriter:
+    """DeepZoom (.dzi + _files/) tile pyramid built from rows streamed top to bottom."""
+    def __init__(self, base, width, height, tile_size=254, overlap=1, fmt="jpg", quality=90):
+        self.base, self.width, self.height = base, width, height
+        self.tile_size, self.overlap, self.fmt, self.quality = tile_size, overlap, fmt, quality
+        self.files_dir = base + "_files"
+        shutil.rmtree(self.files_dir, ignore_errors=True)      # No stale tiles from a bigger sheet
+        self.max_level = math.ceil(math.log2(max(width, height, 1)))
+        self.top = _TileLevel(self, self.max_level, width, height)
+
+    def save_tile(self, level, col, row, pixels):
+        path = os.path.join(self.files_dir, str(level), f"{col}_{row}.{self.fmt}")
+        img = Image.fromarray(np.ascontiguousarray(pixels))
+        if self.fmt == "jpg": img.save(path, "JPEG", quality=self.quality)
+        else: img.save(path)
+
+    def write(self, band):
+        self.top.push(band)
+
+    def close(self):
+        self.top.close()
+        with open(self.base + ".dzi", "w") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    f'<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="{self.fmt}" '
+                    f'Overlap="{self.overlap}" TileSize="{self.tile_size}">'
+                    f'<Size Width="{self.width}" Height="{self.height}"/></Image>\n')
+
+# ─── Sheets ───────────────────────────────────────────────────────────────────
+class StripSheet:
+    """
+    Streams panels (in script order) into sheet PNGs of `cols` columns. With
+    `panels_per_sheet` each page is written as soon as it is full. `previous` maps page
+    number → key from an earlier build; pages whose key is unchanged are not rewritten.
+    `wait` is called before panel files are read (e.g. to let pending writes finish).
+    """
+    def __init__(self, out_dir, title, cols=2, panels_per_sheet=None, panel_size=(640, 840),
+                 tiles=False, previous=None, wait=None, name=SHEET_NAME):
+        self.out_dir, self.title, self.cols = out_dir, title, cols
+        self.per_page = panels_per_sheet
+        self.panel_w, self.panel_h = panel_size
+        self.tiles, self.previous, self.wait, self.name = tiles, previous or {}, wait, name
+        self.keys = {}             # Page number → key of what was written
+        self.pages = []            # Written sheet paths, in order
+        self._panels, self._keys = [], []
+
+    def page_path(self, n):
+        return os.path.join(self.out_dir, f"{self.name}.png" if n == 1 else f"{self.name}_{n}.png")
+
+    def add(self, panel, key=None):
+        """Queue one panel (a file path or a PIL image); writes the page once it is full."""
+        self._panels.append(panel)
+        self._keys.append(key if key is not None else (panel if isinstance(panel, str) else id(panel)))
+        if self.per_page and len(self._panels) >= self.per_page:
+            self._flush_page()
+
+    def close(self):
+        """Write the last (partial) page and remove stale pages of a longer earlier board."""
+        if self._panels: self._flush_page()
+        n = len(self.pages) + 1
+        while os.path.exists(self.page_path(n)):
+            base = self.page_path(n)[:-4]
+            os.remove(base + ".png")
+            if os.path.exists(base + ".dzi"): os.remove(base + ".dzi")
+            shutil.rmtree(base + "_files", ignore_errors=True)
+            n += 1
+        return self.pages
+
+    def _flush_page(self):
+        n = len(self.pages) + 1
+        panels, keys = self._panels, self._keys
+        self._panels, self._keys = [], []
+        path = self.page_path(n)
+        key = (self.title, self.cols, self.tiles, tuple(keys))
+        fresh = self.previous.get(n) == key and os.path.exists(path) and \
+            (not self.tiles or os.path.exists(path[:-4] + ".dzi"))
+        if not fresh:
+            if self.wait: self.wait()
+            self._write(path, panels, n)
+        self.keys[n] = key
+        self.pages.append(path)
+
+    def _write(self, path, panels, page):
+        cw, ch, cols = self.panel_w + GAP, self.panel_h + GAP, self.cols
+        rows = math.ceil(len(panels) / cols)
+        w, h = cw * cols, rows * ch + TITLE_H
+        sinks = [PNGStream(path, w, h)]
+        if self.tiles: sinks.append(DeepZoomWriter(path[:-4], w, h))
+        try:
+            band = Image.new("RGB", (w, TITLE_H), BG)
+            title = self.title if page == 1 else f"{self.title}  ·  {page}"
+            ImageDraw.Draw(band).text((40, 35), title, fill=(0, 0, 0), font=font_registry.font(38, True))
+            for s in sinks: s.write(np.asarray(band))
+            for r in range(rows):
+                band = Image.new("RGB", (w, ch), BG)
+                for c in range(min(cols, len(panels) - r * cols)):
+                    i = r * cols + c
+                    p, panels[i] = panels[i], None        # Released once it is on the band
+                    if isinstance(p, str):
+                        with Image.open(p) as im: band.paste(im, (40 + c * cw, 0))
+                    else:
+                        band.paste(p, (40 + c * cw, 0))
+                for s in sinks: s.write(np.asarray(band))
+        except BaseException:
+            sinks[0].abort()
+            raise
+        for s in sinks: s.close()
@@ -0,0 +1,39 @@
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+import frame_extractor as fe
+
+def test_choose_mode_weighs_seeks_against_a_full_decode():
+    long_clip = {"fps": 30, "dur": 600, "keyframe_interval": 2.0}
+    short_clip = {"fps": 30, "dur": 20, "keyframe_interval": 2.0}
+    assert fe.choose_mode(48, long_clip) == "seek"
+    assert fe.choose_mode(48, short_clip) == "select"
+    assert fe.choose_mode(4, short_clip) == "seek"
+    # An unmeasured GOP uses its known lower bound
+    assert fe.choose_mode(48, {"fps": 30, "dur": 600, "keyframe_interval_min": 30}) == "select"
+
+def test_even_timestamps():
+    assert fe.even_timestamps(10, 3, margin=1) == [1, 5, 9]
+    assert fe.even_timestamps(10, 1) == [5]
+
+FFMPEG = shutil.which("ffmpeg")
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg not installed")
+@pytest.mark.parametrize("mode", ["seek", "select"])
+def test_extract_frames_matches_single_grabs(tmp_path, mode):
+    cfr, clip = str(tmp_path / "cfr.mp4"), str(tmp_path / "vfr.mp4")
+    subprocess.run([FFMPEG, "-v", "error", "-f", "lavfi", "-i", "testsrc=size=160x120:rate=30", "-t", "20",
+                    "-g", "30", "-pix_fmt", "yuv420p", cfr], check=True)
+    # 10 s at 30 fps, then the frames spread out to 10 fps (variable frame rate, 30 s long)
+    subprocess.run([FFMPEG, "-v", "error", "-i", cfr, "-vf", "setpts='if(lt(T,10),PTS,PTS+(T-10)*2/TB)'",
+                    "-fps_mode", "vfr", "-g", "30", clip], check=True)
+    info = {"w": 160, "h": 120, "fps": 30, "dur": 30}
+    ts = fe.even_timestamps(29.5, 20)
+    frames = fe.extract_frames(clip, ts, (160, 120), info, FFMPEG, mode=mode, as_pil=False)
+    for t, f in zip(ts, frames):
+        ref = np.asarray(fe.grab_frame(clip, t, info, ffmpeg=FFMPEG))
+        assert f is not None and np.abs(f.astype(int) - ref).mean() < 3
+    assert fe.extract_frames(clip, [500], (160, 120), info, FFMPEG, mode=mode) == [None]
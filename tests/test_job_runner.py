@@ -0,0 +1,35 @@
+import threading
+import time
+from concurrent import futures
+
+from job_runner import JobRunner
+
+def test_done_callbacks_run_on_pump():
+    jr = JobRunner(workers=2)
+    got = []
+    job = jr.submit(lambda job, x: x * 2, 21, on_done=got.append)
+    job.result(5)
+    time.sleep(0.05)
+    assert got == [] and jr.pump() == 1 and got == [42]
+    jr.shutdown()
+
+def test_cancel_by_name():
+    jr = JobRunner(workers=1)
+    gate = threading.Event()
+    running = jr.submit(lambda job: gate.wait(5), name="live-panel")
+    queued = jr.submit(lambda job: None, name="live-panel")
+    other = jr.submit(lambda job: None, name="generate")
+    cancelled = jr.cancel("live-panel")
+    assert set(cancelled) == {running, queued} and queued.future.cancelled()
+    gate.set()
+    futures.wait([j.future for j in cancelled] + [other.future], timeout=5)
+    assert running.cancelled and jr.active() == []
+    jr.shutdown()
+
+def test_job_list_is_pruned():
+    jr = JobRunner(workers=4)
+    jobs = [jr.submit(lambda job: None) for _ in range(200)]
+    futures.wait([j.future for j in jobs], timeout=10)
+    time.sleep(0.05)
+    assert jr.jobs == []
+    jr.shutdown()
@@ -0,0 +1,41 @@
+import json
+
+from keyword_rules import KeywordRules, default_vocabulary
+
+VOCAB = {
+    "lighting": {"default": None, "rules": [
+        {"label": "DRAMATIC", "terms": ["NIGHT*", "FIRE"]},
+        {"label": "GOLDEN HOUR", "terms": ["SUNSET"]},
+    ]},
+    "shot_type": {"default": "MEDIUM SHOT", "rules": [
+        {"label": "CLOSE UP", "terms": ["CLOSE UP", "CU"]},
+        {"label": "WIDE SHOT", "terms": ["WIDE"]},
+    ]},
+}
+
+def test_classify_priority_and_defaults():
+    rules = KeywordRules(VOCAB)
+    assert rules.classify("SUNSET OVER THE FIRE") == {"lighting": "DRAMATIC", "shot_type": "MEDIUM SHOT"}
+    assert rules.classify("A SUNSET") == {"lighting": "GOLDEN HOUR", "shot_type": "MEDIUM SHOT"}
+    assert rules.classify("WIDE THEN CLOSE  UP") == {"shot_type": "CLOSE UP"}
+
+def test_classify_word_boundaries_and_wildcards():
+    rules = KeywordRules(VOCAB)
+    assert rules.classify("NIGHTFALL")["lighting"] == "DRAMATIC"      # NIGHT* runs on to the word end
+    assert "lighting" not in rules.classify("BONFIRES")                # FIRE is a whole word only
+    assert rules.classify("CUT TO BLACK") == {"shot_type": "MEDIUM SHOT"}
+
+def test_empty_vocabulary():
+    assert KeywordRules({}).classify("ANYTHING") == {}
+
+def test_load_prefers_the_given_file(tmp_path):
+    p = tmp_path / "vocab.json"
+    p.write_text(json.dumps(VOCAB), encoding="utf-8")
+    assert KeywordRules.load(str(p)).vocabulary == VOCAB
+
+def test_load_falls_back_to_the_shipped_table(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    bad = tmp_path / "broken.json"
+    bad.write_text("{not json", encoding="utf-8")
+    assert KeywordRules.load(str(bad)).vocabulary == default_vocabulary()
+    assert "unreadable" in capsys.readouterr().out
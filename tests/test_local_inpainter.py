@@ -0,0 +1,96 @@
+import random
+
+import numpy as np
+from PIL import Image
+
+import local_inpainter as li
+
+def _brute_donor(search, hole, w, h, target, var_weight, edge_weight):
+    a = search.astype(np.float64)
+    edge = li._edge_energy(a.astype(np.float32))
+    best, best_score = None, np.inf
+    for py in range(a.shape[0] - h + 1):
+        for px in range(a.shape[1] - w + 1):
+            if px < hole[2] and px + w > hole[0] and py < hole[3] and py + h > hole[1]: continue
+            win = a[py:py + h, px:px + w].reshape(-1, 3)
+            score = ((win.mean(0) - target["mean"]) ** 2).sum()
+            score += var_weight * ((win.std(0) - target["std"]) ** 2).sum()
+            score += edge_weight * (edge[py:py + h, px:px + w].mean() - target["edge"]) ** 2
+            if score < best_score - 1e-6: best, best_score = (px, py), score
+    return best
+
+def test_find_donor_matches_brute_force():
+    rng = np.random.default_rng(1)
+    for _ in range(10):
+        search = rng.integers(0, 256, (30, 34, 3), np.uint8)
+        target = {"mean": rng.uniform(60, 200, 3), "std": rng.uniform(10, 80, 3), "edge": rng.uniform(0, 150)}
+        hole = (12, 10, 20, 18)
+        assert li.find_donor(search, hole, 6, 5, target, 0.5, 0.01) == _brute_donor(search, hole, 6, 5, target, 0.5, 0.01)
+
+def test_find_donor_respects_holes():
+    search = np.full((20, 20, 3), 100, np.uint8)
+    assert li.find_donor(search, (0, 0, 20, 20), 5, 5, {"mean": 100, "std": 0, "edge": 0}) is None
+    pos = li.find_donor(search, (0, 0, 20, 10), 5, 5, {"mean": 100, "std": 0, "edge": 0}, exclude=((0, 10, 10, 20),))
+    assert pos is not None and pos[1] >= 10 and pos[0] >= 10
+
+def test_search_donor_downsampled_stays_valid(monkeypatch):
+    monkeypatch.setattr(li, "SEARCH_MAX_SIDE", 64)
+    rng = np.random.default_rng(2)
+    search = rng.integers(0, 256, (200, 220, 3), np.uint8)
+    search[150:190, 20:60] = 50                                  # The only patch that fits the target
+    hole, w, h = (80, 80, 120, 120), 40, 40
+    px, py = li.search_donor(search, hole, w, h, {"mean": np.full(3, 50.0), "std": np.zeros(3), "edge": 0.0})
+    assert not (px < hole[2] and px + w > hole[0] and py < hole[3] and py + h > hole[1])
+    assert abs(px - 20) <= 3 and abs(py - 150) <= 3
+
+def test_mask_regions():
+    m = np.zeros((20, 30), np.uint8)
+    m[2:5, 3:7] = 255
+    m[5, 7] = 255                       # Diagonal neighbour: same 8-connected component
+    m[10:15, 20:22] = 1
+    m[18, 0] = 1                        # Below min_area
+    regions = sorted(li.mask_regions(Image.fromarray(m)), key=lambda r: r[0])
+    assert [box for box, _ in regions] == [(3, 2, 8, 6), (20, 10, 22, 15)]
+    (x1, y1, x2, y2), shape = regions[0]
+    assert np.array_equal(shape, m[y1:y2, x1:x2] > 0)
+
+def _naive_merge(regions):
+    P = li.BLEND_PAD
+    regions = list(regions)
+    while True:
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                a, b = regions[i][0], regions[j][0]
+                if a[0]-P < b[2]+P and b[0]-P < a[2]+P and a[1]-P < b[3]+P and b[1]-P < a[3]+P:
+                    u = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    regions[i] = (u, None)
+                    del regions[j]
+                    break
+            else: continue
+            break
+        else: return sorted(box for box, _ in regions)
+
+def test_merge_touching_matches_pairwise_merge():
+    rnd = random.Random(4)
+    for _ in range(200):
+        regions = []
+        for _ in range(rnd.randint(1, 20)):
+            x, y, w, h = rnd.randint(0, 800), rnd.randint(0, 800), rnd.randint(1, 40), rnd.randint(1, 40)
+            regions.append(((x, y, x + w, y + h), None))
+        assert sorted(box for box, _ in li._merge_touching(regions)) == _naive_merge(regions)
+
+def test_merge_touching_combines_shapes():
+    a = ((0, 0, 2, 2), np.array([[1, 0], [0, 1]], bool))
+    b = ((3, 0, 4, 1), np.array([[1]], bool))
+    [(box, shape)] = li._merge_touching([a, b])
+    assert box == (0, 0, 4, 2)
+    assert shape.tolist() == [[True, False, False, True], [False, True, False, False]]
+
+def test_erase_returns_a_new_image_and_keeps_alpha():
+    img = Image.new("RGBA", (120, 90), (200, 180, 160, 128))
+    out = li.professional_local_erase(img, 40, 30, 60, 50)
+    assert out is not img and out.mode == "RGBA" and img.getpixel((50, 40)) == (200, 180, 160, 128)
+    assert li.professional_local_erase(img, 40, 30, 60, 50, in_place=True) is img
+    p = Image.new("P", (120, 90), 3)
+    p.info["transparency"] = 3
+    assert li.professional_local_erase(p, 40, 30, 60, 50).mode == "RGBA"
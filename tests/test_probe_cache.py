@@ -0,0 +1,49 @@
+import json
+import subprocess
+
+import probe_cache
+from probe_cache import ProbeCache, nearest_keyframe
+
+def _packet(t, key=False):
+    return {"pts_time": str(t), "flags": "K_" if key else "__"}
+
+def test_keyframe_interval():
+    assert probe_cache._keyframe_interval([_packet(0, True), _packet(1), _packet(2, True), _packet(4, True)]) == (2.0, None)
+    # One keyframe in the scanned packets: unknown, but at least the span after it
+    assert probe_cache._keyframe_interval([_packet(1, True)] + [_packet(1 + i / 30) for i in range(1, 61)]) == (None, 2.0)
+    assert probe_cache._keyframe_interval([]) == (None, None)
+
+def test_keyframe_scan_is_relative_to_start_time(monkeypatch):
+    out = "packet,1.400000,K__\npacket,1.433333,___\npacket,3.400000,K_\npacket,N/A,K_\nformat,1.400000\n"
+    monkeypatch.setattr(subprocess, "run", lambda *a, **k: subprocess.CompletedProcess(a, 0, out, ""))
+    assert probe_cache.run_keyframe_scan("clip.ts") == [0.0, 2.0]
+
+def test_nearest_keyframe():
+    kf = [0.0, 2.0, 4.0]
+    assert nearest_keyframe(kf, 2.9) == 2.0 and nearest_keyframe(kf, 3.1) == 4.0
+    assert nearest_keyframe(kf, 3.9, before=True) == 2.0
+
+def test_probe_returns_copies(tmp_path, monkeypatch):
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"x")
+    calls = []
+    def fake(path, ffprobe):
+        calls.append(path)
+        return {"dur": 10.0, "keyframe_interval": None, "keyframe_interval_min": 8.0}
+    monkeypatch.setattr(probe_cache, "run_ffprobe", fake)
+    monkeypatch.setattr(probe_cache, "run_keyframe_scan", lambda path, ffprobe: [0.0, 10.0, 20.0])
+    cache = ProbeCache(str(tmp_path / "c.sqlite"))
+    cache.probe(str(video))["dur"] = -1                     # Miss: a copy, not the LRU entry
+    cache.probe(str(video))["dur"] = -2                     # Hit: a copy as well
+    assert cache.probe(str(video))["dur"] == 10.0 and len(calls) == 1
+    # The full keyframe index fills in the interval the short packet scan couldn't measure
+    assert cache.keyframes(str(video)) == [0.0, 10.0, 20.0]
+    assert cache.probe(str(video))["keyframe_interval"] == 10.0
+    assert ProbeCache(str(tmp_path / "c.sqlite")).keyframes(str(video), scan=False) == [0.0, 10.0, 20.0]
+
+def test_run_ffprobe_keeps_the_exact_rate(monkeypatch):
+    doc = {"streams": [{"codec_type": "video", "width": 4, "height": 2, "avg_frame_rate": "0/0",
+                        "r_frame_rate": "30000/1001"}], "format": {"duration": "3"}, "packets": []}
+    monkeypatch.setattr(subprocess, "run", lambda *a, **k: subprocess.CompletedProcess(a, 0, json.dumps(doc), ""))
+    meta = probe_cache.run_ffprobe("a.mp4")
+    assert meta["fps_rate"] == "30000/1001" and meta["fps"] == 29.97
@@ -0,0 +1,39 @@
+import os
+
+from render_cache import RenderCache, scene_key
+from scene_parser import Scene
+
+def test_scene_key_tracks_render_inputs():
+    sc = Scene("INT. LAB - NIGHT", "LAB", "NIGHT", "INT", [("A", "hi")], "x")
+    key = scene_key(sc, "Manga", 0, 1)
+    assert key == scene_key(sc, "Manga", 0, 1)
+    assert len({key, scene_key(sc, "Manga", 1, 1), scene_key(sc, "Noir", 0, 1), scene_key(sc, "Manga", 0, 2)}) == 4
+    sc.lighting = "DRAMATIC"
+    assert scene_key(sc, "Manga", 0, 1) != key
+
+def test_hit_and_miss(tmp_path):
+    cache = RenderCache(str(tmp_path / "c"))
+    assert cache.get("ab12") is None
+    src = tmp_path / "panel.png"
+    src.write_bytes(b"png-bytes")
+    cache.put("ab12", str(src))
+    p = cache.get("ab12")
+    assert p and open(p, "rb").read() == b"png-bytes"
+    cache.put_bytes("cd34", b"other")
+    assert open(cache.get("cd34"), "rb").read() == b"other"
+    assert (cache.hits, cache.misses) == (2, 1)
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = RenderCache(str(tmp_path / "c"), max_bytes=350)      # Evicts down to 90%: one entry
+    for i, key in enumerate(("aa01", "bb02", "cc03")):
+        cache.put_bytes(key, bytes(100))
+        os.utime(cache.path(key), (1000 + i, 1000 + i))
+    os.utime(cache.path("aa01"), (2000, 2000))                    # A hit makes it the newest
+    cache.put_bytes("dd04", bytes(100))
+    assert cache.get("bb02") is None
+    assert all(cache.get(k) for k in ("aa01", "cc03", "dd04"))
+    assert cache.nbytes == 300
+
+def test_reopened_cache_counts_existing_entries(tmp_path):
+    RenderCache(str(tmp_path / "c")).put_bytes("ee05", bytes(50))
+    assert RenderCache(str(tmp_path / "c")).nbytes == 50
@@ -0,0 +1,77 @@
+import random
+
+import benchmarks
+from scene_parser import ScriptParser, IncrementalParser, edit_range, HEADER, CHARACTER, PARENTHETICAL, DIALOGUE, ACTION, TRANSITION, BLANK
+
+SCRIPT = """INT. LAB - NIGHT
+
+Sparks fly from the console.
+
+BARRY (V.O.)
+(quietly)
+I have to run.
+
+CUT TO:
+
+EXT. CITY SKYLINE - DAY
+The camera pans across the rooftops."""
+
+FRAGMENTS = ["INT. ROOM - DAY", "EXT. STREET - NIGHT", "BARRY", "IRIS (O.S.)", "(beat)", "Hello there.",
+             "He runs.", "CUT TO:", "", "", "SCENE 4", "The fire spreads.", "A"]
+
+def _lines(text):
+    return [(t.kind, t.text) for t in ScriptParser.tokenize(text.split("\n"))]
+
+def test_tokenize_classifies_each_line():
+    assert _lines(SCRIPT) == [
+        (HEADER, "INT. LAB - NIGHT"), (BLANK, ""), (ACTION, "Sparks fly from the console."), (BLANK, ""),
+        (CHARACTER, "BARRY (V.O.)"), (PARENTHETICAL, "(quietly)"), (DIALOGUE, "I have to run."), (BLANK, ""),
+        (TRANSITION, "CUT TO:"), (BLANK, ""),
+        (HEADER, "EXT. CITY SKYLINE - DAY"), (ACTION, "The camera pans across the rooftops.")]
+
+def test_tokenize_cue_needs_a_following_line():
+    tokens = list(ScriptParser.tokenize(["BARRY", "", "Hi."]))
+    assert tokens[0].kind == ACTION
+    cue = next(ScriptParser.tokenize(["BARRY (V.O.)", "Hi."]))
+    assert (cue.kind, cue.name, cue.extension) == (CHARACTER, "BARRY", "(V.O.)")
+
+def test_parse_text_matches_parse_stream():
+    text = benchmarks._synthetic_script(40)
+    assert ScriptParser.parse_text(text) == list(ScriptParser.parse_stream(iter(text.split("\n"))))
+
+def test_parse_text_scenes():
+    scenes = ScriptParser.parse_text(SCRIPT)
+    assert [sc.header for sc in scenes] == ["INT. LAB - NIGHT", "EXT. CITY SKYLINE - DAY"]
+    assert scenes[0].dialogue == [("BARRY", "I have to run.")]
+    assert scenes[1].camera_movement == "PAN"
+
+def test_edit_range():
+    assert edit_range("abcdef", "abXYef") == (2, 4, 4)
+    assert edit_range("aaa", "aaaa") == (3, 3, 4)
+    assert edit_range("same", "same") == (4, 4, 4)
+    rnd = random.Random(3)
+    for _ in range(500):
+        old = "".join(rnd.choice("ab\n") for _ in range(rnd.randint(0, 12)))
+        new = "".join(rnd.choice("ab\n") for _ in range(rnd.randint(0, 12)))
+        s, oe, ne = edit_range(old, new)
+        assert old[:s] == new[:s] and old[oe:] == new[ne:] and old[:s] + new[s:ne] + old[oe:] == new
+
+def test_incremental_parser_matches_full_parse():
+    rnd = random.Random(7)
+    for _ in range(300):
+        text = "\n".join(rnd.choice(FRAGMENTS) for _ in range(rnd.randint(0, 25)))
+        inc = IncrementalParser(text)
+        for _ in range(5):
+            start = rnd.randint(0, len(inc.text))
+            end = rnd.randint(start, min(len(inc.text), start + 30))
+            ins = "\n".join(rnd.choice(FRAGMENTS) for _ in range(rnd.randint(0, 3)))
+            if rnd.random() < 0.3: ins = rnd.choice(["\n", "I", "INT. ", "X"])
+            inc.update(start, end, ins)
+            assert inc.scenes == ScriptParser.parse_text(inc.text)
+
+def test_incremental_parser_reports_changed_scenes():
+    inc = IncrementalParser(SCRIPT)
+    changed = inc.replace(SCRIPT.replace("rooftops", "river"))
+    assert changed == [1]
+    assert inc.scenes == ScriptParser.parse_text(inc.text)
+    assert inc.replace(inc.text) == []
@@ -0,0 +1,31 @@
+from scene_parser import Scene
+from scene_store import SceneTable
+
+def _scenes():
+    a = Scene("INT. LAB - NIGHT", "LAB", "NIGHT", "INT", [("BARRY", "Run."), ("IRIS", "Now?")], "Sparks — ünïcode.")
+    a.lighting = "DRAMATIC"
+    b = Scene("EXT. ROOF - DAY", "ROOF", "DAY", "EXT", [], "")
+    return [a, b, Scene("SCENE 3", "", "", "", [("X", "")], "A\nB")]
+
+def test_table_indexing():
+    table = SceneTable.from_scenes(_scenes())
+    assert len(table) == 3
+    assert list(table) == _scenes()
+    assert table[-1] == _scenes()[2]
+    assert table.column("lighting") == ["DRAMATIC", "NATURAL", "NATURAL"]
+
+def test_jsonl_round_trip(tmp_path):
+    p = str(tmp_path / "scenes.jsonl")
+    SceneTable.from_scenes(_scenes()).save_jsonl(p)
+    assert list(SceneTable.load_jsonl(p)) == _scenes()
+
+def test_binary_round_trip(tmp_path):
+    p = str(tmp_path / "scenes.bin")
+    SceneTable.from_scenes(_scenes()).save(p)
+    assert list(SceneTable.load(p)) == _scenes()
+    assert list(SceneTable.from_bytes(SceneTable().to_bytes())) == []
+
+def test_binary_rejects_other_data():
+    import pytest
+    with pytest.raises(ValueError):
+        SceneTable.from_bytes(b"JUNK" + bytes(20))
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from strip_sheet import PNGStream, StripSheet
+
+def test_png_stream_decodes_to_the_written_rows(tmp_path):
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (37, 23, 3), np.uint8)
+    p = str(tmp_path / "out.png")
+    s = PNGStream(p, 23, 37)
+    for y in range(0, 37, 10): s.write(img[y:y + 10])
+    s.close()
+    with Image.open(p) as im:
+        assert im.mode == "RGB" and im.size == (23, 37)
+        assert np.array_equal(np.asarray(im), img)
+
+def test_png_stream_rejects_missing_rows(tmp_path):
+    p = tmp_path / "short.png"
+    s = PNGStream(str(p), 4, 4)
+    s.write(np.zeros((2, 4, 3), np.uint8))
+    with pytest.raises(ValueError):
+        s.close()
+    assert not p.exists() and not (tmp_path / "short.png.tmp").exists()
+
+def test_sheet_pages(tmp_path):
+    panels = [Image.new("RGB", (20, 30), (i * 40, 0, 0)) for i in range(5)]
+    sheet = StripSheet(str(tmp_path), "T", panels_per_sheet=2, panel_size=(20, 30))
+    for im in panels: sheet.add(im)
+    pages = sheet.close()
+    assert pages == [sheet.page_path(n) for n in (1, 2, 3)]
+    for p in pages:
+        with Image.open(p) as im: im.load()
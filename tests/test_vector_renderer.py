@@ -0,0 +1,27 @@
+import os
+
+import numpy as np
+
+import benchmarks
+from scene_parser import ScriptParser
+from storyboard_generator import StoryboardGenerator
+from vector_renderer import VectorRenderer
+
+def test_layer_cache_frames_are_pixel_identical(tmp_path):
+    r = VectorRenderer(str(tmp_path))
+    for sc in ScriptParser.parse_text(benchmarks._synthetic_script(12)):
+        assert np.array_equal(np.asarray(benchmarks._frame(r, sc)), np.asarray(benchmarks._legacy_render_frame(r, sc)))
+
+def test_generate_renders_when_a_cache_entry_vanishes(tmp_path):
+    gen = StoryboardGenerator(output_dir=str(tmp_path / "out"), cache=False, parse_cache=False)
+    script = "\n\n".join(f"INT. ROOM {i} - DAY\n\nA man waits." for i in range(3))
+    gen.process_script(script, "Manga", workers=1)
+    gen.renderer.flush()
+    class Evicted:                                   # get() hands out a path evicted right after
+        def get(self, key): return str(tmp_path / "gone.png")
+        def put_bytes(self, key, data): pass
+    gen.cache = Evicted()
+    _, svgs, pngs = gen.process_script(script, "Manga", workers=1)
+    gen.renderer.flush()
+    assert all(os.path.exists(p) for p in svgs + pngs)
+    assert all(os.path.exists(p) for p in gen.render_one(gen.scenes[0], "Manga", 0))
@@ -2,162 +2,236 @@
 Masterpiece Storyboard Engine — Boords-Style Finals
 Finalized Professional Manga Art with Screentone textures.
 """
-import os, math, random, textwrap
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
+import os, threading
+import font_registry
+import display_list
+from panel_writer import PanelWriter, link_or_copy, copy_atomic, write_atomic
+from strip_sheet import StripSheet
 
+RENDERER_VERSION = 2   # Bump whenever drawing changes — invalidates every cached panel
 CW, CH = 640, 840   # Card Dimensions
 FW, FH = 600, 338   # Frame Dimensions (16:9)
 MARGIN = 20
 
-def _font(size, bold=False):
-    names = ["arialbd.ttf", "Arial Bold.ttf", "arial.ttf"] if bold else ["arial.ttf", "Arial.ttf"]
-    for n in names:
-        try: return ImageFont.truetype(n, size)
-        except: pass
-    return ImageFont.load_default()
+def _text(xy, text, size, fill, bold=False):
+    return ("text", xy, text, size, bold, fill)
+
+# ─── Process-Pool Rendering ───────────────────────────────────────────────────
+# One renderer per worker process; workers write their PNG/SVG files and return the paths
+# plus the encoded panel (for the render cache), so no PIL image is ever pickled back.
+_worker = None
+
+def _init_worker(output_dir, options=None):
+    global _worker
+    # Workers already run in parallel, so each writes its own files synchronously
+    _worker = VectorRenderer(output_dir, **(options or {}), writers=0)
+    _worker.keep_panels = False
+
+def _render_in_worker(args):
+    scene, style_name, idx = args
+    written = []
+    out = _worker.render_scene(scene, style_name, idx, written.append)
+    return idx, out, written[0]
 
 class VectorRenderer:
-    def __init__(self, output_dir="output_svg"):
+    def __init__(self, output_dir="output_svg", panel_format="png", compress_level=6, quality=90, writers=2):
         self.output_dir = output_dir
         self.panel_dir = os.path.join(output_dir, "panels")
         os.makedirs(self.panel_dir, exist_ok=True)
-        self.all_panels = []
+        self.all_panels = []     # PIL cards, or panel PNG paths when rendered out of process
+        self.keep_panels = True
+        self.options = dict(panel_format=panel_format, compress_level=compress_level, quality=quality)
+        self.writer = PanelWriter(panel_format, compress_level, quality, workers=writers)
+        self.ext = self.writer.ext
+        # Render-cache version: PNG keys stay as they were; other encodings get their own entries
+        self.cache_tag = RENDERER_VERSION if panel_format == "png" else \
+            f"{RENDERER_VERSION}-{panel_format}" + (f"-q{quality}" if panel_format == "jpeg" else "")
+        self._pending = {}       # idx → card whose files are still being written
+        self._lock = threading.Lock()
+
+    def render_scene(self, scene, style_name, idx, on_written=None):
+        ops = self.card_ops(scene, idx)
+        card = display_list.rasterize((CW, CH), ops)
 
-    def render_scene(self, scene, style_name, idx):
-        card = Image.new("RGB", (CW, CH), (255, 255, 255))
-        draw = ImageDraw.Draw(card, "RGBA")
+        # Save Outputs — encoded once on the writer pool; card(idx) shows it meanwhile
+        with self._lock: self._pending[idx] = card
+        self.writer.submit(self._save, card, idx, ops, on_written)
+        if self.keep_panels: self.all_panels.append(card)
+        return self.svg_path(idx), self.preview_path(idx)
+
+    def card_ops(self, scene, idx):
+        """Display list of the card for scene `idx` — drawn as the PNG and written as the SVG."""
+        ops = []
         
         # 1. Header
-        self._draw_header(draw, scene, idx)
+        self._draw_header(ops, scene, idx)
         
         # 2. Cinematic Art Frame
-        frame_img = self._render_frame(scene)
-        card.paste(frame_img, (MARGIN, 80))
+        ops.append(self._frame_op(scene, (MARGIN, 80)))
         
         # 3. Footer Text Blocks
-        self._draw_footer(draw, scene)
+        self._draw_footer(ops, scene)
         
         # 4. Master Card Border
-        draw.rectangle([0, 0, CW-1, CH-1], outline=(220, 220, 220), width=1)
-        
-        # Save Outputs
-        png_path = os.path.join(self.panel_dir, f"panel_{idx+1}.png")
-        card.save(png_path, quality=97)
-        preview_png = os.path.join(self.output_dir, f"scene_{idx+1}.png")
-        card.save(preview_png)
-        
-        svg_path = os.path.join(self.output_dir, f"scene_{idx+1}.svg")
-        with open(svg_path, "w") as f:
-            f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{CW}" height="{CH}"><image href="{os.path.basename(preview_png)}" width="{CW}" height="{CH}"/></svg>')
-            
-        self.all_panels.append(card)
-        return svg_path, preview_png
-
-    def _draw_header(self, draw, scene, idx):
-        draw.text((MARGIN, 25), f"SCENE {idx+1}", fill=(140, 140, 145), font=_font(12, True))
-        draw.text((MARGIN, 45), scene.header.upper(), fill=(0, 0, 0), font=_font(16, True))
+        ops.append(("rectangle", [0, 0, CW-1, CH-1], dict(outline=(220, 220, 220), width=1)))
+        return ops
+
+    def _save(self, card, idx, ops, on_written):
+        # Panel file first, the scene preview is a hard-link to it
+        data = self.writer.write(card, [self.panel_path(idx), self.preview_path(idx)])
+        self._write_svg(idx, ops)
+        with self._lock:
+            if self._pending.get(idx) is card: del self._pending[idx]
+        # The bytes of this card, not panel_path(idx): a newer render of idx may already own it
+        if on_written: on_written(data)
+
+    def card(self, idx):
+        """The in-memory card of scene `idx` while its files are still being written, else None."""
+        with self._lock:
+            return self._pending.get(idx)
+
+    def flush(self):
+        """Wait until every rendered card is on disk."""
+        self.writer.flush()
+
+    def emit_cached(self, png, idx, scene):
+        """Write the outputs of scene `idx` from an already rendered panel file (render-cache hit).
+        Returns None if the cache entry was evicted before it could be copied."""
+        preview_png = self.preview_path(idx)
+        try: copy_atomic(png, self.panel_path(idx))       # A copy: the cache entry is never shared
+        except OSError: return None
+        link_or_copy(self.panel_path(idx), preview_png)
+        if self.keep_panels: self.all_panels.append(self.panel_path(idx))
+        return self._write_svg(idx, self.card_ops(scene, idx)), preview_png
+
+    def _write_svg(self, idx, ops):
+        svg_path = self.svg_path(idx)
+        write_atomic(svg_path, display_list.to_svg((CW, CH), ops).encode("utf-8"))
+        return svg_path
+
+    def panel_path(self, idx):
+        return os.path.join(self.panel_dir, f"panel_{idx+1}{self.ext}")
+
+    def preview_path(self, idx):
+        return os.path.join(self.output_dir, f"scene_{idx+1}{self.ext}")
+
+    def svg_path(self, idx):
+        return os.path.join(self.output_dir, f"scene_{idx+1}.svg")
+
+    def _draw_header(self, ops, scene, idx):
+        ops.append(_text((MARGIN, 25), f"SCENE {idx+1}", 12, (140, 140, 145), True))
+        ops.append(_text((MARGIN, 45), scene.header.upper(), 16, (0, 0, 0), True))
         
         # Type Indicator Pill
         tag_x = CW - 130
-        draw.rounded_rectangle([tag_x, 30, tag_x+110, 55], radius=12, fill=(245, 245, 250))
-        draw.text((tag_x+18, 36), scene.shot_type.split()[0], fill=(120, 130, 160), font=_font(11, True))
+        ops.append(("rounded_rectangle", [tag_x, 30, tag_x+110, 55], dict(radius=12, fill=(245, 245, 250))))
+        ops.append(_text((tag_x+18, 36), scene.shot_type.split()[0], 11, (120, 130, 160), True))
 
-    def _render_frame(self, scene):
-        frame = Image.new("RGB", (FW, FH), (255, 255, 255))
-        draw = ImageDraw.Draw(frame, "RGBA")
+    def _frame_op(self, scene, xy):
         text = (scene.action + " " + scene.header).upper()
+        caged = "CAGE" in text or "GROVE" in text
+        duo = len(set(d[0].upper() for d in scene.dialogue)) >= 2
+        # A frame is fully decided by its scenery and character layout, so each combination
+        # is rasterized once (from the cached backdrop and sprites) and then only pasted
+        return ("group", xy, (FW, FH), ("frame", caged, duo), self._compose_frame(caged, duo), (255, 255, 255))
+
+    def _compose_frame(self, caged, duo):
+        # Sky + ground, with the scenery elements already composited in
+        ops = [("group", (0, 0), (FW, FH), ("backdrop", caged), self._draw_backdrop(caged), (255, 255, 255))]
 
-        # Screentone Background Sky
-        for x in range(0, FW, 12):
-            for y in range(0, 240, 12):
-                draw.ellipse([x, y, x+3, y+3], fill=(220, 220, 230))
-        
-        # Ground
-        draw.rectangle([0, FH-80, FW, FH], fill=(10, 10, 10))
-        
-        # Scenery Elements
-        if "CAGE" in text or "GROVE" in text:
-            for i in range(-1, 2):
-                tx = FW//2 + i*180
-                draw.line([(tx, FH-80), (tx, 20)], fill=(0,0,0), width=6)
-                if i == 0: # Suspended cage
-                    draw.rectangle([tx-35, 40, tx+35, 160], outline=(0,0,0), width=3)
-                    for l in range(5):
-                        draw.line([(tx-35+l*14, 40), (tx-35+l*14, 160)], fill=(0,0,0), width=1)
-        
         # Multi-Character Confrontation
-        speakers = sorted(list(set([d[0].upper() for d in scene.dialogue])))
-        if len(speakers) >= 2:
-            self._draw_manga_char(draw, 140, FH-50, scale=0.8, name=speakers[0])
-            self._draw_manga_char(draw, FW-140, FH-50, scale=0.8, name=speakers[1], flip=True)
+        if duo:
+            ops.append(self._char_op(140, FH-50, scale=0.8))
+            ops.append(self._char_op(FW-140, FH-50, scale=0.8, flip=True))
         else:
-            self._draw_manga_char(draw, FW//2, FH-30, scale=1.0)
-            
-        return frame
+            ops.append(self._char_op(FW//2, FH-30, scale=1.0))
+        return ops
+
+    def _draw_backdrop(self, caged=False):
+        # Screentone Background Sky
+        ops = [("tone", (0, 0, FW, 240), 12, 3, (220, 220, 230))]
+        # Ground
+        ops.append(("rectangle", [0, FH-80, FW, FH], dict(fill=(10, 10, 10))))
+        if caged: self._draw_cage(ops)
+        return ops
+
+    def _draw_cage(self, ops):
+        for i in range(-1, 2):
+            tx = FW//2 + i*180
+            ops.append(("line", [(tx, FH-80), (tx, 20)], dict(fill=(0,0,0), width=6)))
+            if i == 0: # Suspended cage
+                ops.append(("rectangle", [tx-35, 40, tx+35, 160], dict(outline=(0,0,0), width=3)))
+                for l in range(5):
+                    ops.append(("line", [(tx-35+l*14, 40), (tx-35+l*14, 160)], dict(fill=(0,0,0), width=1)))
+
+    def _char_op(self, cx, cy, scale=1.0, flip=False):
+        """The character sprite (a cached transparent layer) with its anchor at (cx, cy)."""
+        pad = 8                                  # Room for outline widths
+        ax, ay = int(65*scale) + pad, int(175*scale) + pad
+        size = (2*ax + 1, ay + int(180*scale) + pad + 1)
+        return ("group", (cx - ax, cy - ay), size, ("char", scale, flip),
+                self._char_ops(ax, ay, scale=scale, flip=flip), None)
 
-    def _draw_manga_char(self, draw, cx, cy, scale=1.0, name="", flip=False):
+    def _char_ops(self, cx, cy, scale=1.0, flip=False):
         s = scale
         dir = -1 if flip else 1
         col = (0, 0, 0)
+        ops = []
         
         # Spiky Gojo Hair
         h_pts = [(cx-35*s*dir, cy-110*s), (cx-50*s*dir, cy-140*s), (cx-20*s*dir, cy-125*s),
                  (cx, cy-175*s), (cx+20*s*dir, cy-125*s), (cx+50*s*dir, cy-140*s), (cx+35*s*dir, cy-110*s)]
-        draw.polygon(h_pts, fill=(255,255,255), outline=col, width=3)
+        ops.append(("polygon", h_pts, dict(fill=(255,255,255), outline=col, width=3)))
         
         # Sharp V-Jaw
         j_pts = [(cx-32*s*dir, cy-115*s), (cx, cy-65*s), (cx+32*s*dir, cy-115*s)]
-        draw.polygon(j_pts, fill=(255,255,255), outline=col, width=3)
+        ops.append(("polygon", j_pts, dict(fill=(255,255,255), outline=col, width=3)))
         
         # Intensity Eyes
         ex1, ex2 = sorted([cx-16*s*dir, cx-8*s*dir])
         ex3, ex4 = sorted([cx+8*s*dir, cx+16*s*dir])
-        draw.line([(cx-22*s*dir, cy-95*s), (cx-5*s*dir, cy-93*s)], fill=col, width=4)
-        draw.line([(cx+22*s*dir, cy-95*s), (cx+5*s*dir, cy-93*s)], fill=col, width=4)
-        draw.ellipse([ex1, cy-88*s, ex2, cy-82*s], fill=(56, 189, 248), outline=col)
-        draw.ellipse([ex3, cy-88*s, ex4, cy-82*s], fill=(56, 189, 248), outline=col)
+        ops.append(("line", [(cx-22*s*dir, cy-95*s), (cx-5*s*dir, cy-93*s)], dict(fill=col, width=4)))
+        ops.append(("line", [(cx+22*s*dir, cy-95*s), (cx+5*s*dir, cy-93*s)], dict(fill=col, width=4)))
+        ops.append(("ellipse", [ex1, cy-88*s, ex2, cy-82*s], dict(fill=(56, 189, 248), outline=col)))
+        ops.append(("ellipse", [ex3, cy-88*s, ex4, cy-82*s], dict(fill=(56, 189, 248), outline=col)))
         
         # Body (Jacket)
         b_pts = [(cx-55*s*dir, cy-65*s), (cx-65*s*dir, cy+180*s), (cx+65*s*dir, cy+180*s), (cx+55*s*dir, cy-65*s)]
-        draw.polygon(b_pts, fill=col, outline=(40, 40, 40), width=1)
+        ops.append(("polygon", b_pts, dict(fill=col, outline=(40, 40, 40), width=1)))
         # Collar Screentone (diagonal lines)
         for i in range(4):
-            draw.line([(cx-10*s*dir, cy-55*s+i*4), (cx+10*s*dir, cy-55*s+i*(4 if not flip else -4))], fill=(100,100,100))
+            ops.append(("line", [(cx-10*s*dir, cy-55*s+i*4), (cx+10*s*dir, cy-55*s+i*(4 if not flip else -4))],
+                        dict(fill=(100,100,100))))
+        return ops
 
-    def _draw_footer(self, draw, scene):
-        f_lbl = _font(11, bold=True)
-        f_txt = _font(13)
+    def _draw_footer(self, ops, scene):
+        f_txt = font_registry.font(13)
+        line_h = font_registry.line_spacing(f_txt)
         
         # Action Block
-        draw.text((MARGIN, 450), "ACTION", fill=(160, 160, 165), font=f_lbl)
-        act = textwrap.fill(scene.action, width=82)
-        draw.text((MARGIN, 470), act, fill=(30, 30, 30), font=f_txt)
+        ops.append(_text((MARGIN, 450), "ACTION", 11, (160, 160, 165), True))
+        act = font_registry.wrap(scene.action, f_txt, CW - 2*MARGIN)    # Wrapped on pixel widths
+        ops.append(_text((MARGIN, 470), act, 13, (30, 30, 30)))
         
         # Dialogue Block
         if scene.dialogue:
-            draw.text((MARGIN, 650), "DIALOGUE", fill=(160, 160, 165), font=f_lbl)
+            ops.append(_text((MARGIN, 650), "DIALOGUE", 11, (160, 160, 165), True))
             y = 675
             for speaker, speech in scene.dialogue[:2]:
-                draw.text((MARGIN, y), f"{speaker}:", fill=(0, 0, 0), font=_font(12, True))
+                ops.append(_text((MARGIN, y), f"{speaker}:", 12, (0, 0, 0), True))
                 y += 20
-                swp = textwrap.fill(f'"{speech}"', width=74)
-                draw.text((MARGIN+15, y), swp, fill=(50, 50, 50), font=f_txt)
-                y += len(swp.split("\n")) * 18 + 12
+                swp = font_registry.wrap(f'"{speech}"', f_txt, CW - 2*MARGIN - 15)
+                ops.append(_text((MARGIN+15, y), swp, 13, (50, 50, 50)))
+                y += len(swp) * line_h + 12
 
-    def build_strip_sheet(self, title="MANGA PRODUCTION — MASTERPIECE"):
-        out = os.path.join(self.output_dir, "storyboard_sheet.png")
+    def build_strip_sheet(self, title="MANGA PRODUCTION — MASTERPIECE", panels_per_sheet=None, tiles=False):
+        """Stream all_panels into the strip sheet (pages of `panels_per_sheet`); the panel
+        list is released as it goes. Returns the first sheet path."""
         if not self.all_panels: return ""
-        cols = 2
-        rows = math.ceil(len(self.all_panels) / cols)
-        sheet_w = (CW + 40) * cols
-        sheet_h = rows * (CH + 40) + 120
-        sheet = Image.new("RGB", (sheet_w, sheet_h), (245, 245, 245))
-        draw = ImageDraw.Draw(sheet)
-        draw.text((40, 35), title, fill=(0, 0, 0), font=_font(38, True))
-        for i, p in enumerate(self.all_panels):
-            x = 40 + (i % cols) * (CW + 40)
-            y = 120 + (i // cols) * (CH + 40)
-            sheet.paste(p, (x, y))
-        sheet.save(out)
-        return out
+        self.flush()
+        sheet = StripSheet(self.output_dir, title, panels_per_sheet=panels_per_sheet,
+                           panel_size=(CW, CH), tiles=tiles)
+        panels, self.all_panels = self.all_panels, []
+        for p in panels: sheet.add(p)
+        del panels
+        return sheet.close()[0]
@@ -0,0 +1,112 @@
+"""
+WatermarkPipeline — Streaming Per-Frame Watermark Removal
+ffmpeg decodes to a rawvideo pipe, only the watermark ROI tile of each frame is sliced
+out (NumPy view) and inpainted by local_inpainter in a worker pool, and the frames are
+piped straight back into an ffmpeg encoder with the source audio passed through.
+Handles moving backgrounds and animated logos; nothing is written to disk per frame.
+"""
+import os
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+import local_inpainter
+
+class Cancelled(Exception):
+    pass
+
+def _read_into(stream, buf):
+    """Fill `buf` from the pipe; False at EOF/short read."""
+    view, got = memoryview(buf), 0
+    while got < len(buf):
+        n = stream.readinto(view[got:])
+        if not n: return False
+        got += n
+    return True
+
+def _erase_tile(tile, rect):
+    """Inpaint `rect` (tile coordinates) in an RGB tile array, returning the RGB result."""
+    x1, y1, x2, y2 = rect
+    return np.asarray(local_inpainter.professional_local_erase(Image.fromarray(tile), x1, y1, x2, y2, in_place=True))
+
+def remove_watermark_stream(src, out, rect, info, ffmpeg="ffmpeg", workers=None, max_inflight=None,
+                            crf=18, progress=None, cancel=None):
+    """
+    Remove the watermark at `rect` = (x, y, w, h) from every frame of `src`, writing `out`.
+    `progress(done, total)` is called from this thread; set the `cancel` Event to abort.
+    """
+    W, H = (info["w"], info["h"]) if info.get("rotation", 0) not in (90, 270) else (info["h"], info["w"])
+    fps = info.get("fps") or 25.0
+    rate = info.get("fps_rate") or str(fps)      # Exact rational, so the video can't drift from the audio
+    total = info.get("nb_frames") or int(round(info.get("dur", 0) * fps)) or 1
+    x, y, w, h = rect
+    x1, y1, x2, y2 = max(0, x), max(0, y), min(W, x + w), min(H, y + h)
+    if x2 <= x1 or y2 <= y1: raise ValueError("Watermark area is outside the frame.")
+
+    # Tile = ROI plus everything the inpainter reads (search window) — the only pixels copied per frame
+    tx1, ty1, tx2, ty2 = local_inpainter.tile_box((W, H), x1, y1, x2, y2)
+    local = (x1 - tx1, y1 - ty1, x2 - tx1, y2 - ty1)
+    # Write-back = ROI plus blend feathering, in tile and frame coordinates
+    pad = local_inpainter.BLEND_PAD
+    bx1, by1 = max(tx1, x1 - pad), max(ty1, y1 - pad)
+    bx2, by2 = min(tx2, x2 + pad), min(ty2, y2 + pad)
+
+    workers = max(1, workers or (os.cpu_count() or 2))
+    max_inflight = max(1, max_inflight or workers * 2)
+    cancel = cancel or threading.Event()
+
+    dec = subprocess.Popen([ffmpeg, "-v", "error", "-i", src, "-map", "0:v:0", "-f", "rawvideo",
+                            "-pix_fmt", "rgb24", "pipe:1"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    enc_log = tempfile.TemporaryFile()
+    enc = subprocess.Popen([ffmpeg, "-y", "-v", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                            "-s", f"{W}x{H}", "-r", rate, "-i", "pipe:0", "-i", src,
+                            "-map", "0:v:0", "-map", "1:a?", "-c:v", "libx264", "-crf", str(crf),
+                            "-pix_fmt", "yuv420p", "-c:a", "copy", "-shortest", out],
+                           stdin=subprocess.PIPE, stderr=enc_log)
+    inflight = deque()
+    done = 0
+
+    def flush_one():
+        nonlocal done
+        frame, fut = inflight.popleft()
+        res = fut.result()
+        frame[by1:by2, bx1:bx2] = res[by1-ty1:by2-ty1, bx1-tx1:bx2-tx1]
+        enc.stdin.write(frame.data)
+        done += 1
+        if progress: progress(min(done, total), total)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while not cancel.is_set():
+                buf = bytearray(W * H * 3)
+                if not _read_into(dec.stdout, buf): break
+                frame = np.frombuffer(buf, np.uint8).reshape(H, W, 3)
+                tile = frame[ty1:ty2, tx1:tx2]           # View — copied once by Image.fromarray in the worker
+                inflight.append((frame, pool.submit(_erase_tile, tile, local)))
+                if len(inflight) >= max_inflight:        # Backpressure: stop decoding until the oldest frame is out
+                    flush_one()
+            while inflight and not cancel.is_set():
+                flush_one()
+        if cancel.is_set(): raise Cancelled()
+        enc.stdin.close()
+        if enc.wait() != 0:
+            enc_log.seek(0)
+            raise RuntimeError(f"FFmpeg encode failed: {enc_log.read().decode(errors='replace')[-300:]}")
+        if progress: progress(total, total)
+        return out
+    except BaseException:
+        enc.kill()
+        enc.wait()
+        if os.path.exists(out):
+            try: os.remove(out)
+            except OSError: pass
+        raise
+    finally:
+        dec.stdout.close()
+        dec.kill()
+        dec.wait()
+        enc_log.close()